@@ -0,0 +1,364 @@
+from array import array
+import heapq
+import math
+from operator import itemgetter
+
+class CountMinSketch:
+    """
+    This class estimates the counts of a stream of hashable keys in a fixed amount of memory. The counts are
+    kept in depth rows of width counters and a key is counted in one counter of every row. The estimate of a
+    key is the smallest of its counters, so it is never below the true count and, with probability at least
+    1-exp(-depth), it is at most the true count plus e/width times the number of keys added
+
+    ...
+
+    Attributes
+    ----------
+    width : int
+        The number of counters in every row
+    depth : int
+        The number of rows
+    total : int
+        The number of keys added, duplicates included
+
+    Methods
+    -------
+    add(key,value=1)
+        Adds value to the count of the key
+
+    estimate(key)
+        Returns the estimated count of the key
+
+    error()
+        Returns the bound on the overestimate of any count
+
+    """
+
+
+    def __init__(self,width,depth=4):
+        """
+        Parameters
+        ----------
+        width : int
+            The number of counters in every row
+        depth : int
+            The number of rows
+        """
+        self.width = max(1,width)
+        self.depth = max(1,depth)
+        self.total = 0
+        self._table = array('Q',bytes(8*self.width*self.depth))
+
+
+    def _indexes(self,key):
+        h1 = hash(key)
+        h2 = hash((h1,'cms')) | 1
+        width = self.width
+        return [row*width+(h1+row*h2)%width for row in range(self.depth)]
+
+
+    def add(self,key,value=1):
+        """This method adds value to the count of the key"""
+        table = self._table
+        for i in self._indexes(key):
+            table[i] += value
+        self.total += value
+
+
+    def estimate(self,key):
+        """This method returns the estimated count of the key, never below its true count"""
+        table = self._table
+        return min(table[i] for i in self._indexes(key))
+
+
+    def error(self):
+        """This method returns the bound on the overestimate of any count, e/width times the number of keys
+        added, which holds with probability 1-exp(-depth)
+
+        """
+        return math.e/self.width*self.total
+
+
+    def confidence(self):
+        """This method returns the probability with which the error bound holds"""
+        return 1-math.exp(-self.depth)
+
+
+class SpaceSaving:
+    """
+    This class keeps the approximate counts of the most frequent keys of a stream in at most capacity entries
+    with the Space-Saving algorithm. When a new key arrives and all the entries are taken, the key with the
+    smallest count is replaced and the new key inherits that count as its error. Every key seen more than
+    total/capacity times is monitored, the count of a monitored key is never below its true count and it
+    overestimates it by at most its error
+
+    ...
+
+    Attributes
+    ----------
+    capacity : int
+        The maximum number of keys monitored
+    total : int
+        The number of keys added, duplicates included
+    counts : Dictionary
+        The estimated count of every monitored key in the order it started to be monitored
+    errors : Dictionary
+        The maximum overestimate of the count of every monitored key
+
+    Methods
+    -------
+    add(key)
+        Counts one occurrence of the key
+
+    error()
+        Returns the bound on the overestimate of any count
+
+    """
+
+
+    def __init__(self,capacity):
+        """
+        Parameters
+        ----------
+        capacity : int
+            The maximum number of keys monitored
+        """
+        self.capacity = max(1,capacity)
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        self._heap = []
+
+
+    def add(self,key):
+        """This method counts one occurrence of the key. The smallest entry is found with a heap whose stale
+        entries are refreshed lazily, so an addition costs amortised logarithmic time
+
+        """
+        counts = self.counts
+        self.total += 1
+        if key in counts:
+            counts[key] += 1
+            return
+        if len(counts)<self.capacity:
+            counts[key] = 1
+            self.errors[key] = 0
+            heapq.heappush(self._heap,(1,key))
+            return
+        heap = self._heap
+        while True:
+            count,smallest = heap[0]
+            if counts[smallest]==count:
+                break
+            heapq.heapreplace(heap,(counts[smallest],smallest))
+        heapq.heapreplace(heap,(count+1,key))
+        del counts[smallest]
+        del self.errors[smallest]
+        counts[key] = count+1
+        self.errors[key] = count
+
+
+    def error(self):
+        """This method returns the bound on the overestimate of any monitored count. It is 0 as long as no key
+        has been replaced
+
+        """
+        return min(self.counts.values()) if len(self.counts)>=self.capacity else 0
+
+
+class ApproximateNgramCounter:
+    """
+    This class is a drop in replacement for NgramCounter whose counts take a fixed amount of memory, instead of
+    one entry per distinct n-gram. The candidate n-grams are counted with Space-Saving and the counts of the
+    tokens at every position with a count-min sketch, both sized from a memory budget. update can be called
+    batch after batch, so TextToTopics streams the n-grams of the content through it without ever holding the
+    token ids of the whole content. The PMI of an n-gram is computed as in NgramCounter from the guaranteed
+    part of its count, the estimate minus its possible overestimate, so an n-gram is only scored if it surely
+    occurs more than the threshold, and the top topics of millions of tokens can be ranked from counts in fixed
+    memory. The bounds on the errors of the counts are returned by bounds() and check_accuracy compares the
+    results with the exact counts. The frequency ranking degrades gracefully as the budget shrinks; the PMI
+    ranking favours n-grams seen only a few times more than the threshold, so it needs a budget large enough to
+    monitor those, which check_accuracy shows
+
+    ...
+
+    Attributes
+    ----------
+    n : int
+        n in n-grams. Every n-gram added must have n tokens
+    memory : int
+        The memory budget in bytes, split evenly between the sketch and the n-gram entries
+    total : int
+        The number of n-grams added, duplicates included
+    ngram_counts : Dictionary
+        The estimated count of every monitored n-gram
+    sketch : CountMinSketch
+        The counts of the (position, token) pairs
+    heavy_hitters : SpaceSaving
+        The counts of the n-grams
+
+    Methods
+    -------
+    update(ngrams)
+        Adds the n-grams to the counts
+
+    pmi_scores(threshold=2)
+        Yields every monitored n-gram guaranteed to occur more than threshold times with its PMI score
+
+    most_common_pmi(number=None,threshold=2)
+        Returns the top n-grams by PMI score
+
+    most_common_frequency(number=None)
+        Returns the top n-grams by estimated count
+
+    bounds()
+        Returns the error bounds of the counts
+
+    check_accuracy(exact,number=10,threshold=2)
+        Compares the rankings and counts with those of an exact NgramCounter
+
+    """
+
+    ENTRY_SIZE = 256
+
+
+    def __init__(self,n,memory=16*1024*1024,depth=4):
+        """
+        Parameters
+        ----------
+        n : int
+            n in n-grams. Specifies how many contiguous word tokens form an n-gram.
+        memory : int
+            The memory budget in bytes. The approximate size of one monitored n-gram is ENTRY_SIZE bytes
+        depth : int
+            The number of rows of the count-min sketch
+        """
+        self.n = n
+        self.memory = memory
+        self.sketch = CountMinSketch(memory//2//(8*depth),depth)
+        self.heavy_hitters = SpaceSaving((memory-memory//2)//self.ENTRY_SIZE)
+        self.ngram_counts = self.heavy_hitters.counts
+
+
+    @property
+    def total(self):
+        return self.heavy_hitters.total
+
+
+    def update(self,ngrams):
+        """This method adds the n-grams to the counts
+
+        Parameters
+        ----------
+        ngrams : iterable
+            Every element is a sequence of n tokens
+
+        """
+        heavy_hitters = self.heavy_hitters
+        sketch = self.sketch
+        for ngram in ngrams:
+            ngram = tuple(ngram)
+            heavy_hitters.add(ngram)
+            for i in range(len(ngram)):
+                sketch.add((i,ngram[i]))
+
+
+    def pmi_scores(self,threshold=2):
+        """This method yields (n-gram, score) for every monitored n-gram whose guaranteed count is more than
+        threshold. Space-Saving overestimates the count of an n-gram by at most the count it took over when the
+        n-gram replaced another, so the guaranteed count is the estimate minus that error. The score is computed
+        as in NgramCounter.pmi_scores from the guaranteed count and the estimated counts of the tokens
+
+        Parameters
+        ----------
+        threshold : int
+            Only n-grams that occur more than threshold times are scored
+
+        """
+        total = self.total
+        estimate = self.sketch.estimate
+        errors = self.heavy_hitters.errors
+        for ngram,count in self.ngram_counts.items():
+            count -= errors[ngram]
+            if(count>threshold):
+                p_all = count/total
+                p_other = 1
+                for i in range(len(ngram)):
+                    p_other = p_other * estimate((i,ngram[i]))/total
+                pmi = math.log(p_all/p_other)
+                score = 0
+                for occurrence in range(count):
+                    score += pmi
+                yield ngram,score
+
+
+    def most_common_pmi(self,number=None,threshold=2):
+        """This method returns a list of (n-gram, score) sorted by score, highest first
+
+        Parameters
+        ----------
+        number : int (optional)
+            The top n-grams to be returned
+        threshold : int
+            Only n-grams that occur more than threshold times are scored
+
+        """
+        if number:
+            return heapq.nlargest(number,self.pmi_scores(threshold),key=itemgetter(1))
+        return sorted(self.pmi_scores(threshold),key=itemgetter(1),reverse=True)
+
+
+    def most_common_frequency(self,number=None):
+        """This method returns a list of (n-gram, estimated count) sorted by count, highest first
+
+        Parameters
+        ----------
+        number : int (optional)
+            The top n-grams to be returned
+
+        """
+        if number:
+            return heapq.nlargest(number,self.ngram_counts.items(),key=itemgetter(1))
+        return sorted(self.ngram_counts.items(),key=itemgetter(1),reverse=True)
+
+
+    def bounds(self):
+        """This method returns a dictionary with the error bounds of the counts. Every estimated count is at
+        least the true count. The count of a monitored n-gram is at most ngram_count_error above its true count
+        and an n-gram that is not monitored occurs at most ngram_count_error times. The count of a token at a
+        position is at most unigram_count_error above its true count with probability confidence
+
+        """
+        return {'ngram_count_error':self.heavy_hitters.error(),
+                'unigram_count_error':self.sketch.error(),
+                'confidence':self.sketch.confidence(),
+                'monitored_ngrams':len(self.ngram_counts),
+                'capacity':self.heavy_hitters.capacity}
+
+
+    def check_accuracy(self,exact,number=10,threshold=2):
+        """This method compares the counts and rankings with those of an NgramCounter fed the same n-grams. It
+        returns a dictionary with the share of the exact top number n-grams by PMI and by frequency that are also
+        in the approximate top number, and the largest errors of the n-gram and the unigram counts
+
+        Parameters
+        ----------
+        exact : NgramCounter
+            The exact counts of the same n-grams
+        number : int
+            The number of top n-grams compared
+        threshold : int
+            Only n-grams that occur more than threshold times are scored
+
+        """
+        def recall(expected,found):
+            expected = set(ngram for ngram,score in expected)
+            if not expected:
+                return 1.0
+            return len(expected & set(ngram for ngram,score in found))/len(expected)
+        estimate = self.sketch.estimate
+        return {'pmi_recall':recall(exact.most_common_pmi(number,threshold),self.most_common_pmi(number,threshold)),
+                'frequency_recall':recall(exact.most_common_frequency(number),self.most_common_frequency(number)),
+                'max_ngram_count_error':max([count-exact.ngram_counts[ngram] for ngram,count in self.ngram_counts.items()] or [0]),
+                'max_unigram_count_error':max([estimate((i,token))-count for i,position in enumerate(exact.position_counts)
+                                               for token,count in position.items()] or [0])}
@@ -0,0 +1,175 @@
+from UrlToText import UrlToText
+from HtmlDocument import HtmlDocument
+from Deadline import Deadline
+from TextToTopics import TextToTopics
+from Lexicon import Lexicon
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import threading
+import json
+import os
+
+_lexicons = {}
+
+def extract_topics(content,ns,approaches,number,lexicon=None,result_cache=None,deadline=None):
+    """This function runs the topic extraction for the content of one webpage. It runs in a worker process of
+    the process pool, so it has to be a module level function. The content is processed once for all the
+    combinations of n and approach. lexicon is the path of a Lexicon file; it is opened once per process and
+    its memory-mapped pages are shared by all the worker processes. result_cache is a ResultCache, it is
+    pickled to the worker and opens its own connections there. deadline is the Deadline of the webpage, the
+    topics are marked partial if it ran out
+
+    """
+    if lexicon is not None and lexicon not in _lexicons:
+        _lexicons[lexicon] = Lexicon(lexicon)
+    text_topics = TextToTopics(content,lexicon=_lexicons.get(lexicon),deadline=deadline,cache=result_cache)
+    return list(text_topics.topics(ns,approaches,number).items())
+
+
+class BatchExtractor:
+    """
+    This class extracts the topics of many webpages concurrently. The webpages are fetched by a pool of
+    threads that share pooled keep-alive connections, and the CPU bound topic extraction runs in a pool of
+    processes so that it is not serialised behind the GIL. One JSON result is written per URL as soon as
+    it is ready. With several values of n or approaches there is one JSON line per URL and combination.
+    With a deadline every URL gets its own time budget, and the results of a URL cut short are marked partial
+
+    ...
+
+    Attributes
+    ----------
+    ns : list(int)
+        The values of n in n-grams
+    approaches : list(str)
+        pmi for Pointwise Mututal Information and/or pos for part of speech tag filtering
+    number : int
+        The number of top topics returned per URL
+    concurrency : int
+        The maximum number of webpages fetched at the same time
+    processes : int
+        The number of worker processes for the topic extraction. None for the number of CPUs
+    lexicon : str
+        Path of a Lexicon file used by the workers. None for NLTK only
+    result_cache : ResultCache
+        The cache of the topics of the contents already processed, shared by the workers. None for no cache
+    deadline : float
+        The number of seconds the fetch and the topic extraction of every URL may take. None for no limit
+    url_options : Dictionary
+        Extra keyword arguments passed to UrlToText, for eg. streaming=True
+
+    Methods
+    -------
+    read_urls(lines)
+        Yields the URLs of the lines, skipping blank lines and # comments
+
+    run(urls,output)
+        Extracts the topics of every URL and writes one JSON line per URL to output
+
+    """
+
+
+    def __init__(self,ns=(3,),approaches=('pmi',),number=5,concurrency=8,processes=None,lexicon=None,result_cache=None,deadline=None,
+                 **url_options):
+        """
+        Parameters
+        ----------
+        ns : iterable(int)
+            The values of n in n-grams
+        approaches : iterable(str)
+            pmi and/or pos
+        number : int
+            The number of top topics returned per URL
+        concurrency : int
+            The maximum number of webpages fetched at the same time
+        processes : int (optional)
+            The number of worker processes for the topic extraction
+        lexicon : str (optional)
+            Path of a Lexicon file used by the workers
+        result_cache : ResultCache (optional)
+            The cache of the topics of the contents already processed, shared by the workers
+        deadline : float (optional)
+            The number of seconds the fetch and the topic extraction of every URL may take. max_bytes in the
+            url_options then also caps the download without streaming
+        url_options : keyword arguments
+            Passed to UrlToText
+        """
+        self.ns = list(ns)
+        self.approaches = list(approaches)
+        self.number = number
+        self.concurrency = concurrency
+        self.processes = processes
+        self.lexicon = lexicon
+        self.result_cache = result_cache
+        self.deadline = deadline
+        self.url_options = url_options
+
+
+    @staticmethod
+    def read_urls(lines):
+        """This method yields the URLs of the lines, skipping blank lines and lines starting with #
+
+        Parameters
+        ----------
+        lines : iterable(str)
+            for eg. an open file or sys.stdin
+
+        """
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
+    def _process_url(self,url,session,pool):
+        """This method fetches one webpage, hands its content to the process pool and returns a list with one
+        result dictionary per combination of n and approach. Errors are returned in the results instead of
+        being raised. The deadline of the URL starts when its fetch does
+
+        """
+        deadline = Deadline(self.deadline,self.url_options.get('max_bytes')) if self.deadline else None
+        try:
+            content = UrlToText(url,session=session,deadline=deadline,**self.url_options).get_total_content()
+            results = pool.submit(extract_topics,content,self.ns,self.approaches,self.number,self.lexicon,
+                                  self.result_cache,deadline).result()
+            return [{'url':url,'n':n,'approach':approach,'topics':topics,'partial':topics.partial}
+                    for (approach,n),topics in results]
+        except Exception as e:
+            return [{'url':url,'n':n,'approach':approach,'error':str(e)} for approach in self.approaches for n in self.ns]
+
+
+    def run(self,urls,output):
+        """This method extracts the topics of every URL and writes one JSON line per URL to output in the order
+        the URLs finish. Every result is written by the thread that finished it, so it is not held back by
+        the slower URLs in flight or by waiting for the next URL to be read. At most concurrency URLs are in
+        flight at a time, so the URLs can be a lazy stream. The worker processes are all started before the
+        fetching threads, so no process is forked while other threads are running.
+
+        Parameters
+        ----------
+        urls : iterable(str)
+            The URLs of the webpages
+        output : file
+            Where the JSON lines are written, for eg. sys.stdout
+
+        """
+        session = HtmlDocument.make_session(self.concurrency)
+        processes = self.processes or os.cpu_count() or 1
+        with ProcessPoolExecutor(processes) as pool:
+            wait([pool.submit(os.getpid) for i in range(processes)])
+            with ThreadPoolExecutor(self.concurrency) as threads:
+                lock = threading.Lock()
+                pending = set()
+                for url in urls:
+                    if len(pending)>=self.concurrency:
+                        pending = wait(pending,return_when=FIRST_COMPLETED).not_done
+                    future = threads.submit(self._process_url,url,session,pool)
+                    future.add_done_callback(lambda future: self._write(future,output,lock))
+                    pending.add(future)
+                wait(pending)
+        session.close()
+
+
+    def _write(self,future,output,lock):
+        lines = ''.join(json.dumps(result)+'\n' for result in future.result())
+        with lock:
+            output.write(lines)
+            output.flush()
@@ -0,0 +1,278 @@
+from array import array
+import threading
+import hashlib
+import struct
+import heapq
+import sys
+import os
+
+class BoilerplateIndex:
+    """
+    This class recognises the text blocks repeated across the webpages of a site, for eg. headers, cookie
+    banners, sidebars and footers. Every block is hashed and the index counts in how many webpages every hash
+    was seen. Every webpage is counted once, it is recognised by its URL or else by the hashes of its blocks,
+    so fetching the same webpage again does not make its blocks boilerplate. Once min_pages webpages have been
+    seen, the blocks seen in more than fraction of them are boilerplate and are dropped at extraction time,
+    before any NLP is done on them and before they skew the PMI scores. The index keeps at most max_blocks
+    block hashes, the rarest are forgotten first, and at most max_blocks webpage hashes, the oldest are
+    forgotten first. It can be saved to and loaded from a file so it is reused across runs. It is safe to
+    share between threads
+
+    ...
+
+    Attributes
+    ----------
+    fraction : float
+        Blocks seen in more than this fraction of the webpages are boilerplate
+    min_pages : int
+        The number of webpages that must be seen before any block is dropped
+    max_blocks : int
+        The maximum number of block hashes kept, and of webpage hashes
+    pages : int
+        The number of webpages seen
+    counts : Dictionary
+        The number of webpages every block hash was seen in
+    seen : Dictionary
+        The hashes of the webpages counted, oldest first
+
+    Methods
+    -------
+    block_hash(block)
+        Returns the hash of a text block
+
+    page_hash(blocks,page=None)
+        Returns the hash that recognises a webpage
+
+    add_page(blocks,page=None)
+        Counts the blocks of one webpage, unless it was already counted
+
+    is_boilerplate(block)
+        Returns True if the block is boilerplate
+
+    filter(blocks)
+        Returns the blocks that are not boilerplate
+
+    process(blocks,page=None)
+        Counts the blocks of one webpage and returns those that are not boilerplate
+
+    save(path) / load(path)
+        Write the index to and read it from a file
+
+    """
+
+    MAGIC = b'BPI1'
+    HEADER = struct.Struct('<4sQQQ')
+
+
+    def __init__(self,fraction=0.5,min_pages=5,max_blocks=100000):
+        """
+        Parameters
+        ----------
+        fraction : float
+            Blocks seen in more than this fraction of the webpages are boilerplate
+        min_pages : int
+            The number of webpages that must be seen before any block is dropped
+        max_blocks : int
+            The maximum number of block hashes kept, and of webpage hashes
+        """
+        self.fraction = fraction
+        self.min_pages = min_pages
+        self.max_blocks = max_blocks
+        self.pages = 0
+        self.counts = {}
+        self.seen = {}
+        self._lock = threading.Lock()
+
+
+    @staticmethod
+    def block_hash(block):
+        """This method returns a 64 bit hash of the block, ignoring case and white space
+
+        Parameters
+        ----------
+        block : str
+            A text block of a webpage
+
+        """
+        text = ' '.join(block.lower().split())
+        return int.from_bytes(hashlib.blake2b(text.encode(),digest_size=8).digest(),'little')
+
+
+    @staticmethod
+    def page_hash(blocks,page=None):
+        """This method returns a 64 bit hash of the webpage, of its URL if given and else of the set of the hashes of
+        its blocks
+
+        Parameters
+        ----------
+        blocks : list(str)
+            The text blocks of the webpage
+        page : str (optional)
+            The URL of the webpage, normalised so that the same webpage always has the same URL
+
+        """
+        if page is not None:
+            data = b'url '+page.encode()
+        else:
+            data = b'blocks '+array('Q',sorted(set(BoilerplateIndex.block_hash(block) for block in blocks))).tobytes()
+        return int.from_bytes(hashlib.blake2b(data,digest_size=8).digest(),'little')
+
+
+    def add_page(self,blocks,page=None):
+        """This method counts the blocks of one webpage. A block repeated within the webpage is counted once and a
+        webpage already counted is not counted again
+
+        Parameters
+        ----------
+        blocks : list(str)
+            The text blocks of the webpage
+        page : str (optional)
+            The URL of the webpage. If not given the webpage is recognised by its blocks
+
+        """
+        with self._lock:
+            self._add_page(blocks,page)
+
+
+    def _add_page(self,blocks,page=None):
+        h = self.page_hash(blocks,page)
+        if h in self.seen:
+            return
+        self.seen[h] = None
+        if len(self.seen)>self.max_blocks:
+            self._prune_seen()
+        counts = self.counts
+        self.pages += 1
+        for h in set(self.block_hash(block) for block in blocks):
+            counts[h] = counts.get(h,0)+1
+        if len(counts)>self.max_blocks:
+            self._prune()
+
+
+    def _prune(self):
+        """This method keeps the three quarters of max_blocks hashes seen in the most webpages. Boilerplate is seen
+        in many webpages so it is kept, while the blocks specific to a webpage are forgotten
+
+        """
+        keep = heapq.nlargest(self.max_blocks*3//4,self.counts.items(),key=lambda item: item[1])
+        self.counts = dict(keep)
+
+
+    def _prune_seen(self):
+        """This method keeps the three quarters of max_blocks webpage hashes counted most recently. A webpage
+        forgotten this way is counted again if it is seen again
+
+        """
+        keep = self.max_blocks*3//4
+        self.seen = dict.fromkeys(list(self.seen)[len(self.seen)-keep:])
+
+
+    def is_boilerplate(self,block):
+        """This method returns True if the block was seen in more than fraction of the webpages, once min_pages
+        webpages have been seen
+
+        Parameters
+        ----------
+        block : str
+            A text block of a webpage
+
+        """
+        if self.pages<self.min_pages:
+            return False
+        return self.counts.get(self.block_hash(block),0)>self.fraction*self.pages
+
+
+    def filter(self,blocks):
+        """This method returns the blocks that are not boilerplate, in order
+
+        Parameters
+        ----------
+        blocks : list(str)
+            The text blocks of a webpage
+
+        """
+        return [block for block in blocks if not self.is_boilerplate(block)]
+
+
+    def process(self,blocks,page=None):
+        """This method counts the blocks of one webpage, unless it was already counted, and returns those that are
+        not boilerplate
+
+        Parameters
+        ----------
+        blocks : list(str)
+            The text blocks of the webpage
+        page : str (optional)
+            The URL of the webpage. If not given the webpage is recognised by its blocks
+
+        """
+        with self._lock:
+            self._add_page(blocks,page)
+            return self.filter(blocks)
+
+
+    def save(self,path):
+        """This method writes the index to a file. The file is replaced atomically so that a reader never sees
+        a partial index
+
+        Parameters
+        ----------
+        path : str
+            Path of the index file
+
+        """
+        with self._lock:
+            hashes = array('Q',self.counts.keys())
+            counts = array('Q',self.counts.values())
+            seen = array('Q',self.seen)
+            header = self.HEADER.pack(self.MAGIC,self.pages,len(hashes),len(seen))
+        if sys.byteorder=='big':
+            hashes.byteswap()
+            counts.byteswap()
+            seen.byteswap()
+        temp = '{}.{}.tmp'.format(path,os.getpid())
+        with open(temp,'wb') as f:
+            f.write(header)
+            f.write(hashes.tobytes())
+            f.write(counts.tobytes())
+            f.write(seen.tobytes())
+        os.replace(temp,path)
+
+
+    @classmethod
+    def load(cls,path,fraction=0.5,min_pages=5,max_blocks=100000):
+        """This method reads an index written by save
+
+        Parameters
+        ----------
+        path : str
+            Path of the index file
+        fraction, min_pages, max_blocks :
+            As in the constructor, they are not stored in the file
+
+        Raises
+        ------
+        ValueError if the file is not a boilerplate index
+
+        """
+        index = cls(fraction,min_pages,max_blocks)
+        with open(path,'rb') as f:
+            data = f.read()
+        magic,pages,size,seen_size = cls.HEADER.unpack_from(data,0)
+        if magic!=cls.MAGIC:
+            raise ValueError("{} is not a boilerplate index".format(path))
+        start = cls.HEADER.size
+        hashes = array('Q')
+        counts = array('Q')
+        seen = array('Q')
+        hashes.frombytes(data[start:start+8*size])
+        counts.frombytes(data[start+8*size:start+16*size])
+        seen.frombytes(data[start+16*size:start+16*size+8*seen_size])
+        if sys.byteorder=='big':
+            hashes.byteswap()
+            counts.byteswap()
+            seen.byteswap()
+        index.pages = pages
+        index.counts = dict(zip(hashes,counts))
+        index.seen = dict.fromkeys(seen)
+        return index
@@ -0,0 +1,176 @@
+from urllib3.exceptions import ReadTimeoutError
+import requests
+import socket
+import time
+
+class Deadline:
+    """
+    This class is the end to end time and download budget of the extraction of one webpage. It is created when
+    the work starts and handed to UrlToText and TextToTopics, which check it as they go. The download stops once
+    the time is up or max_bytes have been read, and the extraction and the NLP stop at the next block, so the
+    topics are ranked from what was processed so far instead of failing or hanging. Every stage that cuts its
+    work short sets partial
+
+    ...
+
+    Attributes
+    ----------
+    seconds : float
+        The time budget in seconds. None for no time limit
+    max_bytes : int
+        The maximum number of bytes downloaded. None for no limit
+    start : float
+        The time.monotonic() the budget started at
+    bytes_read : int
+        The number of bytes downloaded so far
+    partial : bool
+        True if some work was cut short by the deadline
+
+    Methods
+    -------
+    remaining()
+        Returns the seconds left, or None without a time limit
+
+    expired(reserve=0.0)
+        Returns True if the time is up, or if less than reserve of the time budget is left
+
+    timeout(default=10)
+        Returns the socket timeout to use for a request
+
+    read(response,chunk_size=65536)
+        Yields the chunks of the body of a streamed response until the time is up or max_bytes are read
+
+    download(response,chunk_size=65536)
+        Returns the body of a streamed response read within the budget
+
+    """
+
+
+    def __init__(self,seconds=None,max_bytes=None):
+        """
+        Parameters
+        ----------
+        seconds : float (optional)
+            The time budget in seconds
+        max_bytes : int (optional)
+            The maximum number of bytes downloaded
+        """
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.start = time.monotonic()
+        self.bytes_read = 0
+        self.partial = False
+
+
+    def remaining(self):
+        """This method returns the number of seconds left, never below 0, or None without a time limit"""
+        if self.seconds is None:
+            return None
+        return max(0.0,self.seconds-(time.monotonic()-self.start))
+
+
+    def expired(self,reserve=0.0):
+        """This method returns True if the time is up, or if less than the fraction reserve of the time budget is
+        left, for eg. to leave time for the stages after the current one
+
+        Parameters
+        ----------
+        reserve : float
+            The fraction of the time budget kept for later stages
+
+        """
+        return self.seconds is not None and time.monotonic()-self.start>=self.seconds*(1-reserve)
+
+
+    def timeout(self,default=10):
+        """This method returns the timeout for a request, the default or the seconds left if they are fewer
+
+        Parameters
+        ----------
+        default : float
+            The timeout used without a time limit
+
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return max(0.001,min(default,remaining))
+
+
+    def _set_socket_timeout(self,response):
+        """This method bounds the next read from the socket of a response by the seconds left. requests applies
+        its timeout to every socket operation, so without it a server that trickles the body would keep the
+        download going long past the deadline. It does nothing for responses without a socket
+
+        """
+        connection = getattr(getattr(response,'raw',None),'_connection',None)
+        sock = getattr(connection,'sock',None)
+        if sock is not None and self.seconds is not None:
+            sock.settimeout(self.timeout(self.seconds))
+
+
+    def read(self,response,chunk_size=65536):
+        """This method is a generator over the chunks of the body of a response requested with stream=True. The
+        socket is read one receive at a time, so a chunk is returned as soon as any data arrives. It stops once
+        the time is up or max_bytes have been read and then sets partial. A response served from the ResponseCache
+        was read within the budget when it was fetched, if at all, so its body is yielded as it is
+
+        Parameters
+        ----------
+        response : requests.Response
+            The streamed response
+        chunk_size : int
+            The maximum number of bytes read at a time
+
+        """
+        if getattr(response,'from_cache',False):
+            if response.content:
+                yield response.content
+            return
+        raw = getattr(response,'raw',None)
+        if hasattr(raw,'read1'):
+            def chunks():
+                while True:
+                    self._set_socket_timeout(response)
+                    chunk = raw.read1(chunk_size,decode_content=True)
+                    if not chunk:
+                        return
+                    yield chunk
+            chunks = chunks()
+        else:
+            chunks = response.iter_content(chunk_size)
+        try:
+            for chunk in chunks:
+                if self.max_bytes is not None and self.bytes_read+len(chunk)>self.max_bytes:
+                    chunk = chunk[:self.max_bytes-self.bytes_read]
+                    self.bytes_read += len(chunk)
+                    self.partial = True
+                    yield chunk
+                    return
+                self.bytes_read += len(chunk)
+                yield chunk
+                if self.expired():
+                    self.partial = True
+                    return
+        except (requests.Timeout,requests.ConnectionError,ReadTimeoutError,socket.timeout):
+            if not self.expired():
+                raise
+            self.partial = True
+
+
+    def download(self,response,chunk_size=65536):
+        """This method returns the body of a response requested with stream=True, as much of it as was read
+        within the budget
+
+        Parameters
+        ----------
+        response : requests.Response
+            The streamed response
+        chunk_size : int
+            The maximum number of bytes read at a time
+
+        """
+        try:
+            return b''.join(self.read(response,chunk_size))
+        finally:
+            response.close()
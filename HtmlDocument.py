@@ -0,0 +1,235 @@
+import requests
+from bs4 import BeautifulSoup
+
+class HtmlDocument:
+    """
+    This class holds an HTML document that is fetched and parsed only once. The body, meta and title
+    content are all served from the same parsed tree
+
+    ...
+
+    Attributes
+    ----------
+    url : str
+        The URL the document was fetched from. None if it was built from raw HTML or a local file
+    soup : bs4.BeautifulSoup
+        The parsed HTML tree
+    status_codes : Dictionary
+        The dictionary of common HTTP status codes as the key and their brief description as values
+
+    Methods
+    -------
+    make_session(size)
+        Returns a requests.Session that keeps up to size connections alive per host
+
+    fetch(url,stream=False,session=None,cache=None,deadline=None)
+        Requests the webpage and returns the response once its status code is checked
+
+    from_url(url,session=None,cache=None,deadline=None)
+        Fetches the webpage and returns the parsed document
+
+    from_html(html,url=None)
+        Returns the parsed document for raw HTML bytes or string
+
+    from_file(path)
+        Reads a local HTML file and returns the parsed document
+
+    get_meta_content()
+        Returns the textual content under the meta element
+
+    get_title_content()
+        Returns the textual content under the Title element
+
+    get_body()
+        Returns the body element of the document
+
+    """
+
+    status_codes = {200:'OK',
+                    400:'Bad request - The request could not be understood by the server \
+                         due to malformed syntax.',\
+                    401:'Unauthorized - The request requires user authentication.',\
+                    403:'Forbidden - The server understood the request, but is refusing to fulfill it.',\
+                    404:'Not Found - The server has not found anything matching the Request-URI.',\
+                    409:'Conflict - The request could not be completed due to a conflict with the current state of the resource.'\
+                    ,500:'Internal Server error'}
+
+    headers = {'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_6) \
+    AppleWebKit/537.36 (KHTML, like Gecko) Chrome/53.0.2785.143 Safari/537.36'}
+
+
+    def __init__(self,html,url=None):
+        """
+        Parameters
+        ----------
+        html : bytes or str
+            The raw HTML markup of the document
+        url : str (optional)
+            The URL the markup was fetched from
+        """
+        self.url = url
+        self.soup = BeautifulSoup(html,'html.parser')
+
+
+    @staticmethod
+    def make_session(size):
+        """This function returns a requests.Session whose connection pool per host holds size connections, so
+        that size threads fetching at the same time can all keep their connection alive
+
+        Parameters
+        ----------
+        size : int
+            The number of connections kept per host, for eg. the number of fetching threads
+
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=size,pool_maxsize=size)
+        session.mount('http://',adapter)
+        session.mount('https://',adapter)
+        return session
+
+
+    @classmethod
+    def fetch(cls,url,stream=False,session=None,cache=None,deadline=None):
+        """This function requests the webpage at the URL supplied and returns the requests.Response once the
+        status code has been checked
+
+        Parameters
+        ----------
+        url : str
+            The URL of the webpage
+        stream : bool
+            If True the body is not downloaded up front and can be read in chunks with iter_content
+        session : requests.Session (optional)
+            The session used to send the request, so that keep-alive connections are reused across requests
+        cache : ResponseCache (optional)
+            The cache the response is served from when possible. Cached responses are always read in full
+        deadline : Deadline (optional)
+            The budget of the extraction. The timeout of the request is cut to the seconds left and a response
+            downloaded into the cache is read within the budget
+
+        Raises
+        ------
+        Exception
+            The status code sent by the server is not of class 2xxx
+        ConnectionError
+            If you are not connected to the internet or there is some other connection issue
+        Timeout Error
+            If the connection is timed out
+        RequestException
+            If some ambiguous error happens
+
+        """
+        timeout = deadline.timeout(10) if deadline is not None else 10
+        try:
+            if cache is not None:
+                html = cache.get(url,cls.headers,session,timeout=timeout,deadline=deadline)
+            else:
+                html = (session or requests).get(url,headers=cls.headers,timeout=timeout,stream=stream)
+            status_code = html.status_code
+            if str(status_code)[0]!='2':
+                if status_code in cls.status_codes:
+                    raise Exception ('Something bad happened {}'.format(status_code,cls.status_codes[status_code]))
+                else:
+                    raise Exception ('Status code other than 2xxx encountered. Status code is {}'.format(status_code))
+        except requests.ConnectionError as e:
+            print("Failed to connect. Check if you are connected to the internet {}".format(str(e)))
+            raise
+        except requests.Timeout as e:
+            print("Timeout Error {}".format(str(e)))
+            raise
+        except requests.RequestException as e:
+            print("Some ambiguous error while processing the request {}".format(str(e)))
+            raise
+        return html
+
+
+    @classmethod
+    def from_url(cls,url,session=None,cache=None,deadline=None):
+        """This function fetches the webpage at the URL supplied and returns the parsed document. The page is
+        downloaded exactly once. See fetch for the errors raised
+
+        Parameters
+        ----------
+        url : str
+            The URL of the webpage
+        session : requests.Session (optional)
+            The session used to send the request
+        cache : ResponseCache (optional)
+            The cache the response is served from when possible
+        deadline : Deadline (optional)
+            The budget of the extraction. Only the part of the webpage downloaded within it is parsed
+
+        """
+        if deadline is not None:
+            return cls(deadline.download(cls.fetch(url,True,session,cache,deadline)),url)
+        html = cls.fetch(url,session=session,cache=cache)
+        return cls(html.content,url)
+
+
+    @classmethod
+    def from_html(cls,html,url=None):
+        """This function returns the parsed document for raw HTML. No network access is made
+
+        Parameters
+        ----------
+        html : bytes or str
+            The raw HTML markup of the document
+        url : str (optional)
+            The URL the markup belongs to
+
+        """
+        return cls(html,url)
+
+
+    @classmethod
+    def from_file(cls,path):
+        """This function reads a local HTML file and returns the parsed document. No network access is made
+
+        Parameters
+        ----------
+        path : str
+            Path of the HTML file
+
+        """
+        with open(path,'rb') as f:
+            return cls(f.read())
+
+
+    def get_meta_content(self):
+        """This function Returns the keywords/title/description content under the meta tag (element) of the HTML document.
+        If no meta tags are present then it prints out that "No meta information is present"
+
+        """
+        meta = self.soup.findAll('meta')
+        content = []
+        if len(meta)<1:
+            print("No meta information found")
+        for m in meta:
+            attrs = list(m.attrs.keys())
+            if('content' in attrs):
+                attrs.remove('content')
+            for attr in attrs:
+                if 'keywords' in m[attr] or 'title' in m[attr] or 'description' in m[attr]:
+                    content.append(m['content'])
+        return content
+
+
+    def get_title_content(self):
+        """This function Returns the textual content under the title tag of the HTML document. If no Title tag is present
+        then it prints out "No title tag found"
+
+        """
+        title = self.soup.find('title')
+        if(title):
+            return [title.text]
+        else:
+            print("No title tag found")
+
+
+    def get_body(self):
+        """This function returns the bs4.element.Tag object that represents the body element of the HTML document,
+        or None if there is no body element
+
+        """
+        return self.soup.find('body')
@@ -0,0 +1,206 @@
+from nltk.stem.wordnet import WordNetLemmatizer
+from collections import OrderedDict
+import argparse
+import struct
+import mmap
+import nltk
+
+def tag_to_pos(tag):
+    """This function returns the WordNet part of speech character for a part of speech tag. It returns 'n' if
+    the tag is of type noun, 'v' if it is verb, 'r' if it is adverb, 'a' if it is adjective, 's' if it is satelite
+    adjective, else it returns 'n'
+
+    """
+    return {'N':'n','V':'v','R':'r','J':'a','S':'s'}.get(tag[0],'n')
+
+
+class Lexicon:
+    """
+    This class is a precompiled word -> (part of speech tag, lemma) lookup table stored on disk. The table is
+    memory-mapped, so opening it is instant and every process that opens the same file shares the same pages
+    of memory. Words that are not in the table are analysed with NLTK and kept in an in-process LRU cache.
+    The tag of a word is the tag NLTK gives it as a one word sentence and the lemma is the WordNet lemma of
+    the lower cased word for that tag, which is exactly what TextToTopics computes for every token
+
+    The file holds a header (magic and number of words), an array of offsets and the records
+    word\\0tag\\0lemma sorted by word, so a word is found by binary search
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Path of the lexicon file
+    cache_size : int
+        The maximum number of words that are not in the file kept in the LRU cache
+    hits : int
+        The number of words found in the file or in the LRU cache
+    misses : int
+        The number of words analysed with NLTK
+
+    Methods
+    -------
+    build(words,path)
+        Analyses the words with NLTK and writes the lexicon file
+
+    lookup(word)
+        Returns (tag, lemma) of the word from the file, or None
+
+    analyse(words)
+        Returns a dictionary word -> (tag, lemma) for the words, using the file, the LRU cache and NLTK
+
+    close()
+        Unmaps the file
+
+    """
+
+    MAGIC = b'LEX1'
+    HEADER = struct.Struct('<4sI')
+
+
+    def __init__(self,path,cache_size=65536):
+        """
+        Parameters
+        ----------
+        path : str
+            Path of a lexicon file written by build
+        cache_size : int
+            The maximum number of words that are not in the file kept in the LRU cache
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        with open(path,'rb') as f:
+            self._map = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        magic,self._count = self.HEADER.unpack_from(self._map,0)
+        if magic!=self.MAGIC:
+            raise ValueError("{} is not a lexicon file".format(path))
+        self._offsets = memoryview(self._map)[self.HEADER.size:self.HEADER.size+4*(self._count+1)].cast('I')
+        self._records = self.HEADER.size+4*(self._count+1)
+
+
+    def __len__(self):
+        return self._count
+
+
+    def __contains__(self,word):
+        return self.lookup(word) is not None
+
+
+    @classmethod
+    def build(cls,words,path):
+        """This method analyses every word with NLTK and writes the lexicon file. The words are tagged in one
+        batched call
+
+        Parameters
+        ----------
+        words : iterable(str)
+            The vocabulary, for eg. the most common words of the pages processed. Words are case sensitive
+        path : str
+            Path of the lexicon file written
+
+        """
+        words = sorted(set(w for w in words if w and '\0' not in w),key=lambda w: w.encode())
+        lmtzr = WordNetLemmatizer()
+        records = []
+        for tagged in nltk.pos_tag_sents([[w] for w in words]):
+            word,tag = tagged[0]
+            lemma = lmtzr.lemmatize(word.lower(),tag_to_pos(tag))
+            records.append('\0'.join([word,tag,lemma]).encode())
+        offsets = [0]
+        for record in records:
+            offsets.append(offsets[-1]+len(record))
+        with open(path,'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC,len(records)))
+            f.write(struct.pack('<{}I'.format(len(offsets)),*offsets))
+            for record in records:
+                f.write(record)
+
+
+    def _record(self,i):
+        start = self._records+self._offsets[i]
+        return self._map[start:self._records+self._offsets[i+1]]
+
+
+    def lookup(self,word):
+        """This method returns (tag, lemma) of the word if it is in the file, else None
+
+        Parameters
+        ----------
+        word : str
+            token(word) from a sentence
+
+        """
+        key = word.encode()
+        low,high = 0,self._count
+        while low<high:
+            middle = (low+high)//2
+            record = self._record(middle)
+            record_word = record[:record.index(b'\0')]
+            if record_word<key:
+                low = middle+1
+            elif record_word>key:
+                high = middle
+            else:
+                word,tag,lemma = record.decode().split('\0')
+                return tag,lemma
+        return None
+
+
+    def analyse(self,words):
+        """This method returns a dictionary word -> (tag, lemma) for every word. Words are looked up in the file
+        first, then in the LRU cache, and the remaining words are analysed with NLTK in one batched call and
+        added to the LRU cache
+
+        Parameters
+        ----------
+        words : iterable(str)
+            tokens(words) from the content
+
+        """
+        cache = self._cache
+        result = {}
+        missing = []
+        for word in dict.fromkeys(words):
+            entry = self.lookup(word)
+            if entry is None:
+                entry = cache.get(word)
+                if entry is not None:
+                    cache.move_to_end(word)
+            if entry is None:
+                missing.append(word)
+            else:
+                self.hits += 1
+                result[word] = entry
+        if missing:
+            self.misses += len(missing)
+            lmtzr = WordNetLemmatizer()
+            for tagged in nltk.pos_tag_sents([[w] for w in missing]):
+                word,tag = tagged[0]
+                entry = (tag,lmtzr.lemmatize(word.lower(),tag_to_pos(tag)))
+                result[word] = cache[word] = entry
+            while len(cache)>self.cache_size:
+                cache.popitem(last=False)
+        return result
+
+
+    def close(self):
+        self._offsets.release()
+        self._map.close()
+
+
+if __name__== "__main__":
+    parser = argparse.ArgumentParser(description = 'Build a precompiled lemma and part of speech lexicon')
+    parser.add_argument('vocabulary',type=str,help='file with one word per line, most common first')
+    parser.add_argument('output',type=str,help='path of the lexicon file written')
+    parser.add_argument('--size',type=int,help='number of words of the vocabulary kept. Optional. If not set then all')
+    args = parser.parse_args()
+
+    with open(args.vocabulary) as f:
+        words = [line.strip() for line in f if line.strip()]
+    if args.size:
+        words = words[:args.size]
+    Lexicon.build(words,args.output)
+    print("Wrote {} words to {}".format(len(Lexicon(args.output)),args.output))
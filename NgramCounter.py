@@ -0,0 +1,292 @@
+from collections import Counter
+from array import array
+import heapq
+import math
+import struct
+import sys
+import zlib
+from operator import itemgetter
+
+class NgramCounter:
+    """
+    This class counts n-grams in a single pass and scores them by pointwise mutual information. The
+    counts of every distinct n-gram and of every token at every position of the n-gram are kept, so each
+    distinct n-gram is scored only once instead of rescanning all the n-grams for every n-gram.
+    Counters can be merged, so the statistics of a whole site can be accumulated page by page or across
+    workers, and saved in a compact binary format when the tokens are strings
+
+    ...
+
+    Attributes
+    ----------
+    n : int
+        n in n-grams. Every n-gram added must have n tokens
+    total : int
+        The number of n-grams added, duplicates included
+    ngram_counts : Counter
+        The count of every distinct n-gram (as a tuple of tokens) in the order it was first seen
+    position_counts : list(Counter)
+        position_counts[i] holds the count of every token seen at position i of an n-gram
+
+    Methods
+    -------
+    update(ngrams)
+        Adds the n-grams to the counts
+
+    pmi_scores(threshold=2)
+        Yields every n-gram seen more than threshold times with its PMI score
+
+    most_common_pmi(number=None,threshold=2)
+        Returns the top n-grams by PMI score
+
+    most_common_frequency(number=None)
+        Returns the top n-grams by count
+
+    merge(other)
+        Adds the counts of another NgramCounter
+
+    map_tokens(function)
+        Returns a copy with every token replaced by function(token)
+
+    to_bytes() / from_bytes(data)
+        Serialise the counts to and from a compact binary format
+
+    save(path) / load(path)
+        Write the counts to and read them from a file
+
+    """
+
+
+    def __init__(self,n):
+        """
+        Parameters
+        ----------
+        n : int
+            n in n-grams. Specifies how many contiguous word tokens form an n-gram.
+        """
+        self.n = n
+        self.total = 0
+        self.ngram_counts = Counter()
+        self.position_counts = [Counter() for i in range(n)]
+
+
+    def update(self,ngrams):
+        """This method adds the n-grams to the counts. It runs in time linear to the number of n-grams
+
+        Parameters
+        ----------
+        ngrams : iterable
+            Every element is a sequence of n tokens
+
+        """
+        ngram_counts = self.ngram_counts
+        position_counts = self.position_counts
+        for ngram in ngrams:
+            ngram = tuple(ngram)
+            ngram_counts[ngram] += 1
+            for i in range(len(ngram)):
+                position_counts[i][ngram[i]] += 1
+            self.total += 1
+
+
+    def pmi_scores(self,threshold=2):
+        """This method yields (n-gram, score) for every distinct n-gram seen more than threshold times, in the
+        order the n-grams were first seen. The PMI of an n-gram is log(p(w1..wn)/(p(w1)*..*p(wn))) where p(wi) is
+        the probability of the token wi at position i. As with the original pairwise loop the score is the PMI added
+        once for every occurrence of the n-gram.
+
+        Parameters
+        ----------
+        threshold : int
+            Only n-grams that occur more than threshold times are scored
+
+        """
+        total = self.total
+        position_counts = self.position_counts
+        for ngram,count in self.ngram_counts.items():
+            if(count>threshold):
+                p_all = count/total
+                p_other = 1
+                for i in range(len(ngram)):
+                    p_other = p_other * position_counts[i][ngram[i]]/total
+                pmi = math.log(p_all/p_other)
+                score = 0
+                for occurrence in range(count):
+                    score += pmi
+                yield ngram,score
+
+
+    def most_common_pmi(self,number=None,threshold=2):
+        """This method returns a list of (n-gram, score) sorted by score, highest first. Ties keep the order the
+        n-grams were first seen. If number is given only the top number n-grams are selected with a bounded heap
+        instead of sorting all of them.
+
+        Parameters
+        ----------
+        number : int (optional)
+            The top n-grams to be returned
+        threshold : int
+            Only n-grams that occur more than threshold times are scored
+
+        """
+        if number:
+            return heapq.nlargest(number,self.pmi_scores(threshold),key=itemgetter(1))
+        return sorted(self.pmi_scores(threshold),key=itemgetter(1),reverse=True)
+
+
+    def most_common_frequency(self,number=None):
+        """This method returns a list of (n-gram, count) sorted by count, highest first
+
+        Parameters
+        ----------
+        number : int (optional)
+            The top n-grams to be returned
+
+        """
+        return self.ngram_counts.most_common(number or None)
+
+
+    def merge(self,other):
+        """This method adds the counts of another NgramCounter of the same n to this one. N-grams that are
+        new to this counter keep the order they were first seen in the other counter
+
+        Parameters
+        ----------
+        other : NgramCounter
+            for eg. the counts of another page or of another worker
+
+        Raises
+        ------
+        ValueError if the counters are not for the same n
+
+        """
+        if other.n!=self.n:
+            raise ValueError("Cannot merge the counts of {}-grams into {}-grams".format(other.n,self.n))
+        self.ngram_counts.update(other.ngram_counts)
+        for mine,theirs in zip(self.position_counts,other.position_counts):
+            mine.update(theirs)
+        self.total += other.total
+        return self
+
+
+    def map_tokens(self,function):
+        """This method returns a new NgramCounter with every token replaced by function(token), for eg. to turn
+        token ids back into words with Vocabulary.token
+
+        Parameters
+        ----------
+        function : callable
+            Maps a token to its replacement
+
+        """
+        counter = NgramCounter(self.n)
+        counter.total = self.total
+        for ngram,count in self.ngram_counts.items():
+            counter.ngram_counts[tuple(function(t) for t in ngram)] = count
+        for mine,theirs in zip(counter.position_counts,self.position_counts):
+            for token,count in theirs.items():
+                mine[function(token)] = count
+        return counter
+
+
+    MAGIC = b'NGC1'
+    HEADER = struct.Struct('<4sIQ')
+
+
+    @staticmethod
+    def _array_bytes(values):
+        if sys.byteorder=='big':
+            values.byteswap()
+        return values.tobytes()
+
+
+    @staticmethod
+    def _bytes_array(typecode,data,offset,length):
+        values = array(typecode)
+        values.frombytes(data[offset:offset+length*values.itemsize])
+        if sys.byteorder=='big':
+            values.byteswap()
+        return values,offset+length*values.itemsize
+
+
+    def to_bytes(self):
+        """This method returns the counts in a compact binary format: every token is stored once in a string
+        table, n-grams and positional counts refer to tokens by index, and the whole body is zlib compressed.
+        The tokens must be strings
+
+        Raises
+        ------
+        TypeError if a token is not a string
+
+        """
+        ids = {}
+        tokens = []
+        def token_id(token):
+            if token not in ids:
+                if not isinstance(token,str):
+                    raise TypeError("Only counters of string tokens can be serialised, found {!r}".format(token))
+                ids[token] = len(tokens)
+                tokens.append(token)
+            return ids[token]
+        ngram_ids = array('I',[token_id(t) for ngram in self.ngram_counts for t in ngram])
+        ngram_counts = array('Q',self.ngram_counts.values())
+        sections = []
+        for position in self.position_counts:
+            sections.append(struct.pack('<Q',len(position)))
+            sections.append(self._array_bytes(array('I',[token_id(t) for t in position])))
+            sections.append(self._array_bytes(array('Q',position.values())))
+        table = '\0'.join(tokens).encode()
+        body = b''.join([struct.pack('<QQQ',len(tokens),len(table),len(ngram_counts)),table,
+                         self._array_bytes(ngram_ids),self._array_bytes(ngram_counts)]+sections)
+        return self.HEADER.pack(self.MAGIC,self.n,self.total)+zlib.compress(body)
+
+
+    @classmethod
+    def from_bytes(cls,data):
+        """This method returns the NgramCounter serialised by to_bytes
+
+        Parameters
+        ----------
+        data : bytes
+            The output of to_bytes
+
+        Raises
+        ------
+        ValueError if data is not a serialised NgramCounter
+
+        """
+        magic,n,total = cls.HEADER.unpack_from(data,0)
+        if magic!=cls.MAGIC:
+            raise ValueError("Not serialised n-gram counts")
+        body = zlib.decompress(data[cls.HEADER.size:])
+        token_count,table_size,ngram_count = struct.unpack_from('<QQQ',body,0)
+        offset = struct.calcsize('<QQQ')
+        tokens = body[offset:offset+table_size].decode().split('\0') if token_count else []
+        offset += table_size
+        ngram_ids,offset = cls._bytes_array('I',body,offset,ngram_count*n)
+        ngram_counts,offset = cls._bytes_array('Q',body,offset,ngram_count)
+        counter = cls(n)
+        counter.total = total
+        for i in range(ngram_count):
+            counter.ngram_counts[tuple(tokens[j] for j in ngram_ids[i*n:(i+1)*n])] = ngram_counts[i]
+        for position in counter.position_counts:
+            size = struct.unpack_from('<Q',body,offset)[0]
+            offset += 8
+            position_ids,offset = cls._bytes_array('I',body,offset,size)
+            position_counts,offset = cls._bytes_array('Q',body,offset,size)
+            for token_id,count in zip(position_ids,position_counts):
+                position[tokens[token_id]] = count
+        return counter
+
+
+    def save(self,path):
+        """This method writes the counts to a file in the format of to_bytes"""
+        with open(path,'wb') as f:
+            f.write(self.to_bytes())
+
+
+    @classmethod
+    def load(cls,path):
+        """This method reads counts written by save"""
+        with open(path,'rb') as f:
+            return cls.from_bytes(f.read())
@@ -0,0 +1,152 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class NumpyScorer:
+    """
+    This class counts and ranks the n-grams of a token id stream with NumPy array operations instead of Python
+    loops. The n-grams are gathered into an (n-grams x n) matrix of ids, the distinct n-grams are counted with
+    unique, the tokens at every position with bincount, and the PMI of every candidate is evaluated at once.
+    The top n-grams are selected with a partial sort. The rankings are those of NgramCounter within float
+    tolerance, ties keep the order the n-grams were first seen. NumPy is optional, available is False when
+    it is not installed and the callers fall back to NgramCounter
+
+    ...
+
+    Attributes
+    ----------
+    available : bool
+        True if NumPy can be imported
+    n : int
+        n in n-grams
+    total : int
+        The number of n-grams, duplicates included
+    ngrams : numpy.ndarray
+        The distinct n-grams as rows of ids, in the order they were first seen
+    counts : numpy.ndarray
+        The count of every distinct n-gram
+    position_counts : list(numpy.ndarray)
+        position_counts[i][token_id] is the count of the token at position i of an n-gram
+
+    Methods
+    -------
+    pmi_scores(threshold=2)
+        Returns the indexes of the n-grams seen more than threshold times and their PMI scores
+
+    most_common_pmi(number=None,threshold=2)
+        Returns the top n-grams by PMI score
+
+    most_common_frequency(number=None,mask=None)
+        Returns the top n-grams by count, optionally only those selected by a boolean mask
+
+    """
+
+    available = np is not None
+
+
+    def __init__(self,token_ids,sentence_ends,n,vocabulary_size):
+        """
+        Parameters
+        ----------
+        token_ids : array
+            The token ids of all the statements one after the other
+        sentence_ends : array
+            The index in token_ids where every statement ends
+        n : int
+            n in n-grams. Only statements with more than n tokens give n-grams
+        vocabulary_size : int
+            The number of distinct token ids
+        """
+        self.n = n
+        ids = np.asarray(token_ids,dtype=np.int64)
+        ends = np.asarray(sentence_ends,dtype=np.int64)
+        starts = np.zeros(len(ends),dtype=np.int64)
+        starts[1:] = ends[:-1]
+        lengths = ends-starts
+        position = np.arange(len(ids))
+        sentence_start = np.repeat(starts,lengths)
+        sentence_end = np.repeat(ends,lengths)
+        windows = position[(position+n<=sentence_end) & (sentence_end-sentence_start>n)]
+        matrix = np.stack([ids[windows+i] for i in range(n)],axis=1)
+        self.total = len(windows)
+        size = max(vocabulary_size,1)
+        if size**n < 2**63:
+            keys = np.zeros(len(windows),dtype=np.int64)
+            for i in range(n):
+                keys = keys*size+matrix[:,i]
+            unique,first,counts = np.unique(keys,return_index=True,return_counts=True)
+        else:
+            unique,first,counts = np.unique(matrix,axis=0,return_index=True,return_counts=True)
+        order = np.argsort(first,kind='stable')
+        self.ngrams = matrix[first[order]]
+        self.counts = counts[order]
+        self.position_counts = [np.bincount(matrix[:,i],minlength=vocabulary_size) for i in range(n)]
+
+
+    def pmi_scores(self,threshold=2):
+        """This method returns (indexes, scores): the indexes in ngrams of the n-grams seen more than threshold
+        times and their scores, the PMI times the count as in NgramCounter.pmi_scores
+
+        Parameters
+        ----------
+        threshold : int
+            Only n-grams that occur more than threshold times are scored
+
+        """
+        indexes = np.flatnonzero(self.counts>threshold)
+        counts = self.counts[indexes]
+        total = self.total
+        p_all = counts/total
+        p_other = np.ones(len(indexes))
+        for i in range(self.n):
+            p_other = p_other*self.position_counts[i][self.ngrams[indexes,i]]/total
+        return indexes,np.log(p_all/p_other)*counts
+
+
+    def _top(self,indexes,scores,number):
+        """This method returns the indexes sorted by score, highest first, with ties in the order the n-grams were
+        first seen. If number is given only the candidates that can be in the top number are sorted
+
+        """
+        if number and number<len(indexes):
+            kth = -np.partition(-scores,number-1)[number-1]
+            keep = scores>=kth
+            indexes,scores = indexes[keep],scores[keep]
+        order = np.lexsort((indexes,-scores))
+        if number:
+            order = order[:number]
+        return indexes[order],scores[order]
+
+
+    def most_common_pmi(self,number=None,threshold=2):
+        """This method returns a list of (n-gram, score) sorted by score, highest first, where n-gram is a tuple
+        of ids
+
+        Parameters
+        ----------
+        number : int (optional)
+            The top n-grams to be returned
+        threshold : int
+            Only n-grams that occur more than threshold times are scored
+
+        """
+        indexes,scores = self._top(*self.pmi_scores(threshold),number)
+        return list(zip(map(tuple,self.ngrams[indexes].tolist()),scores.tolist()))
+
+
+    def most_common_frequency(self,number=None,mask=None):
+        """This method returns a list of (n-gram, count) sorted by count, highest first, where n-gram is a tuple
+        of ids
+
+        Parameters
+        ----------
+        number : int (optional)
+            The top n-grams to be returned
+        mask : numpy.ndarray (optional)
+            A boolean per distinct n-gram, only the n-grams where it is True are ranked
+
+        """
+        indexes = np.arange(len(self.counts)) if mask is None else np.flatnonzero(mask)
+        indexes,counts = self._top(indexes,self.counts[indexes],number)
+        return list(zip(map(tuple,self.ngrams[indexes].tolist()),counts.tolist()))
@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+import json
+import time
+
+class Profiler:
+    """
+    This class collects per stage timers and counters across UrlToText and TextToTopics. Both classes take
+    an optional profiler and report to it. Callbacks can be registered to receive every measurement as it
+    is made, for eg. to forward them to a metrics system
+
+    ...
+
+    Attributes
+    ----------
+    enabled : bool
+        If False nothing is recorded and the timers cost next to nothing
+    stages : Dictionary
+        For every stage name the total seconds spent in it and the number of times it ran. Stages can be
+        nested, the time of a stage includes the stages run inside it
+    counters : Dictionary
+        For every counter name its total, for eg. bytes_fetched or tagger_calls
+    hooks : list
+        The callbacks called as callback(kind,name,value) where kind is 'stage' (value in seconds) or
+        'counter' (value added)
+
+    Methods
+    -------
+    stage(name)
+        Context manager that times the code run inside it as the stage name
+
+    count(name,value=1)
+        Adds value to the counter name
+
+    add_hook(callback)
+        Registers a callback for every measurement
+
+    report()
+        Returns the stages and counters as a dictionary
+
+    to_json()
+        Returns the report as a JSON string
+
+    """
+
+
+    def __init__(self,enabled=True,hooks=None):
+        """
+        Parameters
+        ----------
+        enabled : bool
+            If False nothing is recorded
+        hooks : list (optional)
+            The callbacks called for every measurement
+        """
+        self.enabled = enabled
+        self.stages = {}
+        self.counters = {}
+        self.hooks = list(hooks or [])
+
+
+    @contextmanager
+    def stage(self,name):
+        """This method times the code run inside the with block as the stage name
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage, for eg. fetch or lemmatize
+
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter()-start
+            stage = self.stages.setdefault(name,{'seconds':0.0,'calls':0})
+            stage['seconds'] += seconds
+            stage['calls'] += 1
+            for hook in self.hooks:
+                hook('stage',name,seconds)
+
+
+    def count(self,name,value=1):
+        """This method adds value to the counter name
+
+        Parameters
+        ----------
+        name : str
+            Name of the counter, for eg. tokens
+        value : int
+            The amount added
+
+        """
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name,0)+value
+        for hook in self.hooks:
+            hook('counter',name,value)
+
+
+    def add_hook(self,callback):
+        """This method registers callback(kind,name,value) to be called for every measurement"""
+        self.hooks.append(callback)
+
+
+    def report(self):
+        """This method returns a dictionary with the stages and the counters recorded so far"""
+        return {'stages':self.stages,'counters':self.counters}
+
+
+    def to_json(self):
+        """This method returns the report as an indented JSON string"""
+        return json.dumps(self.report(),indent=2,sort_keys=True)
+
+
+DISABLED = Profiler(enabled=False)
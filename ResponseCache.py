@@ -0,0 +1,200 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from SQLiteStore import SQLiteStore
+import requests
+import json
+import time
+
+def normalise_url(url):
+    """This function returns the normalised form of the URL so that the same webpage is always given the same
+    key. The scheme and host are lower cased, default ports and the fragment are dropped, an empty path becomes
+    / and the query parameters are sorted
+
+    Parameters
+    ----------
+    url : str
+        The URL of the webpage
+
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not (scheme=='http' and parts.port==80 or scheme=='https' and parts.port==443):
+        host = '{}:{}'.format(host,parts.port)
+    query = urlencode(sorted(parse_qsl(parts.query,keep_blank_values=True)))
+    return urlunsplit((scheme,host,parts.path or '/',query,''))
+
+
+class CachedResponse:
+    """
+    This class stands in for a requests.Response that is served from the ResponseCache
+
+    ...
+
+    Attributes
+    ----------
+    url : str
+        The URL of the webpage
+    status_code : int
+        Always 200
+    content : bytes
+        The body of the response
+    headers : Dictionary
+        The headers of the response
+    encoding : str
+        The encoding of the body given by the server
+    from_cache : bool
+        Always True, the body is already in memory and is not downloaded again
+
+    """
+
+    status_code = 200
+    from_cache = True
+
+
+    def __init__(self,url,content,headers,encoding):
+        self.url = url
+        self.content = content
+        self.headers = headers
+        self.encoding = encoding
+
+
+    def iter_content(self,chunk_size=1):
+        for i in range(0,len(self.content),chunk_size):
+            yield self.content[i:i+chunk_size]
+
+
+    def close(self):
+        pass
+
+
+class ResponseCache(SQLiteStore):
+    """
+    This class is a persistent cache of HTTP responses kept in an SQLite database. Responses are keyed by the
+    normalised URL. A response younger than ttl seconds is served without touching the network, an older one
+    is revalidated with a conditional request (If-None-Match / If-Modified-Since) and served again if the server
+    answers 304 Not Modified. When the total size of the bodies grows over max_size the least recently used
+    responses are evicted. In offline mode only cached responses are served, stale or not. See SQLiteStore for
+    the storage
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Path of the SQLite database file
+    ttl : float
+        The number of seconds a response is served without revalidation
+    max_size : int
+        The maximum total size in bytes of the cached bodies
+    offline : bool
+        If True the network is never used
+
+    Methods
+    -------
+    get(url,headers=None,session=None,timeout=10,deadline=None)
+        Returns the response for the URL, from the cache when possible
+
+    """
+
+    TABLE = 'responses'
+
+
+    def __init__(self,path,ttl=3600,max_size=256*1024*1024,offline=False):
+        """
+        Parameters
+        ----------
+        path : str
+            Path of the SQLite database file. It is created if it does not exist
+        ttl : float
+            The number of seconds a response is served without revalidation
+        max_size : int
+            The maximum total size in bytes of the cached bodies
+        offline : bool
+            If True the network is never used and a URL that is not cached raises an Exception
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self._create('''key TEXT PRIMARY KEY, body BLOB, headers TEXT, encoding TEXT, etag TEXT, last_modified TEXT,
+                        stored REAL, accessed REAL, size INTEGER''')
+
+
+    def _lookup(self,key):
+        with self._connect() as db:
+            return db.execute('SELECT body,headers,encoding,etag,last_modified,stored FROM responses WHERE key=?',
+                              (key,)).fetchone()
+
+
+    def _touch(self,key,stored=None):
+        with self._connect() as db:
+            if stored is None:
+                db.execute('UPDATE responses SET accessed=? WHERE key=?',(time.time(),key))
+            else:
+                db.execute('UPDATE responses SET accessed=?,stored=? WHERE key=?',(time.time(),stored,key))
+
+
+    def _store(self,key,response,body=None):
+        now = time.time()
+        body = response.content if body is None else body
+        with self._connect() as db:
+            db.execute('INSERT OR REPLACE INTO responses VALUES (?,?,?,?,?,?,?,?,?)',
+                       (key,body,json.dumps(dict(response.headers)),response.encoding,response.headers.get('ETag'),
+                        response.headers.get('Last-Modified'),now,now,len(body)))
+        self._evict()
+
+
+    def get(self,url,headers=None,session=None,timeout=10,deadline=None):
+        """This method returns the response for the URL. It is served from the cache if it is fresh, revalidated
+        with a conditional request if it is stale and downloaded otherwise. Only 2xx responses are cached; any
+        other response is returned as it is so that the caller can check the status code. With a deadline the
+        body is downloaded within its budget and returned as a CachedResponse, and a body cut short is not cached
+
+        Parameters
+        ----------
+        url : str
+            The URL of the webpage
+        headers : Dictionary (optional)
+            The headers sent with the request
+        session : requests.Session (optional)
+            The session used to send the request
+        timeout : float
+            The timeout passed to requests
+        deadline : Deadline (optional)
+            The time and download budget of the body
+
+        Raises
+        ------
+        Exception
+            In offline mode if the URL is not cached
+
+        """
+        key = normalise_url(url)
+        entry = self._lookup(key)
+        if entry is not None:
+            body,cached_headers,encoding,etag,last_modified,stored = entry
+            cached = CachedResponse(url,body,json.loads(cached_headers),encoding)
+            if self.offline or time.time()-stored<self.ttl:
+                self._touch(key)
+                return cached
+        elif self.offline:
+            raise Exception ('{} is not in the cache and the cache is in offline mode'.format(url))
+        headers = dict(headers or {})
+        if entry is not None:
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        response = (session or requests).get(url,headers=headers,timeout=timeout,stream=deadline is not None)
+        if response.status_code==304 and entry is not None:
+            response.close()
+            self._touch(key,time.time())
+            return cached
+        if deadline is not None and str(response.status_code)[0]=='2':
+            body = deadline.download(response)
+            if not deadline.partial:
+                self._store(key,response,body)
+            return CachedResponse(url,body,dict(response.headers),response.encoding)
+        if str(response.status_code)[0]=='2':
+            self._store(key,response)
+        return response
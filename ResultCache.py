@@ -0,0 +1,190 @@
+from NgramCounter import NgramCounter
+from SQLiteStore import SQLiteStore
+import hashlib
+import struct
+import json
+import time
+import zlib
+
+class ResultCache(SQLiteStore):
+    """
+    This class is a persistent cache of topic extraction results kept in an SQLite database. Results are keyed
+    by a SHA-256 hash of the extracted content, so mirrors, redirects and webpages unchanged since the last
+    crawl share their entry whatever their URL, together with the parameters of the extraction and VERSION.
+    It stores the ranked topics of every (approach, n, number) and/or the n-gram counts of every n, from which
+    the topics for any approach and number are ranked without lemmatizing or tagging the content again. When
+    the total size of the entries grows over max_size the least recently used entries are evicted. See
+    SQLiteStore for the storage, it can be shared by threads and worker processes
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        Path of the SQLite database file
+    max_size : int
+        The maximum total size in bytes of the entries
+    store : tuple(str)
+        What is cached, topics and/or counts
+
+    Methods
+    -------
+    content_key(content)
+        Returns the hash of the content of a webpage
+
+    get_topics(key,approach,n,number) / put_topics(key,approach,n,number,topics)
+        Read and write the ranked topics
+
+    get_counts(key,n) / put_counts(key,n,counter,tags)
+        Read and write the n-gram counts and the tags of their tokens
+
+    """
+
+    VERSION = 1
+    TABLE = 'results'
+
+
+    def __init__(self,path,max_size=64*1024*1024,store=('topics','counts')):
+        """
+        Parameters
+        ----------
+        path : str
+            Path of the SQLite database file. It is created if it does not exist
+        max_size : int
+            The maximum total size in bytes of the entries
+        store : iterable(str)
+            What is cached, topics and/or counts
+
+        Raises
+        ------
+        ValueError if store has anything other than topics and counts
+
+        """
+        self.path = path
+        self.max_size = max_size
+        self.store = tuple(store)
+        for kind in self.store:
+            if kind not in ('topics','counts'):
+                raise ValueError("Unknown result kind {}. It can be topics or counts".format(kind))
+        self._create('key TEXT PRIMARY KEY, value BLOB, accessed REAL, size INTEGER')
+
+
+    @staticmethod
+    def content_key(content):
+        """This method returns the hex SHA-256 hash of the content of a webpage. Every statement is hashed with
+        its length so that different splits of the same text get different keys
+
+        Parameters
+        ----------
+        content : list(str)
+            The textual content of the nodes of the webpage
+
+        """
+        digest = hashlib.sha256()
+        for statement in content:
+            data = statement.encode('utf-8','surrogatepass')
+            digest.update(struct.pack('<Q',len(data)))
+            digest.update(data)
+        return digest.hexdigest()
+
+
+    def _lookup(self,key):
+        with self._connect() as db:
+            row = db.execute('SELECT value FROM results WHERE key=?',(key,)).fetchone()
+            if row is not None:
+                db.execute('UPDATE results SET accessed=? WHERE key=?',(time.time(),key))
+        return None if row is None else row[0]
+
+
+    def _store(self,key,value):
+        with self._connect() as db:
+            db.execute('INSERT OR REPLACE INTO results VALUES (?,?,?,?)',(key,value,time.time(),len(value)))
+        self._evict()
+
+
+    def get_topics(self,key,approach,n,number):
+        """This method returns the list of (topic, score) cached for the content and parameters, or None
+
+        Parameters
+        ----------
+        key : str
+            The content_key of the content
+        approach : str
+            pmi or pos
+        n : int
+            n in n-grams
+        number : int
+            The number of top topics
+
+        """
+        if 'topics' not in self.store:
+            return None
+        value = self._lookup('topics:{}:{}:{}:{}:{}'.format(self.VERSION,approach,n,number,key))
+        if value is None:
+            return None
+        return [tuple(topic) for topic in json.loads(zlib.decompress(value))]
+
+
+    def put_topics(self,key,approach,n,number,topics):
+        """This method caches the list of (topic, score) for the content and parameters
+
+        Parameters
+        ----------
+        key : str
+            The content_key of the content
+        approach : str
+            pmi or pos
+        n : int
+            n in n-grams
+        number : int
+            The number of top topics
+        topics : list
+            The ranked (topic, score)
+
+        """
+        if 'topics' in self.store:
+            value = zlib.compress(json.dumps(list(topics)).encode())
+            self._store('topics:{}:{}:{}:{}:{}'.format(self.VERSION,approach,n,number,key),value)
+
+
+    def get_counts(self,key,n):
+        """This method returns (counter, tags) cached for the content, the NgramCounter of its n-grams keyed by
+        words and the part of speech tag of every word counted, or None
+
+        Parameters
+        ----------
+        key : str
+            The content_key of the content
+        n : int
+            n in n-grams
+
+        """
+        if 'counts' not in self.store:
+            return None
+        value = self._lookup('counts:{}:{}:{}'.format(self.VERSION,n,key))
+        if value is None:
+            return None
+        size, = struct.unpack_from('<Q',value,0)
+        counter = NgramCounter.from_bytes(value[8:8+size])
+        return counter,json.loads(zlib.decompress(value[8+size:]))
+
+
+    def put_counts(self,key,n,counter,tags):
+        """This method caches the n-gram counts of the content and the tags of the words counted
+
+        Parameters
+        ----------
+        key : str
+            The content_key of the content
+        n : int
+            n in n-grams
+        counter : NgramCounter
+            The counts keyed by words, for eg. TextToTopics.ngram_statistics(n)
+        tags : Dictionary
+            The part of speech tag of every word counted
+
+        """
+        if 'counts' in self.store:
+            counts = counter.to_bytes()
+            value = struct.pack('<Q',len(counts))+counts+zlib.compress(json.dumps(tags).encode())
+            self._store('counts:{}:{}:{}'.format(self.VERSION,n,key),value)
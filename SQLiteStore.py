@@ -0,0 +1,69 @@
+import sqlite3
+
+class SQLiteStore:
+    """
+    This class is the base of the on-disk caches kept in an SQLite database, ResponseCache and ResultCache.
+    Every row of the table is keyed by a text key and holds its size in bytes and the time it was last
+    accessed. When the total size of the rows grows over max_size the least recently used rows are evicted.
+    The database is in write-ahead logging mode and a new connection is opened for every operation, so a
+    cache can be shared by threads and worker processes, and it can be pickled to be sent to them
+
+    ...
+
+    Attributes
+    ----------
+    TABLE : str
+        The name of the table, set by every subclass
+    path : str
+        Path of the SQLite database file
+    max_size : int
+        The maximum total size in bytes of the rows
+
+    Methods
+    -------
+    _create(columns)
+        Creates the table and the index on the access time if they do not exist
+
+    _connect()
+        Returns a new connection to the database
+
+    _evict()
+        Deletes the least recently used rows until the total size is under max_size
+
+    """
+
+    TABLE = None
+
+
+    def _create(self,columns):
+        """This method creates the table, with the columns key, accessed and size among columns, and the
+        index of the rows by access time
+
+        Parameters
+        ----------
+        columns : str
+            The column definitions of the table
+
+        """
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS {} ({})'.format(self.TABLE,columns))
+            db.execute('CREATE INDEX IF NOT EXISTS {0}_accessed ON {0} (accessed)'.format(self.TABLE))
+
+
+    def _connect(self):
+        """This method returns a new connection to the database, one is opened for every operation"""
+        return sqlite3.connect(self.path,timeout=30)
+
+
+    def _evict(self):
+        """This method deletes the least recently used rows until the total size is under max_size"""
+        with self._connect() as db:
+            total = db.execute('SELECT COALESCE(SUM(size),0) FROM {}'.format(self.TABLE)).fetchone()[0]
+            if total<=self.max_size:
+                return
+            for key,size in db.execute('SELECT key,size FROM {} ORDER BY accessed'.format(self.TABLE)).fetchall():
+                if total<=self.max_size:
+                    break
+                db.execute('DELETE FROM {} WHERE key=?'.format(self.TABLE),(key,))
+                total -= size
@@ -0,0 +1,264 @@
+from HtmlDocument import HtmlDocument
+from UrlToText import UrlToText
+from ResponseCache import normalise_url
+from Profiler import DISABLED
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+import threading
+import hashlib
+import time
+import re
+
+def simhash(text,bits=64):
+    """This function returns the SimHash fingerprint of the text. Every three word shingle of the lower cased
+    text votes for the bits of its hash, so texts that share most of their shingles get fingerprints that differ
+    in only a few bits
+
+    Parameters
+    ----------
+    text : str
+        The textual content of a webpage
+    bits : int
+        The number of bits of the fingerprint, at most 64
+
+    """
+    words = re.findall(r'\w+',text.lower())
+    shingles = Counter(' '.join(words[i:i+3]) for i in range(max(1,len(words)-2)))
+    votes = [0]*bits
+    for shingle,weight in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode(),digest_size=8).digest(),'little')
+        for bit in range(bits):
+            if h>>bit & 1:
+                votes[bit] += weight
+            else:
+                votes[bit] -= weight
+    return sum(1<<bit for bit in range(bits) if votes[bit]>0)
+
+
+class SiteCrawler:
+    """
+    This class crawls a website from a seed URL and yields the textual content of every distinct webpage. Links
+    are followed breadth first within the host of the seed, up to max_depth links away and max_pages fetches.
+    The webpages are fetched by a pool of threads sharing pooled keep-alive connections, and fetches of the same
+    host are spaced by delay seconds. URLs are normalised and stripped of tracking parameters so a webpage is
+    fetched once, and webpages whose content has a SimHash within distance bits of a webpage already crawled,
+    for eg. print views, paginated copies or tracking parameter variants, are skipped before any NLP is done
+    on them. Their links are still followed. With a BoilerplateIndex the blocks repeated across the webpages are
+    dropped from the content as well. With a Deadline every fetch is bounded by the time left and no webpage is
+    fetched once it has run out
+
+    ...
+
+    Attributes
+    ----------
+    seed : str
+        The URL the crawl starts from
+    max_pages : int
+        The maximum number of webpages fetched
+    max_depth : int
+        The maximum number of links followed from the seed
+    concurrency : int
+        The maximum number of webpages fetched at the same time
+    delay : float
+        The minimum number of seconds between two fetches of the same host
+    distance : int
+        Webpages whose fingerprints differ in at most distance bits are near duplicates
+    pages : list
+        The URLs whose content was yielded, in order
+    duplicates : list
+        (url, url of the webpage it duplicates) of every webpage skipped as a near duplicate
+    errors : list
+        (url, error message) of every webpage that could not be fetched
+    boilerplate : BoilerplateIndex
+        The index of the blocks repeated across the site, None to keep them
+    deadline : Deadline
+        The time and download budget of the whole crawl, None for no limit
+    url_options : Dictionary
+        Extra keyword arguments passed to HtmlDocument.from_url, for eg. cache=ResponseCache(...)
+
+    Methods
+    -------
+    canonical_url(url)
+        Returns the normalised URL without tracking parameters
+
+    crawl()
+        Yields (url, content) for every distinct webpage of the site
+
+    """
+
+    tracking_parameters = re.compile(r'^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|ref|ref_src|sessionid|phpsessid|sid)$',re.I)
+
+
+    def __init__(self,seed,max_pages=100,max_depth=3,concurrency=4,delay=1.0,distance=3,session=None,profiler=None,boilerplate=None,deadline=None,**url_options):
+        """
+        Parameters
+        ----------
+        seed : str
+            The URL the crawl starts from
+        max_pages : int
+            The maximum number of webpages fetched
+        max_depth : int
+            The maximum number of links followed from the seed
+        concurrency : int
+            The maximum number of webpages fetched at the same time
+        delay : float
+            The minimum number of seconds between two fetches of the same host
+        distance : int
+            Webpages whose fingerprints differ in at most distance bits are near duplicates
+        session : requests.Session (optional)
+            The session used to fetch the webpages
+        profiler : Profiler (optional)
+            Receives the stage timers of the extraction and the counts of webpages crawled and skipped
+        boilerplate : BoilerplateIndex (optional)
+            The index the blocks of every distinct webpage are added to, the boilerplate blocks are dropped
+        deadline : Deadline (optional)
+            The budget of the whole crawl. The webpages not fetched when it runs out are skipped
+        url_options : keyword arguments
+            Passed to HtmlDocument.from_url
+        """
+        self.seed = seed
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.delay = delay
+        self.distance = distance
+        self.boilerplate = boilerplate
+        self.deadline = deadline
+        self.url_options = url_options
+        self.pages = []
+        self.duplicates = []
+        self.errors = []
+        self._session = session
+        self._profiler = profiler or DISABLED
+        self._host = urlsplit(self.canonical_url(seed)).netloc
+        self._next_fetch = {}
+        self._lock = threading.Lock()
+        self._bands = {}
+
+
+    @classmethod
+    def canonical_url(cls,url):
+        """This method returns the normalised URL with the tracking parameters removed from the query
+
+        Parameters
+        ----------
+        url : str
+            The URL of the webpage
+
+        """
+        parts = urlsplit(normalise_url(url))
+        query = urlencode([(k,v) for k,v in parse_qsl(parts.query,keep_blank_values=True) if not cls.tracking_parameters.match(k)])
+        return urlunsplit((parts.scheme,parts.netloc,parts.path,query,''))
+
+
+    def _wait_for_host(self,host):
+        """This method sleeps until the host may be fetched again and reserves the next slot"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now,self._next_fetch.get(host,now))
+            self._next_fetch[host] = start+self.delay
+        if start>now:
+            time.sleep(start-now)
+
+
+    def _fetch(self,url):
+        """This method fetches one webpage and returns (content, links), or None if the deadline ran out before
+        it could be fetched. It runs in a thread of the pool
+
+        """
+        self._wait_for_host(urlsplit(url).netloc)
+        if self.deadline is not None and self.deadline.expired():
+            return None
+        document = HtmlDocument.from_url(url,session=self._session,deadline=self.deadline,**self.url_options)
+        links = []
+        for anchor in document.soup.find_all('a',href=True):
+            link = urljoin(url,anchor['href'])
+            if urlsplit(link).scheme in ('http','https'):
+                links.append(link)
+        content = UrlToText(url,document,profiler=self._profiler).get_total_content()
+        return content,links
+
+
+    def _band_keys(self,fingerprint):
+        """This method splits the 64 bits of the fingerprint in distance+1 bands. Two fingerprints within distance
+        bits agree on at least one band, so only the fingerprints that share a band need to be compared
+
+        """
+        bands = self.distance+1
+        width = -(-64//bands)
+        return [(band,fingerprint>>(band*width) & ((1<<width)-1)) for band in range(bands)]
+
+
+    def _find_duplicate(self,fingerprint,keys):
+        """This method returns the URL of a webpage already crawled whose fingerprint is within distance bits of
+        fingerprint, or None
+
+        """
+        for key in keys:
+            for url,other in self._bands.get(key,()):
+                if bin(other^fingerprint).count('1')<=self.distance:
+                    return url
+        return None
+
+
+    def crawl(self):
+        """This method is a generator over (url, content) of every distinct webpage of the site in breadth first
+        order. The webpages of one depth are fetched concurrently and handled in the order their links were found,
+        so the crawl is deterministic. The near duplicates are found on the content before the boilerplate is
+        dropped, and are not added to the boilerplate index
+
+        """
+        own_session = self._session is None
+        if own_session:
+            self._session = HtmlDocument.make_session(self.concurrency)
+        frontier = [self.canonical_url(self.seed)]
+        seen = set(frontier)
+        fetched = 0
+        try:
+            with ThreadPoolExecutor(self.concurrency) as threads:
+                for depth in range(self.max_depth+1):
+                    frontier = frontier[:self.max_pages-fetched]
+                    if not frontier:
+                        break
+                    if self.deadline is not None and self.deadline.expired():
+                        self.deadline.partial = True
+                        break
+                    fetched += len(frontier)
+                    futures = [(url,threads.submit(self._fetch,url)) for url in frontier]
+                    frontier = []
+                    for url,future in futures:
+                        try:
+                            fetched_page = future.result()
+                        except Exception as e:
+                            self.errors.append((url,str(e)))
+                            continue
+                        if fetched_page is None:
+                            self.deadline.partial = True
+                            continue
+                        content,links = fetched_page
+                        for link in links:
+                            link = self.canonical_url(link)
+                            if urlsplit(link).netloc==self._host and link not in seen:
+                                seen.add(link)
+                                frontier.append(link)
+                        fingerprint = simhash(' '.join(content))
+                        keys = self._band_keys(fingerprint)
+                        duplicate = self._find_duplicate(fingerprint,keys)
+                        if duplicate is not None:
+                            self.duplicates.append((url,duplicate))
+                            self._profiler.count('duplicates_skipped')
+                            continue
+                        for key in keys:
+                            self._bands.setdefault(key,[]).append((url,fingerprint))
+                        self.pages.append(url)
+                        self._profiler.count('pages_crawled')
+                        if self.boilerplate is not None:
+                            kept = self.boilerplate.process(content,url)
+                            self._profiler.count('boilerplate_dropped',len(content)-len(kept))
+                            content = kept
+                        yield url,content
+        finally:
+            if own_session:
+                self._session.close()
+                self._session = None
@@ -0,0 +1,432 @@
+from HtmlDocument import HtmlDocument
+from html.parser import HTMLParser
+from bs4.dammit import EncodingDetector
+from requests.structures import CaseInsensitiveDict
+import codecs
+import re
+
+class StreamingExtractor(HTMLParser):
+    """
+    This class extracts the textual content from HTML markup without building a BeautifulSoup tree. The
+    markup is fed in chunks and parsed as a stream of events. The script and style elements are dropped on
+    the fly and for every node under the body only the statistics needed by the text density filter are kept
+    (see UrlToText._filter_content), so a page is processed in memory bounded by the text that is kept rather
+    than by the size of the page. Like BeautifulSoup a string of white space only counts as a single space or
+    new line, outside of pre and textarea elements, so the statistics are those of the tree
+
+    ...
+
+    Attributes
+    ----------
+    min_char : int
+        The textual content of a node is kept only if it is longer than min_char characters
+    max_nodes : int
+        The maximum number of elements processed. Everything after is ignored. None for no limit
+    truncated : bool
+        True if the page was cut short by max_nodes or by the max_bytes of from_url
+    nodes : int
+        The number of elements processed
+    bytes_read : int
+        The number of bytes of markup read
+    _stack : list
+        The open elements. Every element is [name, order, Ti, Ci, Li, first string, first string closed]
+    _blocks : list
+        The candidate text blocks as (order, text, Ti, Ci, Li)
+    _text : list
+        The pieces of the run of text being read
+
+    Methods
+    -------
+    from_url(url,max_bytes=None,max_nodes=None,chunk_size=65536,session=None,cache=None)
+        Streams the webpage in chunks into a new extractor
+
+    from_html(html,max_nodes=None)
+        Feeds raw HTML bytes or string into a new extractor
+
+    from_file(path,max_nodes=None,chunk_size=65536)
+        Streams a local HTML file in chunks into a new extractor
+
+    get_body_content()
+        Returns the textual content of the nodes under the body that pass the text density filter
+
+    get_meta_content()
+        Returns the textual content under the meta element
+
+    get_title_content()
+        Returns the textual content under the Title element
+
+    get_total_content()
+        Returns the body, meta and title content combined
+
+    """
+
+    SNIFF_BYTES = 1024
+    skipped_tags = ('script','style')
+    preserve_whitespace_tags = ('pre','textarea')
+    void_tags = ('area','base','br','col','embed','hr','img','input','link','meta','param','source','track','wbr')
+
+
+    def __init__(self,min_char=25,max_nodes=None):
+        """
+        Parameters
+        ----------
+        min_char : int
+            The textual content of a node is kept only if it is longer than min_char characters
+        max_nodes : int (optional)
+            The maximum number of elements processed
+        """
+        HTMLParser.__init__(self,convert_charrefs=True)
+        self.min_char = min_char
+        self.max_nodes = max_nodes
+        self.truncated = False
+        self.bytes_read = 0
+        self.nodes = 0
+        self._order = 0
+        self._stack = []
+        self._blocks = []
+        self._body_stats = None
+        self._body_tags = 0
+        self._body_open = False
+        self._skip = None
+        self._text = []
+        self._meta = []
+        self._has_meta = False
+        self._title = None
+        self._in_title = False
+
+
+    @classmethod
+    def from_url(cls,url,max_bytes=None,max_nodes=None,chunk_size=65536,session=None,cache=None,deadline=None):
+        """This function streams the webpage at the URL supplied into a new extractor. At most max_bytes of the
+        body are downloaded. See HtmlDocument.fetch for the errors raised
+
+        Parameters
+        ----------
+        url : str
+            The URL of the webpage
+        max_bytes : int (optional)
+            The maximum number of bytes downloaded
+        max_nodes : int (optional)
+            The maximum number of elements processed
+        chunk_size : int
+            The number of bytes read at a time
+        session : requests.Session (optional)
+            The session used to send the request
+        cache : ResponseCache (optional)
+            The cache the response is served from when possible
+        deadline : Deadline (optional)
+            The budget of the extraction. The download stops when it runs out and the extractor is truncated
+
+        """
+        extractor = cls(max_nodes=max_nodes)
+        response = HtmlDocument.fetch(url,stream=True,session=session,cache=cache,deadline=deadline)
+        try:
+            if deadline is not None:
+                chunks = deadline.read(response,chunk_size)
+            else:
+                chunks = response.iter_content(chunk_size)
+            content_type = CaseInsensitiveDict(response.headers).get('Content-Type','')
+            encoding = response.encoding if 'charset' in content_type.lower() else None
+            extractor._feed_chunks(chunks,encoding,max_bytes)
+            if deadline is not None and deadline.partial:
+                extractor.truncated = True
+        finally:
+            response.close()
+        return extractor
+
+
+    @classmethod
+    def from_html(cls,html,max_nodes=None):
+        """This function feeds raw HTML into a new extractor. No network access is made
+
+        Parameters
+        ----------
+        html : bytes or str
+            The raw HTML markup
+        max_nodes : int (optional)
+            The maximum number of elements processed
+
+        """
+        extractor = cls(max_nodes=max_nodes)
+        extractor._feed_chunks([html])
+        return extractor
+
+
+    @classmethod
+    def from_file(cls,path,max_nodes=None,chunk_size=65536):
+        """This function streams a local HTML file into a new extractor. No network access is made
+
+        Parameters
+        ----------
+        path : str
+            Path of the HTML file
+        max_nodes : int (optional)
+            The maximum number of elements processed
+        chunk_size : int
+            The number of bytes read at a time
+
+        """
+        extractor = cls(max_nodes=max_nodes)
+        with open(path,'rb') as f:
+            extractor._feed_chunks(iter(lambda: f.read(chunk_size),b''))
+        return extractor
+
+
+    def _get_decoder(self,head,encoding=None):
+        """This method returns (decoder, head without byte order mark) for the first SNIFF_BYTES bytes of the
+        markup. The encoding is the first that decodes head of the one given, if any, then as in BeautifulSoup
+        the one of the byte order mark and the one declared by a meta or xml declaration, then UTF-8 and only
+        then the detected one, which is unreliable on so few bytes, and Windows-1252
+
+        """
+        detector = EncodingDetector(head,is_html=True)
+        declared = detector.find_declared_encoding(detector.markup,is_html=True)
+        for candidate in [encoding,detector.sniffed_encoding,declared,'utf-8']+list(detector.encodings):
+            if candidate is None:
+                continue
+            try:
+                codecs.getincrementaldecoder(candidate)().decode(detector.markup)
+            except (LookupError,UnicodeDecodeError):
+                continue
+            return codecs.getincrementaldecoder(candidate)(errors='replace'),detector.markup
+        return codecs.getincrementaldecoder('utf-8')(errors='replace'),detector.markup
+
+
+    def _feed_chunks(self,chunks,encoding=None,max_bytes=None):
+        """This method decodes the chunks incrementally and feeds them to the parser. It stops once max_bytes
+        have been read or max_nodes elements have been processed. The encoding of bytes is the one given, for
+        eg. by the Content-Type header, or is sniffed from the first SNIFF_BYTES bytes
+
+        """
+        decoder = None
+        head = b''
+        size = 0
+        for chunk in chunks:
+            if isinstance(chunk,str):
+                self.bytes_read += len(chunk)
+                self.feed(chunk)
+            else:
+                limit_reached = max_bytes is not None and size+len(chunk)>max_bytes
+                if limit_reached:
+                    chunk = chunk[:max_bytes-size]
+                size += len(chunk)
+                self.bytes_read = size
+                if decoder is None:
+                    head += chunk
+                    if len(head)<self.SNIFF_BYTES and not limit_reached:
+                        continue
+                    decoder,chunk = self._get_decoder(head,encoding)
+                self.feed(decoder.decode(chunk))
+                if limit_reached:
+                    self.truncated = True
+            if self.truncated:
+                break
+        if decoder is None and head:
+            decoder,head = self._get_decoder(head,encoding)
+            self.feed(decoder.decode(head))
+        if decoder is not None and not self.truncated:
+            self.feed(decoder.decode(b'',final=True))
+        self.close()
+
+
+    def handle_starttag(self,tag,attrs):
+        if self._skip or self.truncated:
+            return
+        self._flush_text()
+        if self.max_nodes is not None and self.nodes>=self.max_nodes:
+            self.truncated = True
+            return
+        self.nodes += 1
+        in_body = self._body_open
+        if in_body:
+            self._body_tags += 1
+        if tag in self.skipped_tags:
+            self._first_string_done()
+            self._skip = tag
+            return
+        if tag=='meta':
+            self._has_meta = True
+            attrs = dict((k,v or '') for k,v in attrs)
+            for attr,value in attrs.items():
+                if attr!='content' and ('keywords' in value or 'title' in value or 'description' in value):
+                    self._meta.append(attrs['content'])
+        elif tag=='title' and self._title is None:
+            self._title = []
+            self._in_title = True
+        if in_body or (tag=='body' and self._body_stats is None):
+            self._body_open = True
+            self._first_string_done()
+            self._order += 1
+            self._stack.append([tag,self._order,0,0,0,None,False])
+        else:
+            self._stack.append([tag,None,0,0,0,None,True])
+        if tag in self.void_tags:
+            self._close_frames(len(self._stack)-1)
+
+
+    def handle_startendtag(self,tag,attrs):
+        self.handle_starttag(tag,attrs)
+        if not self._skip and not self.truncated and tag not in self.void_tags and self._stack \
+           and self._stack[-1][0]==tag:
+            self._close_frames(len(self._stack)-1)
+
+
+    def handle_endtag(self,tag):
+        if self.truncated:
+            return
+        if self._skip:
+            if tag==self._skip:
+                self._skip = None
+            return
+        self._flush_text()
+        for i in range(len(self._stack)-1,-1,-1):
+            if self._stack[i][0]==tag:
+                self._close_frames(i)
+                break
+
+
+    def handle_data(self,data):
+        if self._skip or self.truncated:
+            return
+        self._text.append(data)
+
+
+    def _flush_text(self):
+        """The parser reports a run of text in pieces when it spans two chunks, so the pieces are gathered until
+        the next markup and then handled as one string, as in the tree"""
+        if self._text:
+            data = ''.join(self._text)
+            self._text = []
+            self._handle_text(data)
+
+
+    def _handle_text(self,data):
+        if not data.strip(' \t\n\r\f') and \
+           not any(frame[0] in self.preserve_whitespace_tags for frame in self._stack):
+            data = '\n' if '\n' in data else ' '
+        if self._in_title:
+            self._title.append(data)
+        if self._stack:
+            frame = self._stack[-1]
+            frame[3] += len(data)
+            if not frame[6]:
+                frame[5] = data if frame[5] is None else frame[5]+data
+
+
+    def handle_comment(self,data):
+        if self._skip or self.truncated:
+            return
+        self._flush_text()
+        if self._stack and not self._stack[-1][6]:
+            if self._stack[-1][5] is None:
+                self._stack[-1][5] = data
+            self._stack[-1][6] = True
+
+
+    def unknown_decl(self,data):
+        if self._skip or self.truncated:
+            return
+        self._flush_text()
+        if data.upper().startswith('CDATA['):
+            self._handle_text(data[6:])
+            self._first_string_done()
+
+
+    def handle_decl(self,data):
+        self._flush_text()
+
+
+    def handle_pi(self,data):
+        self._flush_text()
+
+
+    def _first_string_done(self):
+        """The first string of an element ends at its first child element or comment"""
+        if self._stack and self._stack[-1][5] is not None:
+            self._stack[-1][6] = True
+
+
+    def _close_frames(self,index):
+        """This method closes the open elements from the top of the stack down to index. The statistics of every
+        closed element are added to its parent and the element becomes a candidate block if its first string is
+        long enough
+
+        """
+        while len(self._stack)>index:
+            name,order,total_tags,total_char,len_links,first,done = self._stack.pop()
+            if name=='title':
+                self._in_title = False
+            if self._stack:
+                parent = self._stack[-1]
+                parent[2] += total_tags+1
+                parent[3] += total_char
+                parent[4] += len_links+(total_char if name=='a' else 0)
+                parent[6] = parent[6] or parent[5] is not None
+            if name=='body' and order is not None and self._body_stats is None:
+                self._body_open = False
+                self._body_stats = (total_tags,total_char,len_links)
+            elif order is not None and first is not None:
+                text = re.sub(r'\s+',' ',first).strip()
+                if text!='' and len(text)>self.min_char:
+                    self._blocks.append((order,text,total_tags,total_char,len_links))
+
+
+    def close(self):
+        HTMLParser.close(self)
+        self._flush_text()
+        self._close_frames(0)
+
+
+    def get_body_content(self):
+        """This function returns the textual content of the nodes under the body element that pass the text
+        density filter, in document order. The threshold is the text density of the body element, as in
+        UrlToText._find_filter_threshold
+
+        Raises
+        ------
+        Exception
+            If body element is not found in the HTML document.
+
+        """
+        if self._body_stats is None or self._body_tags==0:
+            raise Exception ("No body or body content found")
+        total_tags,total_char,len_links = self._body_stats
+        threshold = total_char/total_tags
+        body_content = []
+        for order,text,total_tags,total_char,len_links in sorted(self._blocks):
+            total_char = total_char-len_links
+            if(total_tags!=0):
+                density = total_char/total_tags
+            else:
+                density = total_char
+            if density>=threshold:
+                body_content.append(text)
+        return body_content
+
+
+    def get_meta_content(self):
+        """This function Returns the keywords/title/description content under the meta tag (element) of the HTML document.
+        If no meta tags are present then it prints out that "No meta information is present"
+
+        """
+        if not self._has_meta:
+            print("No meta information found")
+        return self._meta
+
+
+    def get_title_content(self):
+        """This function Returns the textual content under the title tag of the HTML document. If no Title tag is present
+        then it prints out "No title tag found"
+
+        """
+        if self._title is not None:
+            return ["".join(self._title)]
+        else:
+            print("No title tag found")
+
+
+    def get_total_content(self):
+        """ This function returns all the textual content under the body, meta and the title tag combined
+
+        """
+        return self.get_body_content()+self.get_meta_content()+self.get_title_content()
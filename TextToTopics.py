@@ -1,9 +1,58 @@
 from nltk.stem.wordnet import WordNetLemmatizer
+from NgramCounter import NgramCounter
+from ApproximateNgramCounter import ApproximateNgramCounter
+from NumpyScorer import NumpyScorer, np
+from Vocabulary import Vocabulary
+from Tokenizer import Tokenizer
+from Profiler import DISABLED
+from Lexicon import Lexicon, tag_to_pos
+from concurrent.futures import ProcessPoolExecutor
 from collections import Counter
-import math
-import re
+from array import array
 import nltk
 
+_pools = {}
+_shard_lexicons = {}
+
+def _get_pool(processes):
+    """This function returns the process pool with the given number of processes, started on first use and
+    reused by every TextToTopics afterwards so the workers are not started again for every document
+
+    """
+    if processes not in _pools:
+        _pools[processes] = ProcessPoolExecutor(processes)
+    return _pools[processes]
+
+
+def count_shard(content,ns,lexicon=None,deadline=None):
+    """This function lemmatizes, tags, tokenizes and counts the n-grams of a shard of the content of a document.
+    It runs in a worker process, so it has to be a module level function. It returns the serialised
+    NgramCounter keyed by words for every n, the part of speech tag of every token of the shard and whether the
+    deadline cut the shard short. lexicon is the path of a Lexicon file, opened once per worker process
+
+    """
+    if lexicon is not None and lexicon not in _shard_lexicons:
+        _shard_lexicons[lexicon] = Lexicon(lexicon)
+    text_topics = TextToTopics(content,lexicon=_shard_lexicons.get(lexicon),deadline=deadline)
+    counters = {n:text_topics.ngram_statistics(n).to_bytes() for n in ns}
+    vocabulary = text_topics._get_token_stream()[0]
+    tags = {vocabulary.token(i):text_topics._tags[vocabulary.token(i)] for i in range(len(vocabulary))}
+    return counters,tags,text_topics.partial
+
+
+class Topics(list):
+    """
+    This class is the list of (topic, score) returned by the rankings of TextToTopics. partial is True if the
+    deadline ran out before all the content was processed, the topics are then ranked from the content processed
+    so far
+
+    """
+
+    def __init__(self,topics=(),partial=False):
+        list.__init__(self,topics)
+        self.partial = partial
+
+
 class TextToTopics:
     """
     This class is used to extract topics from textual content of the HTML document
@@ -14,25 +63,97 @@ class TextToTopics:
     ----------
     content : list of strings. 
         Every element in this list is textual content from different nodes of HTML document
+    _tags : Dictionary
+        The part of speech tag of every word tagged so far for this document
+    _lemmas : Dictionary
+        The lemma of every (word, part of speech) lemmatized so far for this document
+    _profiler : Profiler
+        Receives the stage timers and counters
+    _lexicon : Lexicon
+        The precompiled tag and lemma table consulted before NLTK, if any
+    _tokenizer : Tokenizer
+        Splits the lemmatized statements into sentences and tokens in a single scan
+    _approximate : int
+        The memory budget in bytes of the approximate n-gram counts, None for exact counts
+    _vectorised : bool
+        True if the n-grams are counted and ranked with NumpyScorer
+    _numpy_scorers : Dictionary
+        The NumpyScorer of the id n-grams for every n counted so far
+    _processes : int
+        The number of worker processes the content is sharded across, None to process it in this process
+    _sharded : bool
+        True if the content is large enough to be sharded across the worker processes
+    _shard_vocabulary : Vocabulary
+        The vocabulary of the merged counts of the shards, of the counts loaded from the result cache and of the
+        approximate counts
+    _cache : ResultCache
+        The persistent cache of the topics and counts of the content, if any
+    _counts_cached : bool
+        True if some counts were loaded from the result cache
+    _deadline : Deadline
+        The time budget of the extraction, if any
+    partial : bool
+        True if the deadline ran out before all the content was processed
+    _token_stream : tuple
+        The (vocabulary, token ids, statement ends) of the content, built on first use
+    _ngram_counters : Dictionary
+        The NgramCounter, or ApproximateNgramCounter, of the id n-grams for every n counted so far
         
     Methods
     -------
+    _tag_words(words)
+        Tags all the words not tagged yet in one batched call and keeps the tags for the document
+    
+    _get_tag(word)
+        Returns the cached part of speech tag of the word
+    
     _get_pos(token)
         Takes in the token(word) of sentence and returns a character corresponding to its part of speech
     
-    _lemmatize_content()
+    _lemmatize_content(statements=None)
         Returns lemmatized form of the content
     
-    _handle_period(sentence)
-        This method replaces "." in the acronyms present in a sentence
+    _get_token_stream()
+        Returns the vocabulary, the filtered tokens of the content as an integer id array and the
+        index where every statement ends in that array
     
-    _handle_punctuation(self,sentence)
-        This method replaces the punctuation marks with space " " and then removes duplicate 
-        spaces between words
+    _get_vocabulary()
+        Returns the vocabulary the ids of the counted n-grams belong to
+    
+    _split_content()
+        Splits the content in contiguous shards of about the same size
+    
+    _count_shards(ns)
+        Counts the n-grams for every n in ns in the worker processes and merges the counts
+    
+    _count_approximate(ns)
+        Counts the n-grams for every n in ns approximately, one batch of statements at a time
+    
+    _load_cached_counts(key,ns)
+        Loads the counts of the n-grams for every n in ns found in the result cache
+    
+    _iter_n_gram_ids(n)
+        Generator over the n-grams of the content as tuples of token ids
     
      _get_n_grams(n)
          This method takes the number of grams(n) as parameter and constructs n-grams from the content.
          
+    _get_ngram_counter(n)
+        Returns the counts of the id n-grams for n, shared by both rankings
+    
+    _get_numpy_scorer(n)
+        Returns the NumpyScorer of the id n-grams for n, shared by both rankings
+    
+    ngram_statistics(n)
+        Returns the counts of the n-grams for n keyed by words, to be merged with the counts of other pages
+    
+    error_bounds(n)
+        Returns the error bounds of the approximate counts for n
+    
+    topics(ns,approaches,number=None)
+        Returns the topics for every combination of n and approach from one shared token stream, or from
+        the result cache
+    
     pim_based_topics(n,number=None)
         This method extracts the topics out of the content based on the pointwise mutual information score.
         It takes in n (number of grams of tokens to be used) and number (number of top topics to be returned)
@@ -47,14 +168,118 @@ class TextToTopics:
     
     
     
-    def __init__(self,content):
+    SHARD_MIN_CHARS = 200000
+    DEADLINE_BATCH = 64
+    APPROXIMATE_BATCH = 1024
+    DEADLINE_RESERVE = 0.2
+    SHARDS_PER_PROCESS = 2
+    
+    
+    def __init__(self,content,profiler=None,lexicon=None,approximate=None,vectorised=False,processes=None,deadline=None,
+                 cache=None):
         """
         Parameters
         ----------
         content : list(str)
             Every element in this list is textual content from different nodes of HTML document
+        profiler : Profiler (optional)
+            Receives the time of every stage and the counts of tokens, distinct n-grams, tagger calls and
+            lemmatizer cache hits
+        lexicon : Lexicon (optional)
+            The precompiled tag and lemma table consulted before NLTK
+        approximate : int (optional)
+            If given the n-grams are counted approximately by ApproximateNgramCounter within this memory
+            budget in bytes, instead of exactly. The content is then lemmatized, tagged and counted
+            APPROXIMATE_BATCH statements at a time and no token stream is built, so only the vocabulary grows
+            with the content
+        vectorised : bool
+            If True and NumPy is installed the exact counts and rankings are computed with array operations by
+            NumpyScorer. The scores match the pure Python ones within float tolerance
+        processes : int (optional)
+            If given and the content has at least SHARD_MIN_CHARS characters, it is split in shards that are
+            lemmatized, tagged and counted by this many reused worker processes, and the counts are merged in
+            shard order so the results are identical to processing the content here. It is ignored with approximate
+        deadline : Deadline (optional)
+            The time budget of the extraction. The content is processed block by block and once the budget runs
+            out the rest is skipped, the topics are ranked from the blocks processed so far and marked partial
+        cache : ResultCache (optional)
+            The cache of the topics and counts of the contents already processed. topics looks the content up in
+            it before doing any NLP and stores what it computes. It is ignored with approximate
         """
         self._content = content
+        self._tags = {}
+        self._lemmas = {}
+        self._token_stream = None
+        self._ngram_counters = {}
+        self._profiler = profiler or DISABLED
+        self._lexicon = lexicon
+        self._tokenizer = Tokenizer()
+        self._approximate = approximate
+        self._processes = processes
+        self._sharded = bool(processes and processes>1 and not approximate
+                             and sum(len(c) for c in content)>=self.SHARD_MIN_CHARS)
+        self._shard_vocabulary = Vocabulary()
+        self._vectorised = vectorised and NumpyScorer.available and not approximate and not self._sharded
+        self._numpy_scorers = {}
+        self._deadline = deadline
+        self._cache = None if approximate else cache
+        self._counts_cached = False
+        
+    
+    @property
+    def partial(self):
+        """True if the deadline ran out before all the content was processed"""
+        return self._deadline is not None and self._deadline.partial
+        
+        
+    def _tag_words(self,words):
+        """This method finds the part of speech tag of every word that has not been tagged yet for this document.
+        All the missing words are tagged in one batched call to the tagger and the tags are kept in the _tags
+        attribute so that lemmatization, n-gram filtering and the part of speech filter all reuse them. Every word
+        is tagged on its own, as a one word sentence, so the tag of a word does not depend on its neighbours.
+        If a lexicon is given the tags and lemmas are taken from it, and only the words it does not know are
+        tagged by NLTK.
+        
+        Parameters
+        ----------
+        words : iterable(str)
+            tokens(words) from the content
+        
+        """
+        tags = self._tags
+        missing = list(dict.fromkeys(w for w in words if w not in tags))
+        if missing and self._lexicon is not None:
+            lexicon = self._lexicon
+            hits,misses = lexicon.hits,lexicon.misses
+            with self._profiler.stage('tag'):
+                for word,(tag,lemma) in lexicon.analyse(missing).items():
+                    tags[word] = tag
+                    self._lemmas[(word.lower(),tag_to_pos(tag))] = lemma
+            self._profiler.count('lexicon_hits',lexicon.hits-hits)
+            self._profiler.count('words_tagged',lexicon.misses-misses)
+            if lexicon.misses>misses:
+                self._profiler.count('tagger_calls')
+        elif missing:
+            with self._profiler.stage('tag'):
+                for tagged in nltk.pos_tag_sents([[w] for w in missing]):
+                    tags[tagged[0][0]] = tagged[0][1]
+            self._profiler.count('tagger_calls')
+            self._profiler.count('words_tagged',len(missing))
+    
+    
+    def _get_tag(self,word):
+        """This method returns the part of speech tag of the word, tagging it first if it is not in the _tags
+        attribute yet
+        
+        Parameters
+        ----------
+        word : str
+            token(word) from a sentence
+        
+        """
+        if word not in self._tags:
+            self._tag_words([word])
+        return self._tags[word]
         
         
     def _get_pos(self,token):
@@ -68,7 +293,7 @@ class TextToTopics:
             token(word) from a sentence
         
         """
-        tag = nltk.pos_tag([token])[0][1]
+        tag = self._get_tag(token)
         if tag[0] == 'N':
             return 'n'
         elif tag[0] == 'V':
@@ -83,85 +308,434 @@ class TextToTopics:
             return 'n'
     
     
-    def _lemmatize_content(self):
+    def _lemmatize_content(self,statements=None):
         """This method returns the lemmatized form of every statement in the content attribute. It tokenizes 
         every statement and then finds its part of speech and then passes it to the lemmatizer function. NLTK
-        lemmatizer is used to lemmatize the tokens after which they are joined to form a statement.
+        lemmatizer is used to lemmatize the tokens after which they are joined to form a statement. The lemma of
+        every (word, part of speech) is kept in the _lemmas attribute so every distinct pair is lemmatized once.
+        
+        Parameters
+        ----------
+        statements : list(str) (optional)
+            The statements to lemmatize, by default all the content
         
         """
-        total_content = self._content
+        total_content = self._content if statements is None else statements
         lmtzr = WordNetLemmatizer()
+        lemmas = self._lemmas
         content_lemmatized = []
-        for content in total_content:
-            content_lemmatized.append(" ".join([lmtzr.lemmatize(c.lower(),self._get_pos(c)) for c in content.split()]))
+        tokens = 0
+        hits = 0
+        with self._profiler.stage('lemmatize'):
+            self._tag_words(c for content in total_content for c in content.split())
+            for content in total_content:
+                lemmatized = []
+                for c in content.split():
+                    key = (c.lower(),self._get_pos(c))
+                    lemma = lemmas.get(key)
+                    if lemma is None:
+                        lemma = lemmas[key] = lmtzr.lemmatize(*key)
+                    else:
+                        hits += 1
+                    lemmatized.append(lemma)
+                tokens += len(lemmatized)
+                content_lemmatized.append(" ".join(lemmatized))
+        self._profiler.count('tokens',tokens)
+        self._profiler.count('lemmatizer_cache_hits',hits)
         return content_lemmatized
     
     
-    def _handle_period(self,sentence):
-        """This mehtod replaces all the periods "." in acronyms with empty string "" . The regex chceks for
-        structures like M.B.A and changes it to MBA
+    def _get_token_stream(self):
+        """ This method returns the filtered tokens of the content as integer ids. It takes the content attribute 
+        of the class and then removes period from acronym like words, separates individual statements and
+        tokenizes them, all in one scan of every lemmatized statement by the Tokenizer. We only keep the tokens
+        that have part of speech as either noun, verb, adverb, adjective. The stop words are automatically
+        removed as most of the stop words have part of speech other than the above mentioned. For eg. the
+        sentence "Sun rises in the east and sets in the west" is changed to "sun rise east set west". 
+        Every token is interned in the vocabulary and the ids of all the statements are stored one after the other
+        in a single integer array. sentence_ends[k] is the index in that array where the k-th statement ends.
+        The stream does not depend on n so it is built once per document.
+        With a deadline the statements go through all these steps DEADLINE_BATCH at a time, and once less than
+        DEADLINE_RESERVE of the time budget is left the remaining statements are skipped, leaving that time to
+        count and rank the statements processed so far.
+        
+        """
+        if self._token_stream is None:
+            deadline = self._deadline
+            total_content = self._content
+            batch = max(1,len(total_content) if deadline is None else self.DEADLINE_BATCH)
+            split = self._tokenizer.sentences
+            vocabulary = self._shard_vocabulary if self._sharded or self._counts_cached or self._approximate else Vocabulary()
+            token_ids = array('l')
+            sentence_ends = array('l')
+            for start in range(0,len(total_content),batch):
+                if deadline is not None and deadline.expired(self.DEADLINE_RESERVE):
+                    deadline.partial = True
+                    break
+                content = self._lemmatize_content(total_content[start:start+batch])
+                with self._profiler.stage('tokenize'):
+                    sentences = []
+                    for statement in content:
+                        sentences.extend(split(statement))
+                    self._tag_words(t for sub in sentences for t in sub)
+                    for sub in sentences:
+                        for t in sub:
+                            if self._tags[t].startswith(('N','V','R','J','S')):
+                                token_ids.append(vocabulary.intern(t))
+                        if len(sentence_ends)==0 or sentence_ends[-1]!=len(token_ids):
+                            sentence_ends.append(len(token_ids))
+            self._profiler.count('tokens_kept',len(token_ids))
+            self._profiler.count('vocabulary_size',len(vocabulary))
+            self._token_stream = (vocabulary,token_ids,sentence_ends)
+        return self._token_stream
+    
+    
+    def _get_vocabulary(self):
+        """ This method returns the vocabulary the ids of the counted n-grams belong to, the vocabulary of the token
+        stream or, if the content is sharded or counts were loaded from the result cache, the vocabulary of the
+        merged counts. The token stream then uses that vocabulary as well
+        
+        """
+        if self._sharded or self._counts_cached or self._approximate:
+            return self._shard_vocabulary
+        return self._get_token_stream()[0]
+    
+    
+    def _split_content(self):
+        """ This method splits the content in SHARDS_PER_PROCESS contiguous shards per worker process, of about the
+        same number of characters. N-grams never span two statements so the statements are independent
+        
+        """
+        size = sum(len(c) for c in self._content)/(self._processes*self.SHARDS_PER_PROCESS)
+        shards = [[]]
+        length = 0
+        for statement in self._content:
+            if length>=size:
+                shards.append([])
+                length = 0
+            shards[-1].append(statement)
+            length += len(statement)
+        return shards
+    
+    
+    def _count_shards(self,ns):
+        """ This method counts the n-grams for every n in ns not counted yet in one pass of the worker processes
+        over the shards. The counts keyed by words are merged in shard order, so the n-grams keep the order they
+        were first seen in the whole content, and they are then keyed by the ids of the shard vocabulary.
         
         Parameters
         ----------
-        sentence : str
-            sentence from content
+        ns : iterable(int)
+            The values of n in n-grams
+            
+        """
+        ns = [n for n in dict.fromkeys(ns) if n not in self._ngram_counters]
+        if not ns:
+            return
+        lexicon = self._lexicon.path if self._lexicon is not None else None
+        with self._profiler.stage('count'):
+            shards = self._split_content()
+            pool = _get_pool(self._processes)
+            futures = [pool.submit(count_shard,shard,ns,lexicon,self._deadline) for shard in shards]
+            merged = {n:NgramCounter(n) for n in ns}
+            for future in futures:
+                counters,tags,partial = future.result()
+                if partial:
+                    self._deadline.partial = True
+                self._tags.update(tags)
+                for n in ns:
+                    merged[n].merge(NgramCounter.from_bytes(counters[n]))
+            for n in ns:
+                self._ngram_counters[n] = merged[n].map_tokens(self._shard_vocabulary.intern)
+        self._profiler.count('shards',len(shards))
+        for n in ns:
+            self._profiler.count('n_grams',merged[n].total)
+            self._profiler.count('distinct_n_grams',len(merged[n].ngram_counts))
+    
+    
+    def _count_approximate(self,ns):
+        """ This method counts the n-grams for every n in ns not counted yet with an ApproximateNgramCounter, in
+        one pass over the content. The statements are lemmatized, tagged and tokenized APPROXIMATE_BATCH at a time,
+        or DEADLINE_BATCH with a deadline, and the n-grams of every batch are added to the counts before the next
+        batch is read, so neither the token stream of the content nor the tags and lemmas of all its words are
+        kept. Only the vocabulary and the tags of the tokens kept, which the part of speech ranking needs, grow
+        with the content, as much as the number of distinct words does.
         
+        Parameters
+        ----------
+        ns : iterable(int)
+            The values of n in n-grams
+            
+        """
+        ns = [n for n in dict.fromkeys(ns) if n not in self._ngram_counters]
+        if not ns:
+            return
+        deadline = self._deadline
+        total_content = self._content
+        batch = self.APPROXIMATE_BATCH if deadline is None else self.DEADLINE_BATCH
+        split = self._tokenizer.sentences
+        vocabulary = self._shard_vocabulary
+        counters = {n:ApproximateNgramCounter(n,self._approximate) for n in ns}
+        kept_tags = self._tags
+        tokens_kept = 0
+        for start in range(0,len(total_content),batch):
+            if deadline is not None and deadline.expired(self.DEADLINE_RESERVE):
+                deadline.partial = True
+                break
+            self._tags = {}
+            self._lemmas = {}
+            content = self._lemmatize_content(total_content[start:start+batch])
+            with self._profiler.stage('tokenize'):
+                sentences = []
+                for statement in content:
+                    sentences.extend(split(statement))
+                self._tag_words(t for sub in sentences for t in sub)
+                tags = self._tags
+                statements = []
+                for sub in sentences:
+                    token_ids = []
+                    for t in sub:
+                        if tags[t].startswith(('N','V','R','J','S')):
+                            token_ids.append(vocabulary.intern(t))
+                            if t not in kept_tags:
+                                kept_tags[t] = tags[t]
+                    tokens_kept += len(token_ids)
+                    statements.append(token_ids)
+            with self._profiler.stage('count'):
+                for n,counter in counters.items():
+                    counter.update(tuple(token_ids[i:i+n]) for token_ids in statements if len(token_ids)>n
+                                   for i in range(len(token_ids)-(n-1)))
+        self._tags = kept_tags
+        self._lemmas = {}
+        if not self._ngram_counters:
+            self._profiler.count('tokens_kept',tokens_kept)
+            self._profiler.count('vocabulary_size',len(vocabulary))
+        for n,counter in counters.items():
+            self._profiler.count('n_grams',counter.total)
+            self._profiler.count('distinct_n_grams',len(counter.ngram_counts))
+            self._ngram_counters[n] = counter
+    
+    
+    def _load_cached_counts(self,key,ns):
+        """ This method loads the counts of the n-grams for every n in ns not counted yet that are in the result
+        cache, along with the tags of their words, and keys them by the ids of the shard vocabulary. It returns
+        the values of n loaded. Nothing is loaded once the token stream has been built with its own vocabulary,
+        counting from it is then cheaper anyway.
         
+        Parameters
+        ----------
+        key : str
+            The content_key of the content
+        ns : iterable(int)
+            The values of n in n-grams
+            
         """
-        regex = r'(?:[A-Z]\.)+'
-        for a in re.findall(regex,sentence):
-            replaced = a.replace(".","")
-            sentence = sentence.replace(a,replaced)
-        return sentence
+        loaded = []
+        if self._token_stream is not None and not self._counts_cached:
+            return loaded
+        for n in ns:
+            if n in self._ngram_counters:
+                continue
+            with self._profiler.stage('result_cache'):
+                cached = self._cache.get_counts(key,n)
+            if cached is None:
+                continue
+            counter,tags = cached
+            self._counts_cached = True
+            self._tags.update(tags)
+            self._ngram_counters[n] = counter.map_tokens(self._shard_vocabulary.intern)
+            loaded.append(n)
+        self._profiler.count('result_cache_counts',len(loaded))
+        return loaded
     
     
-    def _handle_punctuation(self,sentence):
-        """This method returns the statement with punctuations removed. Most of the punctuations are removed
-        except for "'" as it is contained in certain words such as don't.
+    def _iter_n_gram_ids(self,n):
+        """ This method is a generator over the n-grams of the content as tuples of token ids. The n-grams are
+        windows of n contiguous ids of a statement taken from the token stream, so nothing is materialised
+        up front. Only statements with more than n tokens give n-grams.
         
         Parameters
         ----------
-        sentence : str
-            sentence from content
+        n : int
+            n in n-grams. Specifies how many contiguous word tokens need to be formed.
+            
+        """
+        vocabulary,token_ids,sentence_ends = self._get_token_stream()
+        start = 0
+        for end in sentence_ends:
+            if end-start > n:
+                for i in range(start,end-(n-1)):
+                    yield tuple(token_ids[i:i+n])
+            start = end
+    
+    
+    def _get_n_grams(self,n):
+        """ This method constructs n-grams from the statements in the content. Contiguous sets of tokens are 
+        extracted from the token stream. For eg. given a sentence "Sun rises in the east and sets in the west" 
+        would be first changed to "sun rise east set west" and then n-grams tokens are formed for eg. 2grams 
+        such as "sun rise","rise east","east set","set west". It returns a list of such tokens.
         
+        Parameters
+        ----------
+        n : int
+            n in n-grams. Specifies how many contiguous word tokens need to be formed.
+            
+        """
+        vocabulary = self._get_vocabulary()
+        return [[vocabulary.token(i) for i in ngram] for ngram in self._iter_n_gram_ids(n)]
+    
+    
+    def _get_ngram_counter(self,n):
+        """ This method returns the NgramCounter of the n-grams of the content as tuples of token ids. The counts
+        are made once per n and shared by the PMI and the part of speech rankings.
         
+        Parameters
+        ----------
+        n : int
+            n in n-grams. Specifies how many contiguous word tokens need to be formed.
+            
         """
-        sentence = re.sub(r'[!@#$%*()_+-=\[\]\{\}|\\:;",\<\>\.|"]+', ' ', sentence)
-        sentence = re.sub(' +',' ',sentence)
-        return sentence
+        if self._sharded:
+            self._count_shards([n])
+        elif self._approximate:
+            self._count_approximate([n])
+        if n not in self._ngram_counters:
+            self._get_token_stream()
+            with self._profiler.stage('count'):
+                counter = NgramCounter(n)
+                counter.update(self._iter_n_gram_ids(n))
+            self._profiler.count('n_grams',counter.total)
+            self._profiler.count('distinct_n_grams',len(counter.ngram_counts))
+            self._ngram_counters[n] = counter
+        return self._ngram_counters[n]
+    
+    
+    def _get_numpy_scorer(self,n):
+        """ This method returns the NumpyScorer of the n-grams of the content for n. It is made once per n and
+        shared by the PMI and the part of speech rankings.
         
+        Parameters
+        ----------
+        n : int
+            n in n-grams. Specifies how many contiguous word tokens need to be formed.
             
-    def _get_n_grams(self,n):
-        """ This method constructs n-grams from the statements in the content.It takes the content attribute 
-        of the class and then removes period from acronym like words. Then it separates individual statements 
-        and then tokenizes them. We only keep the tokens that have part of speech as either noun, verb, adverb,
-        adjective. The stop words are automatically removed as most of the stop words have part of speech other
-        than the above mentioned. Then contiguous sets of tokens are extracted. For eg. given a sentence 
-        "Sun rises in the east and sets in the west" would be first changed to "sun rise east set west" and then 
-        n-grams tokens are formed for eg. 2grams such as "sun rise","rise east","east set","set west". It returns
-        a list of such tokens.
+        """
+        if n not in self._numpy_scorers:
+            vocabulary,token_ids,sentence_ends = self._get_token_stream()
+            with self._profiler.stage('count'):
+                scorer = NumpyScorer(token_ids,sentence_ends,n,len(vocabulary))
+            self._profiler.count('n_grams',scorer.total)
+            self._profiler.count('distinct_n_grams',len(scorer.counts))
+            self._numpy_scorers[n] = scorer
+        return self._numpy_scorers[n]
+    
+    
+    def ngram_statistics(self,n):
+        """ This method returns a new NgramCounter of the n-grams of the content keyed by the words instead of the
+        token ids, which only mean something within this document. The counts of many pages can be merged into
+        one NgramCounter and saved, so the topics of a whole site are ranked from the accumulated counts without
+        processing the pages again.
+        For eg. site = NgramCounter(3); site.merge(TextToTopics(content).ngram_statistics(3)) for every page,
+        then site.most_common_pmi(5) or site.most_common_frequency(5)
         
         Parameters
         ----------
         n : int
             n in n-grams. Specifies how many contiguous word tokens need to be formed.
+        
+        Raises
+        ------
+        ValueError if the n-grams are counted approximately
             
         """
+        if self._approximate:
+            raise ValueError("N-gram statistics can only be merged with exact counts")
+        vocabulary = self._get_vocabulary()
+        return self._get_ngram_counter(n).map_tokens(vocabulary.token)
+    
+    
+    def error_bounds(self,n):
+        """ This method returns the error bounds of the approximate counts for n, see ApproximateNgramCounter.bounds,
+        or None if the n-grams are counted exactly
         
+        Parameters
+        ----------
+        n : int
+            n in n-grams. Specifies how many contiguous word tokens need to be formed.
+            
+        """
+        if not self._approximate:
+            return None
+        return self._get_ngram_counter(n).bounds()
+    
+    
+    def topics(self,ns,approaches,number=None):
+        """This method extracts the topics for every combination of n and approach in one go. Lemmatization,
+        tagging and tokenization run once for the content and the n-grams are counted once per n, then every
+        ranking is derived from those counts. It returns a dictionary keyed by (approach, n).
+        With a result cache the topics of every combination already extracted from the same content are returned
+        from the cache, and the other combinations are ranked from the counts in the cache if they are there, so
+        the content is only lemmatized, tagged and counted if neither is. The topics and counts computed are then
+        stored in the cache, unless the deadline cut them short.
         
-        content = self._lemmatize_content()
-        list_ngrams = []
-        for sentence in content:
-            sentence = self._handle_period(sentence)
-            sentence_list = sentence.split(".")
-            for sub in sentence_list:
-                sub = self._handle_punctuation(sub)
-                tokens = [t for t in sub.split() if nltk.pos_tag([t])[0][1].startswith(('N','V','R','J','S'))]
-                m = len(tokens)
-                if m > n:
-                    for i in range(len(tokens)-(n-1)):
-                        list_ngrams = list_ngrams + [tokens[i:i+n]]
-        return list_ngrams
+        Parameters
+        ----------
+        ns : iterable(int)
+            The values of n in n-grams
+        approaches : iterable(str)
+            pmi for Pointwise Mututal Information and/or pos for part of speech tag filtering
+        number : int (optional)
+            The top n-grams to be displayed for every combination
+        
+        Raises
+        ------
+        ValueError if an approach is neither pmi nor pos, or pos is asked for with n other than 2 or 3
+        
+        """
+        for approach in approaches:
+            if approach not in ('pmi','pos'):
+                raise ValueError("Unknown approach {}. It can be pmi or pos".format(approach))
+        cache = self._cache
+        results = {}
+        loaded = []
+        if cache is not None:
+            with self._profiler.stage('result_cache'):
+                key = cache.content_key(self._content)
+                for approach in approaches:
+                    for n in ns:
+                        topics = cache.get_topics(key,approach,n,number)
+                        if topics is not None:
+                            results[(approach,n)] = Topics(topics,self.partial)
+            self._profiler.count('result_cache_hits',len(results))
+            missing = [n for n in ns if any((approach,n) not in results for approach in approaches)]
+            loaded = self._load_cached_counts(key,missing)
+        else:
+            missing = ns
+        if self._sharded:
+            self._count_shards(missing)
+        elif self._approximate:
+            self._count_approximate(missing)
+        computed = []
+        for approach in approaches:
+            for n in ns:
+                if (approach,n) in results:
+                    continue
+                if approach=='pos':
+                    results[(approach,n)] = self.pos_based_topics(n,number)
+                else:
+                    results[(approach,n)] = self.pim_based_topics(n,number)
+                computed.append((approach,n))
+        if cache is not None and not self.partial:
+            with self._profiler.stage('result_cache'):
+                for approach,n in computed:
+                    cache.put_topics(key,approach,n,number,results[(approach,n)])
+                if 'counts' in cache.store:
+                    for n in dict.fromkeys(n for approach,n in computed):
+                        if n not in loaded:
+                            counter = self.ngram_statistics(n)
+                            tags = {t:self._tags[t] for counts in counter.position_counts for t in counts}
+                            cache.put_counts(key,n,counter,tags)
+        return results
     
     
     def pim_based_topics(self,n,number=None):
@@ -177,6 +751,8 @@ class TextToTopics:
         However the downside is that if two words are rare and say occur only once then PMI score for such pair
         will be high even though it does not really talk about the content. So I have set the threshold frequency
         to 2. Although this seems very low threshold it worked for me for the test urls.
+        The n-grams are counted in a single pass by NgramCounter and every distinct n-gram is scored once, or all
+        at once with array operations by NumpyScorer if the vectorised option is set.
         
         Parameters
         ----------
@@ -186,29 +762,16 @@ class TextToTopics:
             The top n-grams to be displayed
         
         """
-        ngrams = self._get_n_grams(n)
-        counter = Counter()
-        for value in ngrams:
-            counts = [0 for v in value] + [0]
-            total = len(ngrams)
-            for v in ngrams:
-                if v == value:
-                    counts[-1] +=1
-                for i in range(len(v)):
-                    if v[i] == value[i]:
-                        counts[i] += 1
-            if(counts[-1]>2):
-                p_all = counts[-1]/total
-                p_other = 1
-                for c in counts[:-1]:
-                    p_other = p_other * c/total
-                pmi = math.log(p_all/p_other)
-                topic = " ".join(value)
-                counter.update({topic:pmi})
-        if number:
-            return(counter.most_common(number))
-        else:
-            return(counter.most_common())
+        vocabulary = self._get_vocabulary()
+        if self._vectorised and n not in self._ngram_counters:
+            scorer = self._get_numpy_scorer(n)
+            with self._profiler.stage('pmi'):
+                topics = [(vocabulary.decode(ngram),score) for ngram,score in scorer.most_common_pmi(number)]
+            return Topics(topics,self.partial)
+        counter = self._get_ngram_counter(n)
+        with self._profiler.stage('pmi'):
+            topics = [(vocabulary.decode(ngram),score) for ngram,score in counter.most_common_pmi(number)]
+        return Topics(topics,self.partial)
     
     
     def pos_based_topics(self,n,number):
@@ -218,7 +781,8 @@ class TextToTopics:
         For valid 2-grams the strucure has to be (noun,noun)  or (Adjective,noun). 
         For valid 3-grams the structue has to be (adjective/noun, anything, adjective/noun)
         The n-grams are filtered and then based on their frequency the topics are chosen. higher the frequency
-        more the chances of the n-grams to be a topic.
+        more the chances of the n-grams to be a topic. Every distinct n-gram is checked once and scored by its
+        count added once per occurrence, i.e. count*count.
         This approach can only take 2grams or 3grams tokens. Other value of n would raise an exception.
         
         Parameters
@@ -233,27 +797,32 @@ class TextToTopics:
         ValueError if n is given value other than 2 or 3
         
         """
-        ngrams = [" ".join(v) for v in self._get_n_grams(n)]
         if n==3:
-            counter = Counter(ngrams)
-            counter_final = Counter()
-            for value in ngrams:
-                w1,w2,w3 = value.split(" ")[0],value.split(" ")[1],value.split(" ")[2]
-                if nltk.pos_tag([w1])[0][1][0] in ['J','N'] and  nltk.pos_tag([w3])[0][1][0] in ['J','N']:
-                    counter_final.update({value:counter[value]})
-            return counter_final.most_common(number)
-
+            def valid(t1,t2,t3):
+                return t1 in ['J','N'] and t3 in ['J','N']
         elif n==2:
-            counter = Counter(ngrams)
-            #print(counter)
-            counter_final = Counter()
-            for value in ngrams:
-                w1,w2 = value.split(" ")[0],value.split(" ")[1]
-                if (nltk.pos_tag([w1])[0][1][0] in ['N'] and  nltk.pos_tag([w2])[0][1][0] in ['N'] or \
-                   nltk.pos_tag([w1])[0][1][0] in ['J'] and  nltk.pos_tag([w2])[0][1][0] in ['N']):
-                    counter_final.update({value:counter[value]})
-
-            return counter_final.most_common(number)
-        
+            def valid(t1,t2):
+                return t1 in ['N'] and t2 in ['N'] or t1 in ['J'] and t2 in ['N']
         else:
-            raise ValueError("Part of speech based topics can only take n=2 or n=3")
\ No newline at end of file
+            raise ValueError("Part of speech based topics can only take n=2 or n=3")
+        vocabulary = self._get_vocabulary()
+        if self._vectorised and n not in self._ngram_counters:
+            scorer = self._get_numpy_scorer(n)
+            with self._profiler.stage('pos'):
+                tags = np.array([self._tags[vocabulary.token(i)][0] for i in range(len(vocabulary))]+[''])
+                first,last = tags[scorer.ngrams[:,0]],tags[scorer.ngrams[:,-1]]
+                if n==3:
+                    mask = np.isin(first,['J','N']) & np.isin(last,['J','N'])
+                else:
+                    mask = np.isin(first,['J','N']) & (last=='N')
+                topics = [(vocabulary.decode(ngram),count*count) for ngram,count in scorer.most_common_frequency(number,mask)]
+            return Topics(topics,self.partial)
+        counter = self._get_ngram_counter(n)
+        with self._profiler.stage('pos'):
+            tags = [self._tags[vocabulary.token(i)][0] for i in range(len(vocabulary))]
+            counter_final = Counter()
+            for ngram,count in counter.ngram_counts.items():
+                if valid(*[tags[i] for i in ngram]):
+                    counter_final[ngram] = count*count
+            topics = [(vocabulary.decode(ngram),score) for ngram,score in counter_final.most_common(number)]
+        return Topics(topics,self.partial)
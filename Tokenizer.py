@@ -0,0 +1,104 @@
+import re
+
+class Tokenizer:
+    """
+    This class splits a statement into sentences and tokens in a single scan with precompiled patterns. The
+    periods of acronyms such as M.B.A are removed, every other period ends a sentence, and the tokens are the
+    runs of characters that are neither white space nor punctuation. The apostrophe is not punctuation so that
+    words such as don't are kept whole. The tokens are returned as (start, end) offsets into the statement
+    instead of as intermediate copies of the sentences, or by sentences directly as the token strings of the
+    same scan, which is the fastest when the tokens are needed as strings anyway. The tokens are exactly those
+    of removing the acronym periods, splitting on ".", replacing the punctuation with spaces and splitting on
+    white space
+
+    ...
+
+    Attributes
+    ----------
+    acronym : re.Pattern
+        Matches the acronyms, for eg. M.B.A.
+    scanner : re.Pattern
+        Matches a token or a period
+
+    Methods
+    -------
+    collapse_acronyms(statement)
+        Returns the statement with the periods of the acronyms removed
+
+    tokenize(statement)
+        Returns the statement and its sentences as lists of (start, end) offsets of the tokens
+
+    sentences(statement)
+        Returns the sentences of the statement as lists of tokens
+
+    """
+
+    acronym = re.compile(r'(?:[A-Z]\.)+')
+    scanner = re.compile(r'[^\s!@#$%*()_+-=\[\]\{\}|\\:;",\<\>\.|"]+|\.')
+
+
+    def collapse_acronyms(self,statement):
+        """This method returns the statement with the periods of the acronyms removed, for eg. M.B.A becomes MBA.
+        Statements without acronyms, such as the lower cased lemmatized ones, are returned after one search.
+        Otherwise every acronym found is replaced everywhere in turn, which is what the tokens have always been
+        built from; it differs from a single substitution when an acronym is also part of a longer one
+
+        Parameters
+        ----------
+        statement : str
+            statement from content
+
+        """
+        if self.acronym.search(statement) is None:
+            return statement
+        for a in self.acronym.findall(statement):
+            statement = statement.replace(a,a.replace(".",""))
+        return statement
+
+
+    def tokenize(self,statement):
+        """This method returns (source, sentences) where source is the statement with the acronym periods removed
+        and sentences holds for every sentence the list of (start, end) offsets of its tokens in source. Every
+        period ends a sentence, so there is always one more sentence than there are periods
+
+        Parameters
+        ----------
+        statement : str
+            statement from content
+
+        """
+        source = self.collapse_acronyms(statement)
+        sentences = []
+        sentence = []
+        for match in self.scanner.finditer(source):
+            start,end = match.span()
+            if source[start]=='.':
+                sentences.append(sentence)
+                sentence = []
+            else:
+                sentence.append((start,end))
+        sentences.append(sentence)
+        return source,sentences
+
+
+    def sentences(self,statement):
+        """This method returns the sentences of the statement as lists of tokens. It makes the same scan as
+        tokenize but takes the tokens as strings from the scanner instead of building a match object and an
+        offset pair for every token
+
+        Parameters
+        ----------
+        statement : str
+            statement from content
+
+        """
+        sentences = []
+        sentence = []
+        for token in self.scanner.findall(self.collapse_acronyms(statement)):
+            if token=='.':
+                sentences.append(sentence)
+                sentence = []
+            else:
+                sentence.append(token)
+        sentences.append(sentence)
+        return sentences
@@ -0,0 +1,295 @@
+from UrlToText import UrlToText
+from HtmlDocument import HtmlDocument
+from Deadline import Deadline
+from BatchExtractor import extract_topics
+from nltk.stem.wordnet import WordNetLemmatizer
+from concurrent.futures import ProcessPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import socketserver
+import threading
+import nltk
+import json
+import os
+
+def warm_up():
+    """This function loads the models the topic extraction needs, the averaged perceptron tagger and the
+    lazily loaded WordNet corpus behind WordNetLemmatizer, so that the first request does not pay for them.
+    It is run in the service process before the workers are started and again in every worker
+
+    """
+    try:
+        nltk.pos_tag_sents([['warm']])
+        WordNetLemmatizer().lemmatize('warm','n')
+    except LookupError as e:
+        print("Could not load the NLTK models {}".format(str(e)))
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn,socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request,client_address = socketserver.UnixStreamServer.get_request(self)
+        return request,('unix',0)
+
+
+class _TopicRequestHandler(BaseHTTPRequestHandler):
+    """
+    This class handles the HTTP requests of the TopicService
+
+    POST /topics with a JSON body {"url": ..., or "html": ..., "n": 3 or [2,3], "approach": "pmi" or ["pmi","pos"],
+    "number": 5} returns {"results": [{"n": ..., "approach": ..., "topics": [[topic, score], ...], "partial": ...}]}
+    where partial is true if the deadline of the service cut the extraction short
+
+    GET /health returns {"status": "ok", "in_flight": ..., "queue_size": ...}
+
+    An invalid request, html without any content included, is answered with a 400 and a url that cannot be
+    fetched with a 502
+
+    """
+
+    def _send_json(self,status,body,headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(data)))
+        for key,value in (headers or {}).items():
+            self.send_header(key,value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path=='/health':
+            self._send_json(200,{'status':'ok','in_flight':service.in_flight,'queue_size':service.queue_size})
+        else:
+            self._send_json(404,{'error':'Not found'})
+
+
+    def do_POST(self):
+        service = self.server.service
+        if self.path!='/topics':
+            self._send_json(404,{'error':'Not found'})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length',0))) or b'{}')
+        except ValueError as e:
+            self._send_json(400,{'error':'Invalid JSON {}'.format(str(e))})
+            return
+        if not service.acquire():
+            self._send_json(503,{'error':'Too many requests in flight'},{'Retry-After':'1'})
+            return
+        try:
+            self._send_json(200,{'results':service.extract(request)})
+        except ValueError as e:
+            self._send_json(400,{'error':str(e)})
+        except Exception as e:
+            self._send_json(502,{'error':str(e)})
+        finally:
+            service.release()
+
+
+    def log_message(self,format,*args):
+        if not self.server.service.quiet:
+            BaseHTTPRequestHandler.log_message(self,format,*args)
+
+
+class TopicService:
+    """
+    This class is a long running topic extraction service. The NLTK models are loaded once and the CPU bound
+    TextToTopics work is spread across a pool of pre-warmed worker processes, so the requests do not pay the
+    start up cost of the interpreter and the models. Requests are served over local HTTP, on a TCP port or on
+    a Unix socket. At most queue_size requests are processed at a time, the others are refused with a 503 so
+    that clients back off instead of piling up
+
+    ...
+
+    Attributes
+    ----------
+    address : tuple or str
+        (host, port) to listen on, or the path of a Unix socket
+    workers : int
+        The number of worker processes. None for the number of CPUs
+    queue_size : int
+        The maximum number of requests processed at the same time
+    in_flight : int
+        The number of requests being processed
+    lexicon : str
+        Path of a Lexicon file shared by the workers. None for NLTK only
+    result_cache : ResultCache
+        The cache of the topics of the contents already processed, shared by the workers. None for no cache
+    deadline : float
+        The number of seconds the fetch and the topic extraction of every request may take. None for no limit
+    url_options : Dictionary
+        Extra keyword arguments passed to UrlToText, for eg. cache=ResponseCache(...)
+
+    Methods
+    -------
+    start()
+        Loads the models, starts the worker processes and opens the socket
+
+    serve_forever()
+        Starts the service if needed and serves requests until shutdown is called
+
+    shutdown()
+        Stops serving and stops the worker processes
+
+    extract(request)
+        Returns the topics for a request dictionary
+
+    """
+
+
+    def __init__(self,address=('127.0.0.1',8000),workers=None,queue_size=32,quiet=False,lexicon=None,result_cache=None,
+                 deadline=None,**url_options):
+        """
+        Parameters
+        ----------
+        address : tuple or str
+            (host, port) to listen on, or the path of a Unix socket
+        workers : int (optional)
+            The number of worker processes
+        queue_size : int
+            The maximum number of requests processed at the same time
+        quiet : bool
+            If True the requests are not logged
+        lexicon : str (optional)
+            Path of a Lexicon file shared by the workers
+        result_cache : ResultCache (optional)
+            The cache of the topics of the contents already processed, shared by the workers
+        deadline : float (optional)
+            The number of seconds the fetch and the topic extraction of every request may take. max_bytes in the
+            url_options then also caps the download without streaming
+        url_options : keyword arguments
+            Passed to UrlToText
+        """
+        self.address = address
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.quiet = quiet
+        self.lexicon = lexicon
+        self.result_cache = result_cache
+        self.deadline = deadline
+        self.url_options = url_options
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._server = None
+        self._session = None
+
+
+    def start(self):
+        """This method loads the models in this process, starts and warms the worker processes and opens the
+        socket. With the fork start method the workers inherit the models that are already loaded
+
+        """
+        warm_up()
+        self._pool = ProcessPoolExecutor(self.workers,initializer=warm_up)
+        wait([self._pool.submit(os.getpid) for i in range(self.workers)])
+        self._session = HtmlDocument.make_session(self.queue_size)
+        if isinstance(self.address,str):
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            self._server = _UnixHTTPServer(self.address,_TopicRequestHandler)
+        else:
+            self._server = ThreadingHTTPServer(self.address,_TopicRequestHandler)
+        self._server.service = self
+        return self
+
+
+    def serve_forever(self):
+        """This method serves requests until shutdown is called from another thread or the process is
+        interrupted
+
+        """
+        if self._server is None:
+            self.start()
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._close()
+
+
+    def shutdown(self):
+        """This method stops serve_forever"""
+        self._server.shutdown()
+
+
+    def _close(self):
+        self._server.server_close()
+        if isinstance(self.address,str) and os.path.exists(self.address):
+            os.remove(self.address)
+        self._pool.shutdown()
+        self._session.close()
+
+
+    def acquire(self):
+        """This method reserves a slot for a request. It returns False if queue_size requests are already
+        being processed
+
+        """
+        with self._lock:
+            if self.in_flight>=self.queue_size:
+                return False
+            self.in_flight += 1
+            return True
+
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+    @staticmethod
+    def _is_positive_int(value):
+        return isinstance(value,int) and not isinstance(value,bool) and value>0
+
+
+    def extract(self,request):
+        """This method returns the topics for a request as a list of result dictionaries, one per combination
+        of n and approach. The webpage is fetched in the calling thread and the topics are extracted in a
+        worker process, both within the deadline of the request if the service has one
+
+        Parameters
+        ----------
+        request : Dictionary
+            url or html, and optionally n, approach and number
+
+        Raises
+        ------
+        ValueError
+            If the request has neither url nor html, n or number are not positive integers, it asks for an unknown
+            approach or no content can be extracted from the html. The errors of fetching the url are raised as
+            they are
+
+        """
+        if not isinstance(request,dict):
+            raise ValueError("The request must be a JSON object")
+        ns = request.get('n',3)
+        ns = ns if isinstance(ns,list) else [ns]
+        for n in ns:
+            if not self._is_positive_int(n):
+                raise ValueError("n must be a positive integer or a list of them, not {!r}".format(n))
+        approaches = request.get('approach','pmi')
+        approaches = approaches if isinstance(approaches,list) else [approaches]
+        for approach in approaches:
+            if approach not in ('pmi','pos'):
+                raise ValueError("Unknown approach {}. It can be pmi or pos".format(approach))
+        number = request.get('number',5)
+        if number is not None and not self._is_positive_int(number):
+            raise ValueError("number must be a positive integer, not {!r}".format(number))
+        deadline = Deadline(self.deadline,self.url_options.get('max_bytes')) if self.deadline else None
+        if request.get('html') is not None:
+            try:
+                content = UrlToText.from_html(request['html'],request.get('url'),deadline=deadline).get_total_content()
+            except Exception as e:
+                raise ValueError("No content could be extracted from the html {}".format(str(e)))
+        elif request.get('url'):
+            content = UrlToText(request['url'],session=self._session,deadline=deadline,**self.url_options).get_total_content()
+        else:
+            raise ValueError("The request needs a url or html")
+        results = self._pool.submit(extract_topics,content,ns,approaches,number,self.lexicon,self.result_cache,
+                                    deadline).result()
+        return [{'n':n,'approach':approach,'topics':topics,'partial':topics.partial} for (approach,n),topics in results]
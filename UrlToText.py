@@ -1,5 +1,7 @@
-import requests
-from bs4 import BeautifulSoup
+from HtmlDocument import HtmlDocument
+from StreamingExtractor import StreamingExtractor
+from ResponseCache import normalise_url
+from Profiler import DISABLED
 import bs4
 import re
 
@@ -13,6 +15,16 @@ class UrlToText:
     ----------
     url : str
         The URL of the webpage of which the topics need to be found 
+    _document: HtmlDocument
+        The fetched and parsed webpage. It is shared by the body, meta and title extraction
+    _profiler: Profiler
+        Receives the stage timers and counters of the extraction
+    _streaming: bool
+        If True the content is extracted by StreamingExtractor without building a BeautifulSoup tree
+    _boilerplate: BoilerplateIndex
+        The index of the blocks repeated across the webpages of the site, if any
+    _deadline: Deadline
+        The time and download budget of the extraction, if any
     _status_codes: Dictionary
         The dictionary of common HTTP status codes as the key and their brief description as values
     _body: bs4.element.Tag
@@ -20,6 +32,15 @@ class UrlToText:
         
     Methods
     -------
+    from_html(html,url=None,profiler=None,deadline=None)
+        Returns a UrlToText object for raw HTML without touching the network
+    
+    from_file(path)
+        Returns a UrlToText object for a local HTML file without touching the network
+    
+    _get_document()
+        Fetches and parses the webpage once and returns the HtmlDocument
+    
     _get_soup()
         Takes in the URL and returns BeautifulSoup object 
     
@@ -36,16 +57,25 @@ class UrlToText:
         Removes the script and style elements from the HTML and returns the HTML structure 
         without any of these tags
     
-    _filter_content(node,min_char,threshold)
+    _counts_as_text(node,string_type)
+        Returns True if strings of the type are part of the text of the node
+    
+    _get_node_stats(body)
+        Computes the tag count, character count and link character count of every node in one bottom up pass
+    
+    _filter_content(node,min_char,threshold,node_stats=None)
         Filters the nodes that has less textual density than the threshold parameter 
         and less textual length than min_char parameter
     
-    _find_filter_threshold(body)
+    _find_filter_threshold(node_stats=None)
         Returns the threshold density which is supposed to be the density of the body element
         
     _get_body_content()
         Returns the textual content under the body element
         
+    _drop_boilerplate(content)
+        Counts the blocks in the boilerplate index and drops those repeated across the site
+        
     get_total_content()
         Returns the total textual content under body element, title element and the meta 
         element of the HTML document
@@ -54,61 +84,106 @@ class UrlToText:
    
 
 
-    def __init__(self,url):
+    def __init__(self,url=None,document=None,streaming=False,max_bytes=None,max_nodes=None,session=None,cache=None,profiler=None,boilerplate=None,deadline=None):
         """
         Parameters
         ----------
         url : str
             The URL of the webpage of which the topics need to be found 
+        document : HtmlDocument (optional)
+            An already parsed document. If given, the URL is not fetched
+        streaming : bool (optional)
+            If True the webpage is extracted by StreamingExtractor in chunks, without building a BeautifulSoup tree
+        max_bytes : int (optional)
+            The maximum number of bytes downloaded in streaming mode
+        max_nodes : int (optional)
+            The maximum number of elements processed in streaming mode
+        session : requests.Session (optional)
+            The session used to fetch the webpage, so that pooled keep-alive connections are reused
+        cache : ResponseCache (optional)
+            The on-disk cache the webpage is served from when possible
+        profiler : Profiler (optional)
+            Receives the time of every stage and the counts of bytes fetched, DOM nodes and blocks kept
+        boilerplate : BoilerplateIndex (optional)
+            The index of the blocks repeated across the site. The blocks of this webpage are added to it and
+            the boilerplate blocks are dropped from the content
+        deadline : Deadline (optional)
+            The budget of the extraction. The download and the density filter stop when it runs out and the
+            content extracted so far is returned
         """
         self.url = url
-        self._status_codes = {200:'OK',
-                              400:'Bad request - The request could not be understood by the server \
-                                   due to malformed syntax.',\
-                              401:'Unauthorized - The request requires user authentication.',\
-                              403:'Forbidden - The server understood the request, but is refusing to fulfill it.',\
-                              404:'Not Found - The server has not found anything matching the Request-URI.',\
-                              409:'Conflict - The request could not be completed due to a conflict with the current state of the resource.'\
-                              ,500:'Internal Server error'}
+        self._document = document
+        self._streaming = streaming
+        self._max_bytes = max_bytes
+        self._max_nodes = max_nodes
+        self._session = session
+        self._cache = cache
+        self._profiler = profiler or DISABLED
+        self._boilerplate = boilerplate
+        self._deadline = deadline
+        self._status_codes = HtmlDocument.status_codes
+    
+    
+    @classmethod
+    def from_html(cls,html,url=None,profiler=None,deadline=None):
+        """This function returns a UrlToText object for raw HTML bytes or string. No network access is made
+        
+        Parameters
+        ----------
+        html : bytes or str
+            The raw HTML markup of the webpage
+        url : str (optional)
+            The URL the markup belongs to
+        profiler : Profiler (optional)
+            Receives the stage timers and counters of the extraction
+        deadline : Deadline (optional)
+            The budget of the extraction. The density filter stops when it runs out
+        
+        """
+        profiler = profiler or DISABLED
+        with profiler.stage('parse'):
+            document = HtmlDocument.from_html(html,url)
+        return cls(url,document,profiler=profiler,deadline=deadline)
+    
+    
+    @classmethod
+    def from_file(cls,path):
+        """This function returns a UrlToText object for a local HTML file. No network access is made
+        
+        Parameters
+        ----------
+        path : str
+            Path of the HTML file
+        
+        """
+        return cls(document=HtmlDocument.from_file(path))
+    
+    
+    def _get_document(self):
+        """This function returns the HtmlDocument for the URL. The webpage is fetched and parsed on the first call
+        only, every later call returns the same document
+        
+        """
+        if self._document is None:
+            profiler = self._profiler
+            with profiler.stage('fetch'):
+                if self._deadline is not None:
+                    response = HtmlDocument.fetch(self.url,True,self._session,self._cache,self._deadline)
+                    content = self._deadline.download(response)
+                else:
+                    content = HtmlDocument.fetch(self.url,session=self._session,cache=self._cache).content
+            profiler.count('bytes_fetched',len(content))
+            with profiler.stage('parse'):
+                self._document = HtmlDocument(content,self.url)
+        return self._document
     
     
     def _get_soup(self):
         """This function returns the BeautifulSoup object based on the URL supplied. The class attribute url is used
-        by this method
-
-        Raises
-        ------
-        Exception 
-            The status code sent by the server is not of class 2xxx
-        ConnectionError
-            If you are not connected to the internet or there is some other connection issue
-        Timeout Error
-            If the connection is timed out
-        RequestException
-            If some ambiguous error happens
-        
-        """
-        
-        url = self.url
-        headers = {'user-agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_11_6) \
-        AppleWebKit/537.36 (KHTML, like Gecko) Chrome/53.0.2785.143 Safari/537.36'}
-        try:
-            html = requests.get(url,headers=headers,timeout=10)
-            status_code = html.status_code
-            if str(status_code)[0]!='2':
-                if status_code in self._status_codes:
-                    raise Exception ('Something bad happened {}'.format(status_code,self._status_codes[status_code]))
-                else:
-                    raise Exception ('Status code other than 2xxx encountered. Status code is {}'.format(status_code))
-        except requests.ConnectionError as e:
-            print("Failed to connect. Check if you are connected to the internet {}".format(str(e)))
-        except requests.Timeout as e:
-            print("Timeout Error {}".format(str(e)))  
-        except requests.RequestException as e:
-            print("Some ambiguous error while processing the request {}".format(str(e)))
-        result = html.content
-        soup = BeautifulSoup(result,'html.parser')
-        return soup
+        by this method. The page is downloaded and parsed only once, see HtmlDocument.from_url for the errors raised
+        
+        """
+        return self._get_document().soup
     
     
     def _get_meta_content(self):
@@ -116,19 +191,7 @@ class UrlToText:
         If no meta tags are present then it prints out that "No meta information is present"
         
         """
-        soup = self._get_soup()
-        meta = soup.findAll('meta')
-        content = []
-        if len(meta)<1:
-            print("No meta information found")
-        for m in meta:
-            attrs = list(m.attrs.keys())
-            if('content' in attrs):
-                attrs.remove('content')
-            for attr in attrs:
-                if 'keywords' in m[attr] or 'title' in m[attr] or 'description' in m[attr]:
-                    content.append(m['content'])
-        return content
+        return self._get_document().get_meta_content()
 
     
     def _get_title_content(self):
@@ -136,12 +199,7 @@ class UrlToText:
         then it prints out "No title tag found"
         
         """
-        soup = self._get_soup()
-        if(soup.find('title')):    
-            title = [soup.find('title').text]
-            return title
-        else:
-            print("No title tag found")
+        return self._get_document().get_title_content()
         
     
     def _set_body(self):
@@ -155,8 +213,7 @@ class UrlToText:
         
         """
         
-        soup = self._get_soup()
-        body = soup.find('body')
+        body = self._get_document().get_body()
         if(body and len(body.findAll())>0):
             self._body = body
         else:
@@ -172,7 +229,51 @@ class UrlToText:
             tag.decompose()
             
             
-    def _find_filter_threshold(self):
+    def _counts_as_text(self,node,string_type):
+        """This function returns True if strings of type string_type are part of node.text. BeautifulSoup only
+        takes the string types listed in the interesting_string_types of the node (by default NavigableString and
+        CData, so no comments) into account
+        
+        """
+        types = getattr(node,'interesting_string_types',None) or (bs4.element.NavigableString,bs4.element.CData)
+        if isinstance(types,type):
+            return string_type is types
+        return string_type in types
+    
+    
+    def _get_node_stats(self,body):
+        """This function computes the text density statistics of every node under the body element, the body
+        included, in a single bottom up pass over the tree. For every node it returns (Ti, Ci, Li) where Ti is the 
+        number of nodes present under the node, Ci the number of textual characters of the node (len(node.text))
+        and Li the number of textual characters of the hyperlinks under the node. These are the values 
+        _filter_content would otherwise find by walking the subtree of every node again, which is quadratic in
+        the size of the tree. The statistics are returned as a dictionary keyed by id(node)
+        
+        """
+        partial = {}
+        node_stats = {}
+        for node in reversed([body]+list(body.descendants)):
+            parent = node.parent
+            if parent is not None and id(parent) not in partial:
+                partial[id(parent)] = [0,{},0]
+            if isinstance(node,bs4.element.Tag):
+                total_tags,chars,len_links = partial.pop(id(node),[0,{},0])
+                total_char = sum(c for t,c in chars.items() if self._counts_as_text(node,t))
+                node_stats[id(node)] = (total_tags,total_char,len_links)
+                if node is body:
+                    break
+                parent_stats = partial[id(parent)]
+                parent_stats[0] += total_tags+1
+                for t,c in chars.items():
+                    parent_stats[1][t] = parent_stats[1].get(t,0)+c
+                parent_stats[2] += len_links+(total_char if node.name=='a' else 0)
+            elif isinstance(node,bs4.element.NavigableString):
+                chars = partial[id(parent)][1]
+                chars[type(node)] = chars.get(type(node),0)+len(node)
+        return node_stats
+    
+    
+    def _find_filter_threshold(self,node_stats=None):
         """This function calculates the threshold of text density to be used in _filter_content function.
         The threshold is set as the the text density of the body element. The text density for a particular
         node is found by (Ci)/(Ti) where Ci is the number of textual character for a node and Ti is the number
@@ -181,13 +282,16 @@ class UrlToText:
         
         """
         body = self._body
-        total_tags = len(body.findAll())
-        total_char = len(body.text)
+        if node_stats is not None:
+            total_tags,total_char,len_links = node_stats[id(body)]
+        else:
+            total_tags = len(body.findAll())
+            total_char = len(body.text)
         density = total_char/total_tags
         return density
         
     
-    def _filter_content(self,node,min_char,threshold):
+    def _filter_content(self,node,min_char,threshold,node_stats=None):
         """ This function removes the HTML nodes that have text density lower than the threshold density
         the nodes that have less textual characters for eg. <li> tag. The threshold is set as the the text 
         density of the body element. The text density for a particular node is found by (Ci)/(Ti) where 
@@ -195,14 +299,18 @@ class UrlToText:
         the i-th node. The number of textual characters that represent the hyperlink are subtrcted from the 
         total characters because hyperlink would most of the time not convey meaningful information.
         More the text density more important the node is. This is another strategy to reduce the clutter.
+        If node_stats from _get_node_stats is given the precomputed values are used instead of walking the subtree.
         
         """
-        total_tags = len(node.findAll())
-        total_char = len(node.text)
-        a_tags = node.findAll('a')
-        len_links = 0
-        for a in a_tags:
-            len_links += len(a.text)
+        if node_stats is not None:
+            total_tags,total_char,len_links = node_stats[id(node)]
+        else:
+            total_tags = len(node.findAll())
+            total_char = len(node.text)
+            a_tags = node.findAll('a')
+            len_links = 0
+            for a in a_tags:
+                len_links += len(a.text)
         total_char = total_char - len_links
         if(total_tags!=0):
             density = total_char/total_tags
@@ -218,29 +326,66 @@ class UrlToText:
         """ This function returns the textual content for all the nodes under the body element 
         of the HTML document. The nodes are first checked for text density. If it is lower than the
         threshold density then those nodes are not considered and their textual content is not taken 
-        into account.
+        into account. The statistics for the density of all the nodes are computed once up front by _get_node_stats.
+        If the deadline runs out the content of the nodes checked so far is returned.
         """
         body = self._body
-        self._filter_tags(body)
+        profiler = self._profiler
+        deadline = self._deadline
+        with profiler.stage('filter_tags'):
+            self._filter_tags(body)
         body_content = []
         min_char = 25
-        threshold = self._find_filter_threshold()
-        for child in body.findAll():
-            if(type(child) is bs4.element.Tag):
-                if self._filter_content(child,min_char,threshold):
-                    content = child.find(text=True, recursive=False)
-                    if (content is not None):
-                        content = str(content)
-                        content = re.sub('\s+',' ',content).strip()
-                        if content!='' and (len(content))>min_char:
-                            body_content.append(content)
+        with profiler.stage('density'):
+            node_stats = self._get_node_stats(body)
+            threshold = self._find_filter_threshold(node_stats)
+            for i,child in enumerate(body.findAll()):
+                if deadline is not None and i%256==0 and deadline.expired():
+                    deadline.partial = True
+                    break
+                if(type(child) is bs4.element.Tag):
+                    if self._filter_content(child,min_char,threshold,node_stats):
+                        content = child.find(string=True, recursive=False)
+                        if (content is not None):
+                            content = str(content)
+                            content = re.sub('\s+',' ',content).strip()
+                            if content!='' and (len(content))>min_char:
+                                body_content.append(content)
+        profiler.count('dom_nodes',len(node_stats))
+        profiler.count('blocks_kept',len(body_content))
         return body_content
     
     def get_total_content(self):
-        """ This function returns all the textual content under the body, meta and the title tag combined
+        """ This function returns all the textual content under the body, meta and the title tag combined.
+        In streaming mode the content is extracted by StreamingExtractor in bounded memory instead
         
         """
+        profiler = self._profiler
+        if self._streaming and self._document is None:
+            with profiler.stage('stream_extract'):
+                extractor = StreamingExtractor.from_url(self.url,self._max_bytes,self._max_nodes,session=self._session,cache=self._cache,deadline=self._deadline)
+                body_content = extractor.get_body_content()
+                total_content = body_content + extractor.get_meta_content() + extractor.get_title_content()
+            profiler.count('bytes_fetched',extractor.bytes_read)
+            profiler.count('dom_nodes',extractor.nodes)
+            profiler.count('blocks_kept',len(body_content))
+            return self._drop_boilerplate(total_content)
         body = self._set_body()
-        total_content = self._get_body_content() + self._get_meta_content() + self._get_title_content()
-        return total_content
+        body_content = self._get_body_content()
+        with profiler.stage('meta_title'):
+            total_content = body_content + self._get_meta_content() + self._get_title_content()
+        return self._drop_boilerplate(total_content)
+    
+    def _drop_boilerplate(self,content):
+        """ This function adds the blocks of the content to the boilerplate index, if any, and returns the content
+        without the blocks that are repeated across the webpages of the site. The webpage is recognised by its
+        normalised URL, so that extracting it again does not count its blocks twice
+        
+        """
+        if self._boilerplate is None:
+            return content
+        with self._profiler.stage('boilerplate'):
+            kept = self._boilerplate.process(content,normalise_url(self.url) if self.url else None)
+        self._profiler.count('boilerplate_dropped',len(content)-len(kept))
+        return kept
     
\ No newline at end of file
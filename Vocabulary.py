@@ -0,0 +1,81 @@
+class Vocabulary:
+    """
+    This class interns tokens, mapping every distinct token to a small integer id. Storing the ids instead of
+    the token strings lets n-grams be kept as windows over a compact integer array
+
+    ...
+
+    Attributes
+    ----------
+    _ids : Dictionary
+        The id of every token interned so far
+    _tokens : list(str)
+        The token of every id, in the order the tokens were interned
+
+    Methods
+    -------
+    intern(token)
+        Returns the id of the token, adding it to the vocabulary if it is new
+
+    token(token_id)
+        Returns the token of the id
+
+    decode(token_ids)
+        Returns the tokens of a sequence of ids joined by a space
+
+    """
+
+
+    def __init__(self):
+        self._ids = {}
+        self._tokens = []
+
+
+    def __len__(self):
+        return len(self._tokens)
+
+
+    def __contains__(self,token):
+        return token in self._ids
+
+
+    def intern(self,token):
+        """This method returns the id of the token. A new token is given the next free id
+
+        Parameters
+        ----------
+        token : str
+            token(word) from a sentence
+
+        """
+        token_id = self._ids.get(token)
+        if token_id is None:
+            token_id = len(self._tokens)
+            self._ids[token] = token_id
+            self._tokens.append(token)
+        return token_id
+
+
+    def token(self,token_id):
+        """This method returns the token of the id
+
+        Parameters
+        ----------
+        token_id : int
+            id returned by intern
+
+        """
+        return self._tokens[token_id]
+
+
+    def decode(self,token_ids):
+        """This method returns the tokens of the ids joined by a space, which is how topics are displayed
+
+        Parameters
+        ----------
+        token_ids : sequence(int)
+            ids returned by intern
+
+        """
+        tokens = self._tokens
+        return " ".join([tokens[i] for i in token_ids])
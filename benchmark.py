@@ -0,0 +1,232 @@
+"""
+Stage level benchmark of the URL to topics pipeline. Synthetic HTML pages of several shapes and sizes are
+generated locally, so it runs fully offline, and every stage of the pipeline is timed on its own. The results
+can be saved as a baseline and later runs compared against it to catch regressions.
+
+    python benchmark.py --sizes 50 100 200 --save baseline.json
+    python benchmark.py --sizes 50 100 200 --compare baseline.json
+"""
+
+from UrlToText import UrlToText
+from HtmlDocument import HtmlDocument
+from TextToTopics import TextToTopics
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+WORDS = ("data science machine learning model topic network neural deep graph page content text web server "
+         "search engine ranking quickly running useful natural language processing statistics analysis python "
+         "code program memory cache fast document extraction information retrieval mutual speech tagging "
+         "the a of and in to is on for with by at it this that U.S.A. M.B.A. e.g. 2019").split()
+
+SHAPES = ('flat','nested','links','scripts')
+
+STAGES = ('parse','filter_tags','density','lemmatize','n_grams','pmi','pos')
+
+
+def make_text(rng,words):
+    """This function returns a paragraph of random words with some punctuation"""
+    out = []
+    for i in range(words):
+        word = rng.choice(WORDS)
+        if rng.random()<0.08:
+            word += rng.choice(['.',',',';',':','!'])
+        out.append(word)
+    return " ".join(out)+"."
+
+
+def make_html(shape,size,seed=0):
+    """This function returns a synthetic HTML page as bytes.
+
+    Parameters
+    ----------
+    shape : str
+        flat for many sibling paragraphs, nested for deeply nested divs, links for link heavy navigation
+        and scripts for pages with many script and style elements
+    size : int
+        The number of content blocks on the page
+    seed : int
+        The seed of the random generator, the same arguments always give the same page
+
+    """
+    rng = random.Random(seed)
+    blocks = []
+    if shape=='flat':
+        for i in range(size):
+            blocks.append("<p>{}</p>".format(make_text(rng,rng.randint(10,60))))
+        body = "".join(blocks)
+    elif shape=='nested':
+        body = ""
+        for i in range(size):
+            body = "<div><p>{}</p>{}<span>{}</span></div>".format(make_text(rng,rng.randint(10,40)),body,
+                                                                  make_text(rng,5))
+    elif shape=='links':
+        for i in range(size):
+            links = "".join("<li><a href='/page/{}'>{}</a></li>".format(rng.randint(0,10**6),make_text(rng,3))
+                            for j in range(8))
+            blocks.append("<ul>{}</ul><p>{}</p>".format(links,make_text(rng,rng.randint(10,40))))
+        body = "".join(blocks)
+    elif shape=='scripts':
+        for i in range(size):
+            script = "var x{} = {};".format(i,json.dumps([rng.random() for j in range(50)]))
+            blocks.append("<script>{}</script><style>.c{} {{color: red}}</style><p>{}</p>".format(
+                script,i,make_text(rng,rng.randint(10,40))))
+        body = "".join(blocks)
+    else:
+        raise ValueError("Unknown shape {}".format(shape))
+    return ("<html><head><title>{}</title><meta name='description' content='{}'></head>"
+            "<body>{}</body></html>").format(make_text(rng,6),make_text(rng,20),body).encode()
+
+
+def _prepare(stage,html,content):
+    """This function returns a callable that runs one stage on fresh inputs. Everything the stage needs from
+    the earlier stages is computed here, outside of the timed region
+
+    """
+    if stage=='parse':
+        return lambda: HtmlDocument.from_html(html)
+    url_text = UrlToText.from_html(html)
+    url_text._set_body()
+    if stage=='filter_tags':
+        return lambda: url_text._filter_tags(url_text._body)
+    if stage=='density':
+        url_text._filter_tags(url_text._body)
+        return url_text._get_body_content
+    text_topics = TextToTopics(content)
+    if stage=='lemmatize':
+        return text_topics._lemmatize_content
+    if stage=='n_grams':
+        return lambda: text_topics._get_n_grams(3)
+    text_topics._get_token_stream()
+    if stage=='pmi':
+        return lambda: text_topics.pim_based_topics(3,5)
+    if stage=='pos':
+        return lambda: text_topics.pos_based_topics(3,5)
+    raise ValueError("Unknown stage {}".format(stage))
+
+
+def run_stage(stage,html,content,repeat=3):
+    """This function times one stage on a page and returns a dictionary with the best time in seconds, the
+    throughput in bytes of HTML per second and the peak memory in bytes allocated by the stage. tracemalloc
+    slows every allocation down, by a different factor for every stage, so the peak memory is measured in a
+    run of its own after the timed runs
+
+    """
+    times = []
+    for i in range(repeat):
+        func = _prepare(stage,html,content)
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter()-start)
+    func = _prepare(stage,html,content)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    best = min(times)
+    return {'seconds':best,'bytes_per_second':len(html)/best if best else None,'peak_bytes':peak}
+
+
+def scaling_exponent(sizes,seconds):
+    """This function returns the slope of log(time) against log(size), fitted by least squares. About 1 means
+    the stage scales linearly with the size of the page, about 2 quadratically
+
+    """
+    points = [(math.log(s),math.log(t)) for s,t in zip(sizes,seconds) if t>0]
+    if len(points)<2:
+        return None
+    mean_x = sum(x for x,y in points)/len(points)
+    mean_y = sum(y for x,y in points)/len(points)
+    var = sum((x-mean_x)**2 for x,y in points)
+    if var==0:
+        return None
+    return sum((x-mean_x)*(y-mean_y) for x,y in points)/var
+
+
+def run(shapes,sizes,stages,repeat=3):
+    """This function runs every stage on every page and returns the results as a dictionary keyed by
+    shape, then stage. Stages that cannot run, for eg. because the NLTK data is not installed, are reported
+    with the error instead
+
+    """
+    results = {}
+    for shape in shapes:
+        results[shape] = {}
+        pages = [(size,make_html(shape,size)) for size in sizes]
+        contents = [UrlToText.from_html(html).get_total_content() for size,html in pages]
+        for stage in stages:
+            runs = []
+            try:
+                for (size,html),content in zip(pages,contents):
+                    result = run_stage(stage,html,content,repeat)
+                    result.update({'size':size,'html_bytes':len(html)})
+                    runs.append(result)
+            except LookupError as e:
+                lines = [l.strip() for l in str(e).splitlines() if l.strip() and not l.strip().startswith('*')]
+                results[shape][stage] = {'error':lines[0] if lines else 'LookupError'}
+                continue
+            results[shape][stage] = {'runs':runs,
+                                     'scaling':scaling_exponent([r['size'] for r in runs],[r['seconds'] for r in runs])}
+    return results
+
+
+def compare(results,baseline,tolerance):
+    """This function returns a list of the stages that got slower than the baseline by more than tolerance,
+    as a fraction of the baseline time
+
+    """
+    regressions = []
+    for shape,stages in results.items():
+        for stage,result in stages.items():
+            base = baseline.get(shape,{}).get(stage,{})
+            base_runs = dict((r['size'],r) for r in base.get('runs',[]))
+            for r in result.get('runs',[]):
+                b = base_runs.get(r['size'])
+                if b and r['seconds']>b['seconds']*(1+tolerance):
+                    regressions.append('{} {} size {}: {:.4f}s -> {:.4f}s'.format(shape,stage,r['size'],
+                                                                                 b['seconds'],r['seconds']))
+    return regressions
+
+
+def print_report(results,output=sys.stdout):
+    for shape,stages in results.items():
+        for stage,result in stages.items():
+            if 'error' in result:
+                output.write('{:8} {:12} skipped: {}\n'.format(shape,stage,result['error']))
+                continue
+            for r in result['runs']:
+                output.write('{:8} {:12} size {:6} {:10.4f}s {:12.0f} B/s peak {:10.0f} B\n'.format(
+                    shape,stage,r['size'],r['seconds'],r['bytes_per_second'] or 0,r['peak_bytes']))
+            if result['scaling'] is not None:
+                output.write('{:8} {:12} scaling exponent {:.2f}\n'.format(shape,stage,result['scaling']))
+
+
+if __name__== "__main__":
+    parser = argparse.ArgumentParser(description = 'Stage level benchmark of the URL to topics pipeline')
+    parser.add_argument('--shapes',nargs='+',default=list(SHAPES),choices=SHAPES,help='page shapes to generate')
+    parser.add_argument('--sizes',nargs='+',type=int,default=[25,50,100],help='number of content blocks per page')
+    parser.add_argument('--stages',nargs='+',default=list(STAGES),choices=STAGES,help='stages to time')
+    parser.add_argument('--repeat',type=int,default=3,help='runs per stage, the best time is kept')
+    parser.add_argument('--save',type=str,help='save the results as a JSON baseline')
+    parser.add_argument('--compare',type=str,help='compare against a JSON baseline and exit with status 1 on a regression')
+    parser.add_argument('--tolerance',type=float,default=0.25,help='allowed slow down against the baseline. Default = 0.25')
+    args = parser.parse_args()
+
+    results = run(args.shapes,args.sizes,args.stages,args.repeat)
+    print_report(results)
+    if args.save:
+        with open(args.save,'w') as f:
+            json.dump(results,f,indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results,json.load(f),args.tolerance)
+        for r in regressions:
+            print('REGRESSION',r)
+        if regressions:
+            sys.exit(1)
@@ -1,49 +1,140 @@
 from UrlToText import UrlToText
 from TextToTopics import TextToTopics
+from BatchExtractor import BatchExtractor
+from ResponseCache import ResponseCache
+from Profiler import Profiler
+from TopicService import TopicService
+from Lexicon import Lexicon
+from SiteCrawler import SiteCrawler
+from BoilerplateIndex import BoilerplateIndex
+from Deadline import Deadline
+from ResultCache import ResultCache
 import argparse
+import os
+import cProfile
+import sys
 
 
 parser = argparse.ArgumentParser(description = 'Topic extraction from URL')
-parser.add_argument('url',type=str,help='URL of the webpage of which the topics are to be extracted')
-parser.add_argument('--n',type=int,help='n in n-grams - specifies the number of words in the topic. OPtional. If not set then default = 3')
-parser.add_argument('--approach',type=str,help='which approach to choose to extract topics. pmi for Pointwise Mututal Information or pos for part of speech tag filtering. Optional. If not set then default = pmi')
+parser.add_argument('url',type=str,nargs='?',help='URL of the webpage of which the topics are to be extracted. Not needed with --batch or --serve')
+parser.add_argument('--n',type=int,nargs='+',help='n in n-grams - specifies the number of words in the topic. Several values can be given, for eg. --n 2 3. OPtional. If not set then default = 3')
+parser.add_argument('--approach',type=str,nargs='+',help='which approach to choose to extract topics. pmi for Pointwise Mututal Information or pos for part of speech tag filtering. Both can be given, for eg. --approach pmi pos. Optional. If not set then default = pmi')
 parser.add_argument('--number',type=int,help='number of top topics to be displayed. Optional. If not set then default = 5')
+parser.add_argument('--stream',action='store_true',help='extract the content while the page is downloaded, without building the full HTML tree. Optional')
+parser.add_argument('--max-bytes',type=int,help='maximum number of bytes downloaded in --stream mode. Optional')
+parser.add_argument('--max-nodes',type=int,help='maximum number of HTML elements processed in --stream mode. Optional')
+parser.add_argument('--batch',type=str,help='file with one URL per line, or - for stdin. The URLs are fetched concurrently and one JSON result per URL is printed as it finishes. Optional')
+parser.add_argument('--concurrency',type=int,default=8,help='maximum number of URLs fetched at the same time in --batch or --crawl mode. Optional. Default = 8')
+parser.add_argument('--processes',type=int,help='number of worker processes for the topic extraction in --batch mode. Optional. If not set then the number of CPUs')
+parser.add_argument('--cache',type=str,help='path of an on-disk cache of the downloaded webpages. Optional')
+parser.add_argument('--cache-ttl',type=float,default=3600,help='number of seconds a cached webpage is used before it is revalidated with the server. Optional. Default = 3600')
+parser.add_argument('--cache-size',type=int,default=256*1024*1024,help='maximum size in bytes of the cache. Optional. Default = 256MB')
+parser.add_argument('--cache-only',action='store_true',help='never use the network, only serve webpages from --cache. Optional')
+parser.add_argument('--profile',action='store_true',help='print a JSON breakdown of the time spent in every stage and of the counters after the topics. Optional')
+parser.add_argument('--profile-dump',type=str,help='also write a cProfile dump of the run to this file, for eg. for snakeviz or flameprof. Optional')
+parser.add_argument('--serve',type=str,help='run as a service listening on HOST:PORT, or on a Unix socket if a path is given. POST /topics with {"url": ...} or {"html": ...}. Optional')
+parser.add_argument('--workers',type=int,help='number of pre-warmed worker processes in --serve mode. Optional. If not set then the number of CPUs')
+parser.add_argument('--queue-size',type=int,default=32,help='maximum number of requests processed at the same time in --serve mode, the others get a 503. Optional. Default = 32')
+parser.add_argument('--lexicon',type=str,help='path of a precompiled lemma and part of speech lexicon built with Lexicon.py, consulted before NLTK. Optional')
+parser.add_argument('--approximate',type=int,help='count the n-grams approximately within this memory budget in MB, for very large pages. The content is then processed batch by batch without keeping its tokens. The error bounds are printed with the topics. Optional')
+parser.add_argument('--vectorised',action='store_true',help='count and rank the n-grams with NumPy array operations, if NumPy is installed. Optional')
+parser.add_argument('--crawl',action='store_true',help='crawl the site from the url, following same host links, and extract the topics of all the distinct webpages together. Near duplicate webpages are skipped. Optional')
+parser.add_argument('--max-pages',type=int,default=100,help='maximum number of webpages fetched in --crawl mode. Optional. Default = 100')
+parser.add_argument('--max-depth',type=int,default=3,help='maximum number of links followed from the url in --crawl mode. Optional. Default = 3')
+parser.add_argument('--delay',type=float,default=1.0,help='minimum number of seconds between two fetches of the same host in --crawl mode. Optional. Default = 1')
+parser.add_argument('--boilerplate',type=str,help='path of a boilerplate index of the site. Text blocks seen on more than --boilerplate-fraction of the webpages are dropped before the topic extraction. It is created if missing and updated after the run. Not with --batch. Optional')
+parser.add_argument('--boilerplate-fraction',type=float,default=0.5,help='fraction of the webpages a block must be seen on to be boilerplate. Optional. Default = 0.5')
+parser.add_argument('--parallel',type=int,help='number of worker processes a large page is sharded across for the lemmatization, tagging and counting. Optional')
+parser.add_argument('--deadline',type=float,help='number of seconds the whole extraction may take, of every URL with --batch or --serve and of the whole crawl with --crawl. The download and the processing stop when it runs out and the topics of the content processed so far are printed, marked partial. --max-bytes then also caps the download without --stream. Optional')
+parser.add_argument('--result-cache',type=str,help='path of an on-disk cache of the extracted topics and n-gram counts, keyed by the content of the webpage. Webpages with the same content as one already processed skip the NLP. Optional')
+parser.add_argument('--result-cache-size',type=int,default=64*1024*1024,help='maximum size in bytes of the result cache. Optional. Default = 64MB')
 args = parser.parse_args()
     
     
 if __name__== "__main__":
     
     url = args.url
-    n = args.n
-    approach = args.approach
+    ns = list(dict.fromkeys(args.n or [3]))
+    approaches = list(dict.fromkeys('pos' if a == 'pos' else 'pmi' for a in (args.approach or ['pmi'])))
     number = args.number
     
-    url_text = UrlToText(url)
-    total_content = url_text.get_total_content()
-    text_topics = TextToTopics(total_content)
-    
-    if not n:
-        n = 3
-        
     if not number:
         number = 5
     
-    if approach == 'pos':
-        print("Finding the topics based on part of speech filtering for {}-grams topic names and displaying top {} topics".format(n,number))
-        print(text_topics.pos_based_topics(n,number))
-    else:
-        print("Finding the topics based on pointwise mutual information for {}-grams topic names and displaying top {} topics".format(n,number))
-        print(text_topics.pim_based_topics(n,number))
-
-        
+    cache = None
+    if args.cache:
+        cache = ResponseCache(args.cache,args.cache_ttl,args.cache_size,args.cache_only)
+    elif args.cache_only:
+        parser.error('--cache-only needs --cache')
     
+    result_cache = None
+    if args.result_cache:
+        result_cache = ResultCache(args.result_cache,args.result_cache_size)
     
+    boilerplate = None
+    if args.boilerplate and args.batch:
+        parser.error('--boilerplate cannot be used with --batch, the index is of the webpages of one site')
+    elif args.boilerplate and os.path.exists(args.boilerplate):
+        boilerplate = BoilerplateIndex.load(args.boilerplate,args.boilerplate_fraction)
+    elif args.boilerplate:
+        boilerplate = BoilerplateIndex(args.boilerplate_fraction)
     
+    if args.batch:
+        batch = BatchExtractor(ns,approaches,number,args.concurrency,args.processes,args.lexicon,
+                               streaming=args.stream,max_bytes=args.max_bytes,max_nodes=args.max_nodes,cache=cache,result_cache=result_cache,
+                               deadline=args.deadline)
+        lines = sys.stdin if args.batch == '-' else open(args.batch)
+        batch.run(batch.read_urls(lines),sys.stdout)
+        sys.exit()
+    elif args.serve:
+        if '/' in args.serve:
+            address = args.serve
+        else:
+            host,port = args.serve.rsplit(':',1)
+            address = (host or '127.0.0.1',int(port))
+        service = TopicService(address,args.workers,args.queue_size,lexicon=args.lexicon,result_cache=result_cache,
+                               deadline=args.deadline,cache=cache,max_bytes=args.max_bytes)
+        print("Serving topics on {}".format(args.serve))
+        service.serve_forever()
+        sys.exit()
+    elif not url:
+        parser.error('the url argument is required without --batch or --serve')
     
-
-
-    
+    profiler = Profiler(enabled=args.profile)
+    deadline = Deadline(args.deadline,args.max_bytes) if args.deadline else None
+    if args.profile_dump:
+        cprofile = cProfile.Profile()
+        cprofile.enable()
     
+    if args.crawl:
+        crawler = SiteCrawler(url,args.max_pages,args.max_depth,args.concurrency,args.delay,profiler=profiler,boilerplate=boilerplate,
+                              deadline=deadline,cache=cache)
+        total_content = [block for page,content in crawler.crawl() for block in content]
+        print("Crawled {} webpages, skipped {} near duplicates and {} errors".format(len(crawler.pages),len(crawler.duplicates),len(crawler.errors)))
+    else:
+        url_text = UrlToText(url,streaming=args.stream,max_bytes=args.max_bytes,max_nodes=args.max_nodes,cache=cache,profiler=profiler,boilerplate=boilerplate,deadline=deadline)
+        total_content = url_text.get_total_content()
+    if boilerplate:
+        boilerplate.save(args.boilerplate)
+    lexicon = Lexicon(args.lexicon) if args.lexicon else None
+    approximate = args.approximate*1024*1024 if args.approximate else None
+    text_topics = TextToTopics(total_content,profiler,lexicon,approximate,args.vectorised,args.parallel,deadline,
+                               result_cache)
     
+    results = text_topics.topics(ns,approaches,number)
+    for (approach,n),topics in results.items():
+        if approach == 'pos':
+            print("Finding the topics based on part of speech filtering for {}-grams topic names and displaying top {} topics".format(n,number))
+        else:
+            print("Finding the topics based on pointwise mutual information for {}-grams topic names and displaying top {} topics".format(n,number))
+        print(topics)
+        if topics.partial:
+            print("The deadline was reached, the topics are from the part of the webpage processed in time")
+        if approximate:
+            print("Error bounds {}".format(text_topics.error_bounds(n)))
     
-    
\ No newline at end of file
+    if args.profile_dump:
+        cprofile.disable()
+        cprofile.dump_stats(args.profile_dump)
+    if args.profile:
+        print(profiler.to_json())
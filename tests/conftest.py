@@ -0,0 +1,151 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import random
+import pytest
+import os
+import sys
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+WORDS = ("data science machine learning model topic network neural deep graph page content text web server search "
+         "engine ranking café &amp; &lt;tag&gt; statistics").split()
+
+
+def words(rng,k):
+    return " ".join(rng.choice(WORDS) for _ in range(k))
+
+
+def random_page(seed):
+    """Returns a webpage with nested blocks, inline elements, links, comments, scripts and styles placed in the
+    middle of the text and white space only strings"""
+    rng = random.Random(seed)
+    def node(depth):
+        if depth==0 or rng.random()<0.2:
+            parts = [words(rng,rng.randint(0,12))]
+            for _ in range(rng.randint(0,4)):
+                parts.append(rng.choice(["<script>var a='<p>';</script>","<style>p{}</style>",
+                                         "<!-- c {} -->".format(words(rng,2)),"<br>","<img src=x>",
+                                         "<a href='/{}'>{}</a>".format(rng.randint(0,9),words(rng,rng.randint(1,4))),
+                                         "<b>{}</b>".format(words(rng,3)),"<span>{}</span>".format(words(rng,5)),
+                                         "<pre>  {}\n  </pre>".format(words(rng,4)),"\n  \n"]))
+                parts.append(words(rng,rng.randint(0,12)))
+            tag = rng.choice(['p','li','td','h2'])
+            return "<{0}>{1}</{0}>".format(tag," ".join(parts))
+        tag = rng.choice(['div','section','ul','article','table'])
+        children = "".join(node(depth-1) for _ in range(rng.randint(1,4)))
+        return "<{0}>{1} {2}</{0}>".format(tag,words(rng,rng.randint(0,20)),children)
+    return "<html><head><title>title</title></head><body>\n{}\n</body></html>".format(node(rng.randint(1,4)))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves the routes of the stand-in server. A route is (status, headers, body) or a function called with
+    the handler that writes the response itself"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path,dict(self.headers)))
+        route = server.routes.get(self.path)
+        if route is None:
+            route = (404,{},b'not found')
+        if callable(route):
+            route(self)
+            return
+        status,headers,body = route
+        self.send_response(status)
+        for name,value in headers.items():
+            self.send_header(name,value)
+        self.send_header('Content-Length',str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self,format,*args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def url(self,path):
+        return 'http://127.0.0.1:{}{}'.format(self.server_address[1],path)
+
+
+@pytest.fixture
+def http_server():
+    """A local HTTP server standing in for the websites. Set server.routes[path], server.requests lists the
+    (path, headers) of every request received"""
+    server = StandInServer(('127.0.0.1',0),_Handler)
+    server.routes = {}
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever,daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def nltk_available():
+    """Returns True if the NLTK tagger and WordNet data the topic extraction needs are installed"""
+    try:
+        import nltk
+        from nltk.stem.wordnet import WordNetLemmatizer
+        nltk.pos_tag(['data'])
+        WordNetLemmatizer().lemmatize('data','n')
+        return True
+    except LookupError:
+        return False
+
+
+requires_nltk = pytest.mark.skipif(not nltk_available(),reason='the NLTK tagger and WordNet data are not installed')
+
+
+def fake_tag(word):
+    """A deterministic stand-in for the part of speech tag NLTK gives a one word sentence"""
+    word = word.lower()
+    if word in ('the','a','an','and','of','in','to','is','on','for','with','by','at','it','this','that'):
+        return 'DT'
+    if any(c.isdigit() for c in word):
+        return 'CD'
+    if word.endswith('ly'):
+        return 'RB'
+    if word.endswith(('ing','ed')):
+        return 'VBG'
+    if word.endswith(('ous','al','ful','ive','ic')):
+        return 'JJ'
+    return 'NNS' if word.endswith('s') else 'NN'
+
+
+def fake_lemmatize(self,word,pos='n'):
+    """A deterministic stand-in for WordNetLemmatizer.lemmatize"""
+    if pos=='n' and word.endswith('s') and len(word)>3:
+        return word[:-1]
+    if pos=='v' and word.endswith('ing') and len(word)>5:
+        return word[:-3]
+    return word
+
+
+@pytest.fixture
+def fake_nltk(monkeypatch):
+    """Replaces the NLTK tagger and the WordNet lemmatizer with deterministic fakes, so the topic extraction
+    runs without the NLTK data. Yields the number of calls to the tagger. The worker processes of TextToTopics
+    are started again within the test, so they are forked with the fakes in place"""
+    import nltk
+    import TextToTopics
+    from nltk.stem.wordnet import WordNetLemmatizer
+    calls = {'tagger':0}
+    def pos_tag(tokens,tagset=None,lang='eng'):
+        calls['tagger'] += 1
+        return [(token,fake_tag(token)) for token in tokens]
+    def pos_tag_sents(sentences,tagset=None,lang='eng'):
+        calls['tagger'] += 1
+        return [[(token,fake_tag(token)) for token in sentence] for sentence in sentences]
+    def shutdown_pools():
+        for pool in TextToTopics._pools.values():
+            pool.shutdown()
+        TextToTopics._pools.clear()
+    shutdown_pools()
+    monkeypatch.setattr(nltk,'pos_tag',pos_tag)
+    monkeypatch.setattr(nltk,'pos_tag_sents',pos_tag_sents)
+    monkeypatch.setattr(WordNetLemmatizer,'lemmatize',fake_lemmatize)
+    yield calls
+    shutdown_pools()
@@ -0,0 +1,63 @@
+from ApproximateNgramCounter import ApproximateNgramCounter, CountMinSketch, SpaceSaving
+from NgramCounter import NgramCounter
+import random
+import pytest
+
+
+def random_ngrams(seed,number=20000,vocabulary=300,n=2):
+    """Returns n-grams with a skewed distribution: a few frequent ones and a long tail seen once or twice"""
+    rng = random.Random(seed)
+    tokens = ['w{}'.format(int(vocabulary*rng.random()**3)) for _ in range(number+n)]
+    return [tuple(tokens[i:i+n]) for i in range(number)]
+
+
+def count(ngrams,counter):
+    counter.update(ngrams)
+    return counter
+
+
+@pytest.mark.parametrize('seed',range(3))
+def test_only_ngrams_surely_above_the_threshold_are_scored(seed):
+    ngrams = random_ngrams(seed)
+    exact = count(ngrams,NgramCounter(2))
+    approximate = count(ngrams,ApproximateNgramCounter(2,memory=64*1024))
+    assert approximate.bounds()['ngram_count_error']>0
+    for ngram,score in approximate.pmi_scores():
+        assert exact.ngram_counts[ngram]>2
+
+
+@pytest.mark.parametrize('seed',range(3))
+def test_counts_are_exact_within_a_large_budget(seed):
+    ngrams = random_ngrams(seed,5000)
+    exact = count(ngrams,NgramCounter(2))
+    approximate = count(ngrams,ApproximateNgramCounter(2,memory=64*1024*1024))
+    assert approximate.bounds()['ngram_count_error']==0
+    assert dict(approximate.ngram_counts)==dict(exact.ngram_counts)
+    expected = dict(exact.pmi_scores())
+    found = dict(approximate.pmi_scores())
+    assert found.keys()==expected.keys()
+    for ngram,score in expected.items():
+        assert found[ngram]>=score-1e-9
+    accuracy = approximate.check_accuracy(exact,10)
+    assert accuracy['frequency_recall']==1.0 and accuracy['max_ngram_count_error']==0
+
+
+def test_space_saving_bounds_the_overestimate():
+    rng = random.Random(0)
+    keys = [int(50*rng.random()**2) for _ in range(5000)]
+    space_saving = SpaceSaving(10)
+    for key in keys:
+        space_saving.add(key)
+    for key,estimate in space_saving.counts.items():
+        true = keys.count(key)
+        assert estimate-space_saving.errors[key]<=true<=estimate
+
+
+def test_count_min_sketch_never_underestimates():
+    rng = random.Random(0)
+    keys = [rng.randint(0,1000) for _ in range(5000)]
+    sketch = CountMinSketch(256)
+    for key in keys:
+        sketch.add(key)
+    for key in set(keys):
+        assert sketch.estimate(key)>=keys.count(key)
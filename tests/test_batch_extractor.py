@@ -0,0 +1,86 @@
+from BatchExtractor import BatchExtractor
+from conftest import requires_nltk
+from test_response_cache import trickle_route
+from test_topic_service import SLOW_PAGE
+import json
+import time
+import io
+
+PAGE = ("<html><head><title>Graph search</title></head><body><div><p>{}</p></div></body></html>".format(
+        "Graph search engines rank pages. Machine learning models rank graph search results. "*20)).encode()
+
+
+@requires_nltk
+def test_batch_writes_one_result_per_url_and_combination(http_server):
+    for i in range(4):
+        http_server.routes['/page{}'.format(i)] = (200,{'Content-Type':'text/html'},PAGE)
+    urls = [http_server.url('/page{}'.format(i)) for i in range(4)]+[http_server.url('/missing')]
+    output = io.StringIO()
+    BatchExtractor([2,3],['pmi','pos'],5,concurrency=3,processes=2).run(urls,output)
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(results)==5*4
+    assert sorted(set(r['url'] for r in results))==sorted(urls)
+    assert all('error' in r for r in results if r['url'].endswith('/missing'))
+    assert all(r['topics'] for r in results if not r['url'].endswith('/missing') and r['approach']=='pmi')
+
+
+def test_worker_processes_start_before_the_fetching_threads(monkeypatch):
+    started = []
+    def process_url(self,url,session,pool):
+        started.append(len(pool._processes))
+        return [{'url':url}]
+    monkeypatch.setattr(BatchExtractor,'_process_url',process_url)
+    BatchExtractor(processes=2).run(['a','b'],io.StringIO())
+    assert started==[2,2]
+
+
+class TimedOutput:
+    """Records the time every line is written at"""
+
+    def __init__(self):
+        self.start = time.monotonic()
+        self.lines = []
+
+    def write(self,data):
+        for line in data.splitlines():
+            self.lines.append((json.loads(line)['url'],time.monotonic()-self.start))
+
+    def flush(self):
+        pass
+
+
+def sleeping_process_url(self,url,session,pool):
+    time.sleep(float(url))
+    return [{'url':url}]
+
+
+def test_results_are_written_as_the_urls_finish(monkeypatch):
+    monkeypatch.setattr(BatchExtractor,'_process_url',sleeping_process_url)
+    output = TimedOutput()
+    BatchExtractor(concurrency=4,processes=1).run(['0.2','2'],output)
+    assert [url for url,at in output.lines]==['0.2','2']
+    assert output.lines[0][1]<1.0 and output.lines[1][1]>=1.9
+
+
+def test_results_are_not_held_back_by_a_slow_input(monkeypatch):
+    monkeypatch.setattr(BatchExtractor,'_process_url',sleeping_process_url)
+    def urls():
+        yield '0.1'
+        time.sleep(1.5)
+        yield '0'
+    output = TimedOutput()
+    BatchExtractor(concurrency=4,processes=1).run(urls(),output)
+    assert output.lines[0][0]=='0.1' and output.lines[0][1]<1.0
+
+
+def test_every_url_gets_its_own_deadline(http_server,fake_nltk):
+    http_server.routes['/slow'] = trickle_route(SLOW_PAGE,0.05)
+    http_server.routes['/fast'] = (200,{'Content-Type':'text/html'},PAGE)
+    output = io.StringIO()
+    start = time.monotonic()
+    BatchExtractor([2],['pmi'],5,concurrency=1,processes=1,deadline=0.5).run(
+        [http_server.url('/slow'),http_server.url('/slow'),http_server.url('/fast')],output)
+    assert time.monotonic()-start<3
+    results = dict((r['url'],r) for r in map(json.loads,output.getvalue().splitlines()))
+    assert results[http_server.url('/slow')]['partial']
+    assert not results[http_server.url('/fast')]['partial'] and results[http_server.url('/fast')]['topics']
@@ -0,0 +1,25 @@
+import benchmark
+import tracemalloc
+
+
+def test_stages_are_timed_without_tracemalloc(monkeypatch):
+    traced = []
+    def prepare(stage,html,content):
+        return lambda: traced.append(tracemalloc.is_tracing())
+    monkeypatch.setattr(benchmark,'_prepare',prepare)
+    result = benchmark.run_stage('parse',b'<html></html>',[],repeat=3)
+    assert traced==[False,False,False,True]
+    assert result['seconds']>=0 and result['peak_bytes']>=0
+    assert not tracemalloc.is_tracing()
+
+
+def test_parse_and_density_stages_run_offline():
+    results = benchmark.run(['flat','nested'],[5,10],['parse','filter_tags','density'],repeat=1)
+    for shape in ('flat','nested'):
+        for stage in ('parse','filter_tags','density'):
+            assert [r['size'] for r in results[shape][stage]['runs']]==[5,10]
+
+
+def test_pages_are_deterministic():
+    for shape in benchmark.SHAPES:
+        assert benchmark.make_html(shape,5,seed=1)==benchmark.make_html(shape,5,seed=1)
@@ -0,0 +1,74 @@
+from BoilerplateIndex import BoilerplateIndex
+from UrlToText import UrlToText
+import pytest
+
+def page(i):
+    return ("<html><head><title>Welcome to the example site</title></head><body>"
+            "<p>This is the content of page number {} which is long enough to be kept</p></body></html>").format(i)
+
+
+def blocks(i):
+    return ['Welcome to the example site','Content of page {}'.format(i)]
+
+
+def test_the_same_page_is_counted_once():
+    index = BoilerplateIndex(min_pages=3)
+    for _ in range(5):
+        assert index.process(blocks(0),'http://example.com/')==blocks(0)
+    assert index.pages==1
+    for _ in range(5):
+        index.process(blocks(0))
+    assert index.pages==2
+    assert not index.is_boilerplate('Welcome to the example site')
+
+
+def test_distinct_pages_make_boilerplate():
+    index = BoilerplateIndex(min_pages=3)
+    for i in range(3):
+        index.add_page(blocks(i),'http://example.com/{}'.format(i))
+    assert index.pages==3
+    assert index.process(blocks(3),'http://example.com/3')==['Content of page 3']
+
+
+def test_the_same_url_extracted_again():
+    index = BoilerplateIndex(min_pages=2)
+    for _ in range(5):
+        content = UrlToText('http://example.com/a',UrlToText.from_html(page(0))._document,boilerplate=index).get_total_content()
+    assert index.pages==1
+    assert any('Welcome' in block for block in content)
+    UrlToText('http://EXAMPLE.com:80/a#top',UrlToText.from_html(page(0))._document,boilerplate=index).get_total_content()
+    assert index.pages==1
+    content = UrlToText('http://example.com/b',UrlToText.from_html(page(1))._document,boilerplate=index).get_total_content()
+    assert index.pages==2
+    assert not any('Welcome' in block for block in content)
+
+
+def test_save_and_load(tmp_path):
+    index = BoilerplateIndex(min_pages=1)
+    for i in range(3):
+        index.add_page(blocks(i),'http://example.com/{}'.format(i))
+    path = str(tmp_path/'index')
+    index.save(path)
+    loaded = BoilerplateIndex.load(path,min_pages=1)
+    assert loaded.pages==3 and loaded.counts==index.counts and loaded.seen==index.seen
+    loaded.add_page(blocks(0),'http://example.com/0')
+    assert loaded.pages==3
+
+
+def test_the_pages_counted_are_bounded(tmp_path):
+    index = BoilerplateIndex(min_pages=1,max_blocks=8)
+    for i in range(20):
+        index.add_page(blocks(0),'http://example.com/{}'.format(i))
+    assert index.pages==20 and len(index.seen)<=8
+    index.add_page(blocks(0),'http://example.com/19')
+    assert index.pages==20
+    path = str(tmp_path/'index')
+    index.save(path)
+    assert list(BoilerplateIndex.load(path,max_blocks=8).seen)==list(index.seen)
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path/'index'
+    path.write_bytes(b'nope'+bytes(24))
+    with pytest.raises(ValueError):
+        BoilerplateIndex.load(str(path))
@@ -0,0 +1,80 @@
+from Lexicon import Lexicon, tag_to_pos
+from TextToTopics import TextToTopics
+from test_text_to_topics import random_content
+from conftest import fake_tag
+import random
+import pytest
+
+pytestmark = pytest.mark.usefixtures('fake_nltk')
+
+WORDS = ['data','Data','statistics','neural','learning','quickly','the','2019','café','caféine','zèbre','日本',
+         'Ünïcode','a','é','z']
+
+
+@pytest.fixture
+def lexicon(tmp_path):
+    path = str(tmp_path/'lexicon')
+    Lexicon.build(WORDS+['data',''],path)
+    lexicon = Lexicon(path,cache_size=3)
+    yield lexicon
+    lexicon.close()
+
+
+def test_build_and_lookup(lexicon):
+    assert len(lexicon)==len(WORDS)
+    for word in WORDS:
+        assert lexicon.lookup(word)[0]==fake_tag(word)
+        assert word in lexicon
+    assert lexicon.lookup('statistics')==('NNS','statistic')
+    assert lexicon.lookup('learning')==('VBG','learn')
+    assert lexicon.lookup('Data')==('NN','data')
+    for word in ['','b','cafe','datas','日','zz','ÿ']:
+        assert lexicon.lookup(word) is None and word not in lexicon
+
+
+def test_analyse_uses_the_file_then_the_cache(lexicon,fake_nltk):
+    calls = fake_nltk['tagger']
+    result = lexicon.analyse(['data','graphs','data','nets'])
+    assert result=={'data':('NN','data'),'graphs':('NNS','graph'),'nets':('NNS','net')}
+    assert (lexicon.hits,lexicon.misses)==(1,2)
+    assert fake_nltk['tagger']==calls+1
+    assert lexicon.analyse(['graphs'])=={'graphs':('NNS','graph')}
+    assert (lexicon.hits,lexicon.misses)==(2,2)
+    assert fake_nltk['tagger']==calls+1
+
+
+def test_cache_evicts_the_least_recently_used(lexicon):
+    lexicon.analyse(['w1','w2','w3'])
+    lexicon.analyse(['w1'])
+    lexicon.analyse(['w4'])
+    assert list(lexicon._cache)==['w3','w1','w4']
+    misses = lexicon.misses
+    lexicon.analyse(['w2'])
+    assert lexicon.misses==misses+1
+    assert len(lexicon._cache)==3
+
+
+def test_not_a_lexicon(tmp_path):
+    path = tmp_path/'other'
+    path.write_bytes(b'NOPE'+bytes(8))
+    with pytest.raises(ValueError):
+        Lexicon(str(path))
+
+
+@pytest.mark.parametrize('seed',range(3))
+def test_text_to_topics_with_a_lexicon(seed,tmp_path):
+    content = random_content(seed,30)
+    vocabulary = sorted(set(w for statement in content for w in statement.split()))
+    path = str(tmp_path/'lexicon')
+    Lexicon.build(random.Random(seed).sample(vocabulary,len(vocabulary)//2),path)
+    plain = TextToTopics(content)
+    with_lexicon = TextToTopics(content,lexicon=Lexicon(path))
+    expected = plain.topics([2,3],['pmi','pos'],5)
+    assert with_lexicon.topics([2,3],['pmi','pos'],5)==expected
+    assert with_lexicon._tags==plain._tags
+    assert all(with_lexicon._lemmas[key]==lemma for key,lemma in plain._lemmas.items())
+    assert with_lexicon._lexicon.hits>0 and with_lexicon._lexicon.misses>0
+
+
+def test_tag_to_pos():
+    assert [tag_to_pos(t) for t in ['NN','VBG','RB','JJ','S','DT']]==['n','v','r','a','s','n']
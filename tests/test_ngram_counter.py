@@ -0,0 +1,141 @@
+from NgramCounter import NgramCounter
+from collections import Counter
+import random
+import math
+import pytest
+
+
+def legacy_pmi(ngrams,number=None):
+    """The PMI ranking as TextToTopics computed it before NgramCounter, rescanning all the n-grams for every
+    n-gram"""
+    counter = Counter()
+    for value in ngrams:
+        counts = [0 for v in value] + [0]
+        total = len(ngrams)
+        for v in ngrams:
+            if v == value:
+                counts[-1] +=1
+            for i in range(len(v)):
+                if v[i] == value[i]:
+                    counts[i] += 1
+        if(counts[-1]>2):
+            p_all = counts[-1]/total
+            p_other = 1
+            for c in counts[:-1]:
+                p_other = p_other * c/total
+            pmi = math.log(p_all/p_other)
+            topic = " ".join(value)
+            counter.update({topic:pmi})
+    if number:
+        return(counter.most_common(number))
+    else:
+        return(counter.most_common())
+
+
+def random_ngrams(seed,n,number=200,vocabulary=6):
+    rng = random.Random(seed)
+    tokens = ['w{}'.format(rng.randrange(vocabulary)) for _ in range(number+n)]
+    return [tokens[i:i+n] for i in range(number)]
+
+
+def ranking(counter,number=None):
+    return [(" ".join(ngram),score) for ngram,score in counter.most_common_pmi(number)]
+
+
+@pytest.mark.parametrize('seed',range(10))
+@pytest.mark.parametrize('n',[1,2,3])
+@pytest.mark.parametrize('number',[None,1,3,5])
+def test_pmi_matches_the_legacy_loop(seed,n,number):
+    ngrams = random_ngrams(seed,n)
+    counter = NgramCounter(n)
+    counter.update(ngrams)
+    assert ranking(counter,number)==legacy_pmi(ngrams,number)
+
+
+def test_pmi_threshold_and_ties():
+    ngrams = [['a','b']]*3+[['c','d']]*3+[['e','f']]*2+[['a','d']]*3
+    counter = NgramCounter(2)
+    counter.update(ngrams)
+    assert [g for g,s in ranking(counter)]==[g for g,s in legacy_pmi(ngrams)]
+    assert 'e f' not in dict(ranking(counter))
+    assert ranking(counter,1)==legacy_pmi(ngrams,1)==[('a b',ranking(counter)[0][1])]
+
+
+def test_score_is_added_once_per_occurrence():
+    ngrams = [['a','b']]*4+[['c','d']]*5
+    counter = NgramCounter(2)
+    counter.update(ngrams)
+    scores = dict(counter.pmi_scores())
+    assert scores[('a','b')]==sum([math.log((4/9)/((4/9)*(4/9)))]*4)
+    assert ranking(counter)==legacy_pmi(ngrams)
+
+
+def test_empty():
+    assert NgramCounter(3).most_common_pmi(5)==[]==legacy_pmi([],5)
+
+
+def word_counter(seed,n=3):
+    counter = NgramCounter(n)
+    counter.update(random_ngrams(seed,n))
+    counter.update([['café','日本','x'][:n]]*3)
+    return counter
+
+
+def assert_same(a,b):
+    assert a.n==b.n and a.total==b.total
+    assert list(a.ngram_counts.items())==list(b.ngram_counts.items())
+    assert [list(p.items()) for p in a.position_counts]==[list(p.items()) for p in b.position_counts]
+
+
+@pytest.mark.parametrize('n',[1,2,3])
+def test_bytes_round_trip(n):
+    counter = word_counter(0,n)
+    assert_same(NgramCounter.from_bytes(counter.to_bytes()),counter)
+    assert_same(NgramCounter.from_bytes(NgramCounter(n).to_bytes()),NgramCounter(n))
+
+
+def test_save_and_load(tmp_path):
+    counter = word_counter(1)
+    counter.save(str(tmp_path/'counts'))
+    loaded = NgramCounter.load(str(tmp_path/'counts'))
+    assert_same(loaded,counter)
+    assert loaded.most_common_pmi(5)==counter.most_common_pmi(5)
+
+
+def test_from_bytes_rejects_other_data():
+    with pytest.raises(ValueError):
+        NgramCounter.from_bytes(b'XXXX'+bytes(12))
+
+
+def test_only_string_tokens_are_serialised():
+    counter = NgramCounter(2)
+    counter.update([(1,2)])
+    with pytest.raises(TypeError):
+        counter.to_bytes()
+
+
+def test_merge_equals_counting_everything():
+    first,second = random_ngrams(2,3),random_ngrams(3,3)
+    merged = NgramCounter(3)
+    merged.update(first)
+    other = NgramCounter(3)
+    other.update(second)
+    assert merged.merge(other) is merged
+    expected = NgramCounter(3)
+    expected.update(first+second)
+    assert_same(merged,expected)
+
+
+def test_merge_of_a_different_n():
+    with pytest.raises(ValueError):
+        NgramCounter(2).merge(NgramCounter(3))
+
+
+def test_map_tokens():
+    ids = NgramCounter(2)
+    ids.update([(0,1),(1,2),(0,1)])
+    words = ids.map_tokens(['a','b','c'].__getitem__)
+    expected = NgramCounter(2)
+    expected.update([('a','b'),('b','c'),('a','b')])
+    assert_same(words,expected)
+    assert_same(NgramCounter.from_bytes(words.to_bytes()),expected)
@@ -0,0 +1,45 @@
+from NumpyScorer import NumpyScorer
+from NgramCounter import NgramCounter
+import random
+import pytest
+
+pytestmark = pytest.mark.skipif(not NumpyScorer.available,reason='NumPy is not installed')
+
+
+def random_statements(seed,number=40,vocabulary=12):
+    rng = random.Random(seed)
+    return [[rng.randrange(vocabulary) for _ in range(rng.randint(0,12))] for _ in range(number)]
+
+
+def scorer(statements,n,vocabulary_size=12):
+    ids,ends = [],[]
+    for statement in statements:
+        ids.extend(statement)
+        ends.append(len(ids))
+    return NumpyScorer(ids,ends,n,vocabulary_size)
+
+
+@pytest.mark.parametrize('statements',[[],[[]],[[1,2]],[[1,2,3],[4]]])
+def test_no_n_grams(statements):
+    empty = scorer(statements,3)
+    assert empty.total==0 and empty.ngrams.shape==(0,3)
+    assert empty.most_common_pmi(5)==[]
+    assert empty.most_common_frequency(5)==[]
+    assert empty.most_common_frequency(5,empty.counts>0)==[]
+
+
+@pytest.mark.parametrize('seed',range(5))
+def test_counts_match_ngram_counter(seed):
+    statements = random_statements(seed)
+    for n in (2,3):
+        counter = NgramCounter(n)
+        for statement in statements:
+            if len(statement)>n:
+                counter.update(tuple(statement[i:i+n]) for i in range(len(statement)-n+1))
+        vectorised = scorer(statements,n)
+        assert vectorised.total==counter.total
+        assert [(tuple(g),c) for g,c in zip(vectorised.ngrams.tolist(),vectorised.counts.tolist())]==list(counter.ngram_counts.items())
+        expected = counter.most_common_pmi(5)
+        found = vectorised.most_common_pmi(5)
+        assert [g for g,s in found]==[g for g,s in expected]
+        assert [s for g,s in found]==pytest.approx([s for g,s in expected])
@@ -0,0 +1,61 @@
+from Profiler import Profiler, DISABLED
+from UrlToText import UrlToText
+from TextToTopics import TextToTopics
+import json
+import pytest
+
+PAGE = ("<html><head><title>Graph search</title><meta name='description' content='graph search engines'></head>"
+        "<body><div><p>{}</p></div><ul><li><a href='/'>home</a></li></ul></body></html>").format(
+        "Graph search engines rank pages quickly. Machine learning models rank graph search results. "*10)
+
+
+def test_stages_counters_and_hooks():
+    seen = []
+    profiler = Profiler()
+    profiler.add_hook(lambda kind,name,value: seen.append((kind,name,value)))
+    with profiler.stage('outer'):
+        with profiler.stage('inner'):
+            pass
+        profiler.count('things')
+        profiler.count('things',4)
+    with profiler.stage('inner'):
+        pass
+    assert profiler.stages['inner']['calls']==2 and profiler.stages['outer']['calls']==1
+    assert profiler.stages['outer']['seconds']>=0
+    assert profiler.counters=={'things':5}
+    assert [(kind,name) for kind,name,value in seen]==[('stage','inner'),('counter','things'),('counter','things'),
+                                                       ('stage','outer'),('stage','inner')]
+    assert [value for kind,name,value in seen if kind=='counter']==[1,4]
+    assert json.loads(profiler.to_json())==profiler.report()
+
+
+def test_disabled_records_nothing():
+    seen = []
+    profiler = Profiler(enabled=False,hooks=[lambda *args: seen.append(args)])
+    with profiler.stage('stage'):
+        profiler.count('counter')
+    assert profiler.report()=={'stages':{},'counters':{}} and seen==[]
+    assert DISABLED.report()=={'stages':{},'counters':{}}
+
+
+def test_stage_is_recorded_when_it_raises():
+    profiler = Profiler()
+    with pytest.raises(KeyError):
+        with profiler.stage('failing'):
+            raise KeyError()
+    assert profiler.stages['failing']['calls']==1
+
+
+def test_pipeline_reports_its_stages_and_counters(fake_nltk):
+    seen = []
+    profiler = Profiler(hooks=[lambda kind,name,value: seen.append((kind,name))])
+    content = UrlToText.from_html(PAGE,profiler=profiler).get_total_content()
+    TextToTopics(content,profiler).topics([2,3],['pmi','pos'],5)
+    for stage in ['parse','filter_tags','density','meta_title','lemmatize','tag','tokenize','count','pmi']:
+        assert profiler.stages[stage]['calls']>=1,stage
+    counters = profiler.counters
+    assert counters['blocks_kept']==1 and counters['dom_nodes']>=4
+    assert counters['tokens']==sum(len(statement.split()) for statement in content)
+    assert counters['tagger_calls']==fake_nltk['tagger']
+    assert counters['lemmatizer_cache_hits']>0
+    assert ('stage','parse') in seen and ('counter','tokens') in seen and ('counter','tagger_calls') in seen
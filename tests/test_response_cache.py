@@ -0,0 +1,145 @@
+from ResponseCache import ResponseCache, normalise_url
+from UrlToText import UrlToText
+from Deadline import Deadline
+import pytest
+import time
+
+
+def etag_route(body,etag='"v1"'):
+    """Returns a route that answers 304 Not Modified to a request with a matching If-None-Match"""
+    def route(handler):
+        if handler.headers.get('If-None-Match')==etag:
+            handler.send_response(304)
+            handler.send_header('ETag',etag)
+            handler.end_headers()
+            return
+        handler.send_response(200)
+        handler.send_header('Content-Type','text/html; charset=utf-8')
+        handler.send_header('ETag',etag)
+        handler.send_header('Content-Length',str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+    return route
+
+
+def test_normalise_url():
+    assert normalise_url('HTTP://Example.COM:80?b=2&a=1#top')=='http://example.com/?a=1&b=2'
+    assert normalise_url('https://example.com:8443/x')=='https://example.com:8443/x'
+
+
+def test_fresh_response_is_served_without_a_request(http_server,tmp_path):
+    http_server.routes['/page'] = etag_route(b'<html>page</html>')
+    cache = ResponseCache(str(tmp_path/'cache.db'),ttl=3600)
+    first = cache.get(http_server.url('/page'))
+    second = cache.get(http_server.url('/page#fragment'))
+    assert first.content==second.content==b'<html>page</html>'
+    assert second.encoding=='utf-8'
+    assert len(http_server.requests)==1
+
+
+def test_stale_response_is_revalidated_and_served_on_304(http_server,tmp_path):
+    http_server.routes['/page'] = etag_route(b'<html>page</html>')
+    cache = ResponseCache(str(tmp_path/'cache.db'),ttl=0)
+    cache.get(http_server.url('/page'))
+    response = cache.get(http_server.url('/page'))
+    assert response.status_code==200 and response.content==b'<html>page</html>'
+    assert len(http_server.requests)==2
+    assert http_server.requests[1][1].get('If-None-Match')=='"v1"'
+
+
+def test_stale_response_is_replaced_when_modified(http_server,tmp_path):
+    http_server.routes['/page'] = etag_route(b'old','"v1"')
+    cache = ResponseCache(str(tmp_path/'cache.db'),ttl=0)
+    cache.get(http_server.url('/page'))
+    http_server.routes['/page'] = etag_route(b'new','"v2"')
+    assert cache.get(http_server.url('/page')).content==b'new'
+    cache.ttl = 3600
+    assert cache.get(http_server.url('/page')).content==b'new'
+    assert len(http_server.requests)==2
+
+
+def test_errors_are_not_cached(http_server,tmp_path):
+    cache = ResponseCache(str(tmp_path/'cache.db'))
+    assert cache.get(http_server.url('/missing')).status_code==404
+    assert cache.get(http_server.url('/missing')).status_code==404
+    assert len(http_server.requests)==2
+
+
+def test_least_recently_used_responses_are_evicted(http_server,tmp_path):
+    for name in 'abc':
+        http_server.routes['/'+name] = (200,{},name.encode()*100)
+    cache = ResponseCache(str(tmp_path/'cache.db'),max_size=250)
+    cache.get(http_server.url('/a'))
+    time.sleep(0.01)
+    cache.get(http_server.url('/b'))
+    time.sleep(0.01)
+    cache.get(http_server.url('/a'))
+    time.sleep(0.01)
+    cache.get(http_server.url('/c'))
+    offline = ResponseCache(cache.path,offline=True)
+    assert offline.get(http_server.url('/a')).content==b'a'*100
+    assert offline.get(http_server.url('/c')).content==b'c'*100
+    with pytest.raises(Exception):
+        offline.get(http_server.url('/b'))
+
+
+def test_offline_mode_serves_stale_responses_and_never_uses_the_network(http_server,tmp_path):
+    http_server.routes['/page'] = etag_route(b'page')
+    cache = ResponseCache(str(tmp_path/'cache.db'),ttl=0)
+    cache.get(http_server.url('/page'))
+    offline = ResponseCache(cache.path,ttl=0,offline=True)
+    assert offline.get(http_server.url('/page')).content==b'page'
+    with pytest.raises(Exception,match='not in the cache'):
+        offline.get(http_server.url('/other'))
+    assert len(http_server.requests)==1
+
+
+def trickle_route(chunks,delay):
+    """Returns a route that sends the chunks of the body delay seconds apart"""
+    def route(handler):
+        handler.send_response(200)
+        handler.send_header('Content-Type','text/html; charset=utf-8')
+        handler.send_header('Content-Length',str(sum(len(chunk) for chunk in chunks)))
+        handler.end_headers()
+        for chunk in chunks:
+            handler.wfile.write(chunk)
+            handler.wfile.flush()
+            time.sleep(delay)
+    return route
+
+
+PAGE = (b'<html><head><title>Cached page</title></head><body><p>'+b'The body of the cached page is long enough. '*4+
+        b'</p></body></html>')
+
+
+@pytest.mark.parametrize('streaming',[False,True])
+def test_cache_miss_within_a_deadline(http_server,tmp_path,streaming):
+    http_server.routes['/page'] = etag_route(PAGE)
+    cache = ResponseCache(str(tmp_path/'cache.db'))
+    for _ in range(2):
+        deadline = Deadline(10)
+        content = UrlToText(http_server.url('/page'),streaming=streaming,cache=cache,deadline=deadline).get_total_content()
+        assert 'Cached page' in content and any('cached page is long enough' in block for block in content)
+        assert not deadline.partial
+    assert len(http_server.requests)==1
+
+
+def test_cache_miss_is_cut_by_the_deadline_and_not_cached(http_server,tmp_path):
+    http_server.routes['/slow'] = trickle_route([b'<html><body>']+[b'<p>slow</p>']*20,0.1)
+    cache = ResponseCache(str(tmp_path/'cache.db'))
+    deadline = Deadline(0.5)
+    start = time.monotonic()
+    response = cache.get(http_server.url('/slow'),deadline=deadline)
+    assert time.monotonic()-start<1.5
+    assert deadline.partial and 0<len(response.content)<12+20*11
+    assert cache._lookup(normalise_url(http_server.url('/slow'))) is None
+
+
+def test_cache_miss_is_cut_by_max_bytes_and_not_cached(http_server,tmp_path):
+    http_server.routes['/page'] = etag_route(PAGE)
+    cache = ResponseCache(str(tmp_path/'cache.db'))
+    deadline = Deadline(10,max_bytes=20)
+    response = cache.get(http_server.url('/page'),deadline=deadline)
+    assert response.content==PAGE[:20] and deadline.partial and deadline.bytes_read==20
+    assert list(deadline.read(response))==[PAGE[:20]] and deadline.bytes_read==20
+    assert cache._lookup(normalise_url(http_server.url('/page'))) is None
@@ -0,0 +1,105 @@
+from ResultCache import ResultCache
+from TextToTopics import TextToTopics
+from NgramCounter import NgramCounter
+from Deadline import Deadline
+from test_text_to_topics import random_content
+from concurrent.futures import ProcessPoolExecutor
+import sqlite3
+import pytest
+
+pytestmark = pytest.mark.usefixtures('fake_nltk')
+
+
+def keys(cache):
+    with sqlite3.connect(cache.path) as db:
+        return sorted(key for key, in db.execute('SELECT key FROM results'))
+
+
+def test_content_key():
+    assert ResultCache.content_key(['ab','c'])!=ResultCache.content_key(['a','bc'])
+    assert ResultCache.content_key(['ab','c'])==ResultCache.content_key(('ab','c'))
+
+
+def test_unknown_kind(tmp_path):
+    with pytest.raises(ValueError):
+        ResultCache(str(tmp_path/'cache.db'),store=('pages',))
+
+
+def test_a_hit_skips_the_nlp(tmp_path,fake_nltk):
+    content = random_content(0)
+    expected = TextToTopics(content).topics([2,3],['pmi','pos'],5)
+    cache = ResultCache(str(tmp_path/'cache.db'))
+    assert TextToTopics(content,cache=cache).topics([2,3],['pmi','pos'],5)==expected
+    calls = fake_nltk['tagger']
+    cached = TextToTopics(content,cache=cache)
+    assert cached.topics([2,3],['pmi','pos'],5)==expected
+    assert fake_nltk['tagger']==calls
+    assert cached._lemmas=={} and cached._token_stream is None
+
+
+@pytest.mark.parametrize('vectorised',[False,True])
+def test_counts_rank_other_numbers_and_approaches(tmp_path,fake_nltk,vectorised):
+    content = random_content(1)
+    cache = ResultCache(str(tmp_path/'cache.db'),store=('counts',))
+    TextToTopics(content,cache=cache).topics([2,3],['pmi'],5)
+    for approaches,number in [(['pmi'],3),(['pos'],5),(['pmi','pos'],None)]:
+        expected = TextToTopics(content).topics([2,3],approaches,number)
+        calls = fake_nltk['tagger']
+        cached = TextToTopics(content,vectorised=vectorised,cache=cache)
+        assert cached.topics([2,3],approaches,number)==expected
+        assert fake_nltk['tagger']==calls and cached._lemmas=={}
+
+
+def test_counts_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path/'cache.db'))
+    counter = NgramCounter(2)
+    counter.update([('graph','search'),('search','engine'),('graph','search')])
+    cache.put_counts('k',2,counter,{'graph':'NN','search':'NN','engine':'NN'})
+    loaded,tags = cache.get_counts('k',2)
+    assert list(loaded.ngram_counts.items())==list(counter.ngram_counts.items())
+    assert tags=={'graph':'NN','search':'NN','engine':'NN'}
+    assert cache.get_counts('k',3) is None and cache.get_topics('k','pmi',2,5) is None
+
+
+def test_least_recently_used_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path/'cache.db'),max_size=1000)
+    topics = [('topic {}'.format(i),float(i)) for i in range(20)]
+    for i in range(10):
+        cache.put_topics('key{}'.format(i),'pmi',3,5,topics)
+        assert cache.get_topics('key0','pmi',3,5)==topics
+    with sqlite3.connect(cache.path) as db:
+        assert db.execute('SELECT SUM(size) FROM results').fetchone()[0]<=1000
+    assert cache.get_topics('key0','pmi',3,5)==topics
+    assert cache.get_topics('key9','pmi',3,5)==topics
+    assert cache.get_topics('key1','pmi',3,5) is None
+
+
+def test_results_cut_short_are_not_stored(tmp_path):
+    cache = ResultCache(str(tmp_path/'cache.db'))
+    text_topics = TextToTopics(random_content(2),deadline=Deadline(0),cache=cache)
+    results = text_topics.topics([2,3],['pmi','pos'],5)
+    assert all(topics.partial for topics in results.values())
+    assert keys(cache)==[]
+
+
+def write_entries(path,worker):
+    cache = ResultCache(path)
+    counter = NgramCounter(2)
+    counter.update([('w{}'.format(worker),'x')]*3)
+    for i in range(25):
+        cache.put_topics('key{}'.format(i),'pmi',2,worker,[('topic {}'.format(worker),float(i))])
+        cache.put_counts('key{}:{}'.format(worker,i),2,counter,{'w{}'.format(worker):'NN','x':'NN'})
+        assert cache.get_topics('key{}'.format(i),'pmi',2,worker)==[('topic {}'.format(worker),float(i))]
+    return worker
+
+
+def test_concurrent_writes_from_several_processes(tmp_path):
+    path = str(tmp_path/'cache.db')
+    cache = ResultCache(path)
+    with ProcessPoolExecutor(4) as pool:
+        assert sorted(pool.map(write_entries,[path]*4,range(4)))==[0,1,2,3]
+    assert len(keys(cache))==4*25*2
+    for worker in range(4):
+        assert cache.get_topics('key24','pmi',2,worker)==[('topic {}'.format(worker),24.0)]
+        counter,tags = cache.get_counts('key{}:0'.format(worker),2)
+        assert counter.ngram_counts[('w{}'.format(worker),'x')]==3
@@ -0,0 +1,123 @@
+from SiteCrawler import SiteCrawler, simhash
+from Deadline import Deadline
+from conftest import words
+import random
+import time
+
+
+def page(seed,links=()):
+    """Returns a webpage with a paragraph of random words, distinct for every seed, and links to the paths"""
+    rng = random.Random(seed)
+    anchors = "".join("<li><a href='{}'>link</a></li>".format(link) for link in links)
+    return ("<html><head><title>Page {}</title></head><body><p>{}</p><ul>{}</ul></body></html>".format(
+            seed,words(rng,80),anchors)).encode()
+
+
+def site(server,pages):
+    """Serves the pages, a dictionary of path to (seed, links)"""
+    for path,(seed,links) in pages.items():
+        server.routes[path] = (200,{'Content-Type':'text/html'},page(seed,links))
+
+
+def crawl(server,**options):
+    options.setdefault('delay',0)
+    crawler = SiteCrawler(server.url('/'),**options)
+    return crawler,[url for url,content in crawler.crawl()]
+
+
+def requested(server):
+    return [path for path,headers in server.requests]
+
+
+def test_only_links_of_the_same_host_are_followed(http_server):
+    other = http_server.url('/other').replace('127.0.0.1','localhost')
+    site(http_server,{'/':(0,['/a',other,'mailto:someone@example.com']),'/a':(1,[]),'/other':(2,[])})
+    crawler,pages = crawl(http_server)
+    assert pages==[http_server.url('/'),http_server.url('/a')]
+    assert sorted(requested(http_server))==['/','/a']
+
+
+def test_tracking_parameters_are_removed_and_urls_fetched_once(http_server):
+    links = ['/a?utm_source=x&b=2&a=1','/a?a=1&b=2#top','/a?fbclid=1&a=1&b=2','/./a?b=2&a=1&ref=home']
+    site(http_server,{'/':(0,links),'/a?a=1&b=2':(1,['/','/a?b=2&a=1'])})
+    crawler,pages = crawl(http_server)
+    assert requested(http_server).count('/a?a=1&b=2')==1
+    assert pages==[http_server.url('/'),http_server.url('/a?a=1&b=2')]
+    assert SiteCrawler.canonical_url('HTTP://Example.com:80/p?utm_medium=m&sid=1&q=x#f')=='http://example.com/p?q=x'
+
+
+def test_max_depth(http_server):
+    site(http_server,{'/':(0,['/d1']),'/d1':(1,['/d2']),'/d2':(2,['/d3']),'/d3':(3,[])})
+    crawler,pages = crawl(http_server,max_depth=2)
+    assert pages==[http_server.url(path) for path in ['/','/d1','/d2']]
+    assert '/d3' not in requested(http_server)
+
+
+def test_max_pages(http_server):
+    site(http_server,dict([('/',(0,['/p{}'.format(i) for i in range(5)]))]+
+                          [('/p{}'.format(i),(i+1,[])) for i in range(5)]))
+    crawler,pages = crawl(http_server,max_pages=3)
+    assert pages==[http_server.url(path) for path in ['/','/p0','/p1']]
+    assert len(http_server.requests)==3
+
+
+def test_near_duplicates_are_skipped_but_their_links_followed(http_server):
+    site(http_server,{'/':(0,['/print','/a']),'/print':(0,['/b']),'/a':(1,[]),'/b':(2,[])})
+    crawler,pages = crawl(http_server)
+    assert pages==[http_server.url(path) for path in ['/','/a','/b']]
+    assert crawler.duplicates==[(http_server.url('/print'),http_server.url('/'))]
+
+
+def test_simhash_band_lookup():
+    crawler = SiteCrawler('http://example.com/',distance=3)
+    fingerprint = simhash(words(random.Random(0),200))
+    keys = crawler._band_keys(fingerprint)
+    for key in keys:
+        crawler._bands.setdefault(key,[]).append(('http://example.com/',fingerprint))
+    near = fingerprint^(1<<0|1<<20|1<<40)
+    assert crawler._find_duplicate(near,crawler._band_keys(near))=='http://example.com/'
+    far = fingerprint^(1<<0|1<<20|1<<40|1<<60)
+    assert crawler._find_duplicate(far,crawler._band_keys(far)) is None
+    text = words(random.Random(1),300)
+    assert bin(simhash(text)^simhash(text+' data')).count('1')<=3
+    assert bin(simhash(text)^simhash(words(random.Random(2),300))).count('1')>3
+
+
+def test_fetches_of_one_host_are_spaced_by_the_delay(http_server):
+    times = []
+    def timed(seed,links=()):
+        body = page(seed,links)
+        def route(handler):
+            times.append(time.monotonic())
+            handler.send_response(200)
+            handler.send_header('Content-Type','text/html')
+            handler.send_header('Content-Length',str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+        return route
+    http_server.routes['/'] = timed(0,['/a','/b','/c'])
+    for i,path in enumerate(['/a','/b','/c']):
+        http_server.routes[path] = timed(i+1)
+    crawler,pages = crawl(http_server,delay=0.3,concurrency=4)
+    assert len(pages)==4
+    times.sort()
+    assert all(b-a>=0.28 for a,b in zip(times,times[1:]))
+
+
+def test_errors_are_recorded(http_server):
+    site(http_server,{'/':(0,['/missing','/a']),'/a':(1,[])})
+    crawler,pages = crawl(http_server)
+    assert pages==[http_server.url('/'),http_server.url('/a')]
+    assert [url for url,error in crawler.errors]==[http_server.url('/missing')]
+    assert '404' in crawler.errors[0][1]
+
+
+def test_no_webpage_is_fetched_once_the_deadline_runs_out(http_server):
+    site(http_server,{'/':(0,['/a','/b']),'/a':(1,[]),'/b':(2,[])})
+    deadline = Deadline(0.3)
+    crawler,pages = crawl(http_server,delay=0.5,deadline=deadline)
+    assert pages==[http_server.url('/')] and requested(http_server)==['/']
+    assert deadline.partial
+    deadline = Deadline(0)
+    crawler,pages = crawl(http_server,deadline=deadline)
+    assert pages==[] and deadline.partial and len(http_server.requests)==1
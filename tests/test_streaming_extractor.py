@@ -0,0 +1,47 @@
+from StreamingExtractor import StreamingExtractor
+from UrlToText import UrlToText
+from conftest import random_page
+import pytest
+
+
+def tree_content(html):
+    try:
+        return UrlToText.from_html(html).get_total_content()
+    except Exception as e:
+        return str(e)
+
+
+def streamed_content(extractor):
+    try:
+        return extractor.get_total_content()
+    except Exception as e:
+        return str(e)
+
+
+@pytest.mark.parametrize('seed',range(300))
+def test_streaming_matches_tree(seed,tmp_path):
+    html = random_page(seed)
+    expected = tree_content(html)
+    assert streamed_content(StreamingExtractor.from_html(html))==expected
+    path = tmp_path/'page.html'
+    path.write_bytes(html.encode())
+    assert streamed_content(StreamingExtractor.from_file(str(path),chunk_size=13))==expected
+
+
+def test_text_after_script_is_not_part_of_the_first_string():
+    html = "<html><head><title>t</title></head><body><p>{} <script>var x;</script> {}</p></body></html>".format('a'*30,'b'*30)
+    assert tree_content(html)==['a'*30,'t']
+    assert streamed_content(StreamingExtractor.from_html(html))==['a'*30,'t']
+
+
+def test_charset_is_sniffed_when_the_header_has_none(http_server):
+    text = 'café au lait '*5
+    html = "<html><head><title>t</title></head><body><p>{}</p></body></html>".format(text)
+    http_server.routes['/plain'] = (200,{'Content-Type':'text/html'},html.encode('utf-8'))
+    meta = html.replace('<head>','<head><meta charset="windows-1252">')
+    http_server.routes['/meta'] = (200,{'Content-Type':'text/html'},meta.encode('windows-1252'))
+    http_server.routes['/header'] = (200,{'Content-Type':'text/html; charset=windows-1252'},html.encode('windows-1252'))
+    for path in ('/plain','/meta','/header'):
+        extractor = StreamingExtractor.from_url(http_server.url(path),chunk_size=7)
+        assert extractor.get_body_content()==[text.strip()]
+        assert UrlToText(http_server.url(path)).get_total_content()[0]==text.strip()
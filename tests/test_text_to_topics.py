@@ -0,0 +1,126 @@
+from TextToTopics import TextToTopics
+from conftest import words
+from test_ngram_counter import legacy_pmi
+from test_tokenizer import legacy_sentences
+from nltk.stem.wordnet import WordNetLemmatizer
+from collections import Counter
+import random
+import nltk
+import pytest
+
+pytestmark = pytest.mark.usefixtures('fake_nltk')
+
+
+def legacy_pos(token):
+    tag = nltk.pos_tag([token])[0][1]
+    return {'N':'n','V':'v','R':'r','J':'a','S':'s'}.get(tag[0],'n')
+
+
+def legacy_n_grams(content,n):
+    """The n-grams as TextToTopics built them before NgramCounter, tagging every word on its own"""
+    lmtzr = WordNetLemmatizer()
+    list_ngrams = []
+    for statement in content:
+        statement = " ".join([lmtzr.lemmatize(c.lower(),legacy_pos(c)) for c in statement.split()])
+        for sub in legacy_sentences(statement):
+            tokens = [t for t in sub if nltk.pos_tag([t])[0][1].startswith(('N','V','R','J','S'))]
+            if len(tokens) > n:
+                for i in range(len(tokens)-(n-1)):
+                    list_ngrams = list_ngrams + [tokens[i:i+n]]
+    return list_ngrams
+
+
+def legacy_pos_topics(content,n,number):
+    """The part of speech ranking as TextToTopics computed it before NgramCounter"""
+    ngrams = [" ".join(v) for v in legacy_n_grams(content,n)]
+    counter = Counter(ngrams)
+    counter_final = Counter()
+    for value in ngrams:
+        tags = [nltk.pos_tag([w])[0][1][0] for w in value.split(" ")]
+        if n==3 and tags[0] in ['J','N'] and tags[2] in ['J','N'] or \
+           n==2 and (tags[0]=='N' and tags[1]=='N' or tags[0]=='J' and tags[1]=='N'):
+            counter_final.update({value:counter[value]})
+    return counter_final.most_common(number)
+
+
+def random_content(seed,blocks=60):
+    rng = random.Random(seed)
+    content = []
+    for _ in range(blocks):
+        sentences = [words(rng,rng.randint(3,15)) for _ in range(rng.randint(1,4))]
+        content.append(". ".join(sentences).replace('&amp;','and').replace('&lt;tag&gt;','tag'))
+    return content
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    monkeypatch.setattr(TextToTopics,'SHARD_MIN_CHARS',1)
+
+
+@pytest.mark.parametrize('seed',range(3))
+def test_sharded_results_are_identical_to_serial(seed,small_shards):
+    content = random_content(seed)
+    serial = TextToTopics(content)
+    sharded = TextToTopics(content,processes=2)
+    assert sharded._sharded
+    assert sharded.topics([2,3],['pmi','pos'],None)==serial.topics([2,3],['pmi','pos'],None)
+    for n in (2,3):
+        a,b = serial.ngram_statistics(n),sharded.ngram_statistics(n)
+        assert list(a.ngram_counts.items())==list(b.ngram_counts.items())
+        assert a.position_counts==b.position_counts and a.total==b.total
+
+
+def test_sharded_n_grams(small_shards):
+    content = random_content(0)
+    expected = TextToTopics(content)._get_n_grams(2)
+    assert TextToTopics(content,processes=2)._get_n_grams(2)==expected
+    sharded = TextToTopics(content,processes=2)
+    sharded.pim_based_topics(2,5)
+    assert sharded._get_n_grams(2)==expected
+    assert sharded.pos_based_topics(2,5)==TextToTopics(content).pos_based_topics(2,5)
+
+
+@pytest.mark.parametrize('content',[[],[''],['too short']])
+def test_vectorised_without_n_grams(content):
+    assert TextToTopics(content,vectorised=True).pim_based_topics(3,5)==[]
+    assert TextToTopics(content,vectorised=True).pos_based_topics(2,5)==[]
+    assert TextToTopics(content,vectorised=True).topics([2,3],['pmi','pos'],5)==TextToTopics(content).topics([2,3],['pmi','pos'],5)
+
+
+@pytest.mark.parametrize('seed',range(4))
+@pytest.mark.parametrize('vectorised',[False,True])
+def test_rankings_match_the_legacy_pipeline(seed,vectorised):
+    content = random_content(seed,20)
+    for n in (2,3):
+        assert TextToTopics(content)._get_n_grams(n)==legacy_n_grams(content,n)
+        pmi = TextToTopics(content,vectorised=vectorised).pim_based_topics(n,5)
+        expected = legacy_pmi(legacy_n_grams(content,n),5)
+        assert [t for t,s in pmi]==[t for t,s in expected]
+        assert [s for t,s in pmi]==pytest.approx([s for t,s in expected])
+        assert TextToTopics(content,vectorised=vectorised).pos_based_topics(n,5)==legacy_pos_topics(content,n,5)
+
+
+def test_the_words_and_the_lemmas_are_tagged_in_one_batch_each(fake_nltk):
+    TextToTopics(random_content(0)).topics([2,3],['pmi','pos'],5)
+    assert fake_nltk['tagger']==2
+
+
+@pytest.mark.parametrize('seed',range(3))
+def test_approximate_counts_are_streamed_batch_by_batch(seed,monkeypatch):
+    monkeypatch.setattr(TextToTopics,'APPROXIMATE_BATCH',7)
+    batches = []
+    lemmatize_content = TextToTopics._lemmatize_content
+    def spy(self,statements=None):
+        batches.append(len(statements))
+        return lemmatize_content(self,statements)
+    monkeypatch.setattr(TextToTopics,'_lemmatize_content',spy)
+    content = random_content(seed)
+    exact = TextToTopics(content).topics([2,3],['pmi','pos'],10)
+    batches.clear()
+    text_topics = TextToTopics(content,approximate=64*1024*1024)
+    assert text_topics.topics([2,3],['pmi','pos'],10)==exact
+    assert batches==[7]*8+[4]
+    assert text_topics._token_stream is None and text_topics._lemmas=={}
+    vocabulary = text_topics._get_vocabulary()
+    assert sorted(text_topics._tags)==sorted(vocabulary.token(i) for i in range(len(vocabulary)))
+    assert text_topics.error_bounds(2)['ngram_count_error']==0
@@ -0,0 +1,51 @@
+from Tokenizer import Tokenizer
+import random
+import re
+import pytest
+
+ALPHABET = "aAbBcCMUS.. ,;:-=+_!?'\"/\\()[]{}<>|019\t\n é\x1cX"
+
+
+def legacy_sentences(statement):
+    """The tokens as TextToTopics built them before the Tokenizer, with _handle_period, split('.') and
+    _handle_punctuation"""
+    for a in re.findall(r'(?:[A-Z]\.)+',statement):
+        statement = statement.replace(a,a.replace(".",""))
+    sentences = []
+    for sub in statement.split("."):
+        sub = re.sub(r'[!@#$%*()_+-=\[\]\{\}|\\:;",\<\>\.|"]+',' ',sub)
+        sub = re.sub(' +',' ',sub)
+        sentences.append(sub.split())
+    return sentences
+
+
+def random_statements(seed,number=20000):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0,25))) for _ in range(number)]
+
+
+@pytest.mark.parametrize('statement',["U.S.A. and M.B.A","B.. x B.","U.S.A. S.A. xS.A.","e.g. the u.s.a.","don't stop",
+                                      "","...","a.b.c",r"x\y|z"])
+def test_sentences_match_the_legacy_pipeline(statement):
+    assert Tokenizer().sentences(statement)==legacy_sentences(statement)
+
+
+@pytest.mark.parametrize('seed',range(5))
+def test_sentences_match_the_legacy_pipeline_on_random_statements(seed):
+    tokenizer = Tokenizer()
+    for statement in random_statements(seed):
+        assert tokenizer.sentences(statement)==legacy_sentences(statement),repr(statement)
+
+
+@pytest.mark.parametrize('seed',range(2))
+def test_offsets_give_the_same_tokens(seed):
+    tokenizer = Tokenizer()
+    for statement in random_statements(seed,10000):
+        source,sentences = tokenizer.tokenize(statement)
+        assert [[source[start:end] for start,end in sentence] for sentence in sentences]==legacy_sentences(statement)
+
+
+def test_collapse_acronyms():
+    tokenizer = Tokenizer()
+    assert tokenizer.collapse_acronyms('an M.B.A. from the U.S.')=='an MBA from the US'
+    assert tokenizer.collapse_acronyms('no acronym here.')=='no acronym here.'
@@ -0,0 +1,79 @@
+from TopicService import TopicService
+from conftest import requires_nltk
+from test_response_cache import trickle_route
+import threading
+import time
+import requests
+import pytest
+
+PAGE = ("<html><head><title>Graph search</title></head><body><div><p>{}</p></div></body></html>".format(
+        "Graph search engines rank pages. Machine learning models rank graph search results. "*20))
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = TopicService(('127.0.0.1',0),workers=1,quiet=True).start()
+    thread = threading.Thread(target=service.serve_forever,daemon=True)
+    thread.start()
+    host,port = service._server.server_address
+    service.url = 'http://{}:{}'.format(host,port)
+    yield service
+    service.shutdown()
+    thread.join()
+
+
+def post(service,body):
+    return requests.post(service.url+'/topics',json=body,timeout=30)
+
+
+@pytest.mark.parametrize('body',[{'html':PAGE,'n':'3'},{'html':PAGE,'n':[2,'3']},{'html':PAGE,'n':0},
+                                 {'html':PAGE,'n':True},{'html':PAGE,'number':'5'},{'html':PAGE,'number':-1},
+                                 {'html':PAGE,'approach':'tfidf'},{'n':3},[1,2]])
+def test_invalid_requests_get_400(service,body):
+    response = post(service,body)
+    assert response.status_code==400
+    assert 'error' in response.json()
+
+
+@pytest.mark.parametrize('html',['<html><head><title>t</title></head><body></body></html>','not html at all',''])
+def test_html_without_content_gets_400(service,html):
+    response = post(service,{'html':html})
+    assert response.status_code==400
+
+
+def test_unreachable_url_gets_502(service,http_server):
+    response = post(service,{'url':http_server.url('/missing')})
+    assert response.status_code==502
+
+
+def test_health(service):
+    assert requests.get(service.url+'/health',timeout=5).json()['status']=='ok'
+
+
+@requires_nltk
+def test_topics(service):
+    response = post(service,{'html':PAGE,'n':[2,3],'approach':['pmi','pos'],'number':3})
+    assert response.status_code==200
+    results = response.json()['results']
+    assert sorted((r['approach'],r['n']) for r in results)==[('pmi',2),('pmi',3),('pos',2),('pos',3)]
+
+
+SLOW_PAGE = [b'<html><head><title>Slow graph search</title></head><body>']+[
+             b'<p>Graph search engines rank pages. Machine learning models rank graph search results.</p>']*30
+
+
+@pytest.mark.parametrize('deadline,partial',[(0.5,True),(None,False)])
+def test_deadline_of_every_request(http_server,fake_nltk,deadline,partial):
+    http_server.routes['/slow'] = trickle_route(SLOW_PAGE,0.05)
+    service = TopicService(('127.0.0.1',0),workers=1,quiet=True,deadline=deadline).start()
+    try:
+        for _ in range(2):
+            start = time.monotonic()
+            results = service.extract({'url':http_server.url('/slow'),'n':[2,3]})
+            assert len(results)==2 and all(r['partial']==partial for r in results)
+            if partial:
+                assert time.monotonic()-start<1.2
+            else:
+                assert all(r['topics'] for r in results)
+    finally:
+        service._close()
@@ -0,0 +1,52 @@
+from UrlToText import UrlToText
+from conftest import random_page
+import bs4
+import re
+import pytest
+
+
+def naive_body_content(text):
+    """The body content as the density filter found it before the statistics were computed in one pass, by
+    walking the subtree of every node"""
+    text._set_body()
+    body = text._body
+    text._filter_tags(body)
+    threshold = text._find_filter_threshold()
+    body_content = []
+    for child in body.findAll():
+        if type(child) is bs4.element.Tag and text._filter_content(child,25,threshold):
+            content = child.find(string=True,recursive=False)
+            if content is not None:
+                content = re.sub(r'\s+',' ',str(content)).strip()
+                if content!='' and len(content)>25:
+                    body_content.append(content)
+    return body_content
+
+
+@pytest.mark.parametrize('seed',range(200))
+def test_node_stats_match_walking_every_subtree(seed):
+    html = random_page(seed).replace('<b>','<b><![CDATA[ cdata ]]>')
+    text = UrlToText.from_html(html)
+    text._set_body()
+    text._filter_tags(text._body)
+    node_stats = text._get_node_stats(text._body)
+    for node in [text._body]+text._body.findAll():
+        links = sum(len(a.text) for a in node.findAll('a'))
+        assert node_stats[id(node)]==(len(node.findAll()),len(node.text),links)
+    assert text._find_filter_threshold(node_stats)==text._find_filter_threshold()
+
+
+@pytest.mark.parametrize('seed',range(200))
+def test_body_content_matches_the_subtree_walk(seed):
+    html = random_page(seed)
+    try:
+        expected = naive_body_content(UrlToText.from_html(html))
+    except Exception as e:
+        expected = str(e)
+    text = UrlToText.from_html(html)
+    try:
+        text._set_body()
+        content = text._get_body_content()
+    except Exception as e:
+        content = str(e)
+    assert content==expected